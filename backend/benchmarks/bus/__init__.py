@@ -0,0 +1,3 @@
+"""
+Message bus load benchmark suite (see run.py)
+"""
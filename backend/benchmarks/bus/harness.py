@@ -0,0 +1,210 @@
+"""
+Run one load profile against one bus backend
+
+Each (backend, profile) run happens in a fresh process (see run.py), so
+RSS numbers belong to that run alone. Latency is end to end: from just
+before publish() to the end of the handler, per delivery.
+"""
+import asyncio
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from magi.events.enhanced_backend import EnhancedMemoryMessageBackend, propagationMode
+from magi.events.events import Event, EventLevel
+from magi.events.histogram import LatencyHistogram
+from magi.events.memory_backend import MemoryMessageBackend
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+from profiles import LoadProfile
+
+BACKENDS = ("memory", "enhanced", "sqlite", "shm")
+NUM_WORKERS = 4
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def make_backend(name: str, profile: LoadProfile, workdir: str):
+    if name == "memory":
+        return MemoryMessageBackend(max_queue_size=profile.max_queue_size, num_workers=NUM_WORKERS)
+    if name == "enhanced":
+        return EnhancedMemoryMessageBackend(max_queue_size=profile.max_queue_size, num_workers=NUM_WORKERS)
+    if name == "sqlite":
+        return SQLiteMessageBackend(
+            db_path=os.path.join(workdir, "bus.db"),
+            max_queue_size=profile.max_queue_size,
+            num_workers=NUM_WORKERS,
+            persistent_connection=True,
+            claim_batch_size=64,
+            compaction_interval=0,
+        )
+    if name == "shm":
+        from magi.events.shm_backend import SharedMemoryMessageBackend
+        return SharedMemoryMessageBackend(
+            name=f"magi_bench_{uuid.uuid4().hex[:8]}",
+            slot_count=max(1024, min(profile.max_queue_size, 1 << 20)),
+            slot_size=max(256, profile.payload_bytes + 256),
+        )
+    raise ValueError(f"Unknown backend: {name}")
+
+
+class Recorder:
+    """Per-delivery end-to-end latency, overall and per event level"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.by_level: Dict[str, LatencyHistogram] = {}
+        self.last_handled_at = 0.0
+
+    def record(self, event: Event):
+        now = time.perf_counter()
+        seconds = now - event.data["sent"]
+        self.latency.record(seconds)
+        level = event.level.name
+        histogram = self.by_level.get(level)
+        if histogram is None:
+            histogram = self.by_level[level] = LatencyHistogram()
+        histogram.record(seconds)
+        self.last_handled_at = now
+
+
+def make_handler(profile: LoadProfile, recorder: Recorder):
+    delay = profile.handler_ms / 1000
+
+    if profile.handler == "sleep":
+        async def handler(event: Event):
+            await asyncio.sleep(delay)
+            recorder.record(event)
+    elif profile.handler == "cpu":
+        def handler(event: Event):
+            deadline = time.perf_counter() + delay
+            while time.perf_counter() < deadline:
+                pass
+            recorder.record(event)
+    else:
+        handler = recorder.record
+    return handler
+
+
+def event_levels(profile: LoadProfile, publisher: int) -> List[EventLevel]:
+    """Deterministic level sequence of one publisher"""
+    names = list(profile.priority_mix)
+    weights = [profile.priority_mix[name] for name in names]
+    rng = random.Random(profile.seed * 1000 + publisher)
+    return [EventLevel[name] for name in rng.choices(names, weights, k=profile.events_per_publisher)]
+
+
+async def run_profile(backend_name: str, profile: LoadProfile) -> dict:
+    """Drive one backend with one profile and collect the metrics"""
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = make_backend(backend_name, profile, workdir)
+        recorder = Recorder()
+        handler = make_handler(profile, recorder)
+        # the enhanced backend takes its own enum
+        mode = propagationMode(profile.mode) if backend_name == "enhanced" else profile.mode
+        for _ in range(profile.subscribers):
+            await backend.subscribe(
+                "BenchEvent", handler, propagation_mode=mode,
+                max_pending=profile.subscriber_max_pending,
+            )
+
+        levels = [event_levels(profile, p) for p in range(profile.publishers)]
+        padding = "x" * profile.payload_bytes
+        rss_before = rss_mb()
+        await backend.start()
+
+        async def publisher(index: int) -> int:
+            refused = 0
+            interval = 1 / profile.rate if profile.rate else 0.0
+            next_at = time.perf_counter()
+            for seq, level in enumerate(levels[index]):
+                event = Event(
+                    type="BenchEvent",
+                    data={"sent": time.perf_counter(), "seq": seq, "pad": padding},
+                    level=level,
+                    source=f"publisher-{index}",
+                )
+                if not await backend.publish(event):
+                    refused += 1
+                if interval:
+                    next_at += interval
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif seq % 64 == 63:
+                    await asyncio.sleep(0)  # let the other publishers in
+            return refused
+
+        started = time.perf_counter()
+        refused = sum(await asyncio.gather(*(publisher(p) for p in range(profile.publishers))))
+        publish_seconds = time.perf_counter() - started
+
+        # stop() drains the bus queue and the subscriber mailboxes
+        await backend.stop()
+        rss_after = rss_mb()
+        stats = backend.get_stats()
+        if asyncio.iscoroutine(stats):  # the enhanced backend's is sync
+            stats = await stats
+        if backend_name == "shm":
+            backend.unlink()
+
+    accepted = profile.total_events - refused
+    mailbox_drops = sum(s.get("dropped", 0) for s in stats.get("subscriptions", {}).values())
+    deliveries = recorder.latency.count
+    elapsed = max(recorder.last_handled_at - started, publish_seconds)
+
+    result = {
+        "backend": backend_name,
+        "profile": profile.name,
+        "published": accepted,
+        "refused": refused,
+        # never reached a handler: refused or evicted by the bus queue, dropped by a mailbox, overrun
+        "dropped": stats.get("dropped_count", 0) + mailbox_drops + stats.get("overrun_count", 0),
+        "deliveries": deliveries,
+        "elapsed_s": elapsed,
+        "publish_per_s": accepted / publish_seconds if publish_seconds else 0.0,
+        "deliveries_per_s": deliveries / elapsed if elapsed else 0.0,
+        "latency_ms": recorder.latency.snapshot(),
+        "rss_mb": rss_after,
+        "rss_growth_mb": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "handler_errors": stats.get("error_count", 0),
+    }
+    if len(profile.priority_mix) > 1:
+        result["latency_by_level_ms"] = {
+            level: recorder.by_level[level].snapshot()
+            for level in profile.priority_mix if level in recorder.by_level
+        }
+    return result
+
+
+def run_in_child(backend_name: str, profile_data: dict, results):
+    """Process entry point: run one profile, put the result (or the error) on the queue"""
+    try:
+        result = asyncio.run(run_profile(backend_name, LoadProfile.from_dict(profile_data)))
+    except Exception as e:
+        result = {"backend": backend_name, "profile": profile_data["name"], "error": repr(e)}
+    results.put(result)
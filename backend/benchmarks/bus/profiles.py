@@ -0,0 +1,106 @@
+"""
+Load profiles for the bus benchmark suite
+
+A profile fixes everything that shapes the load, so two runs of the same
+profile on the same machine are comparable: publisher and subscriber
+counts, propagation mode, handler cost, priority mix, payload size and
+publish rate. Custom profiles are JSON objects with the same fields
+(run.py --profile-file).
+"""
+import json
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, List
+
+from magi.events.events import EventLevel
+
+HANDLER_KINDS = ("none", "sleep", "cpu")
+MODES = ("broadcast", "competing")
+
+
+@dataclass
+class LoadProfile:
+    """One reproducible bus load"""
+
+    name: str
+    publishers: int = 1
+    subscribers: int = 1
+    mode: str = "broadcast"
+    events_per_publisher: int = 10000
+    # per publisher, 0 = as fast as the bus accepts
+    rate: float = 0.0
+    # "none", "sleep" (I/O-bound, awaits) or "cpu" (busy loop on the event loop)
+    handler: str = "none"
+    handler_ms: float = 0.0
+    # relative weights of EventLevel names; events are drawn deterministically (seeded)
+    priority_mix: Dict[str, float] = field(default_factory=lambda: {"INFO": 1.0})
+    payload_bytes: int = 64
+    max_queue_size: int = 100000
+    subscriber_max_pending: int = 1000
+    seed: int = 1
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown mode: {self.mode}")
+        if self.handler not in HANDLER_KINDS:
+            raise ValueError(f"Unknown handler: {self.handler}")
+        if self.publishers < 1 or self.subscribers < 1 or self.events_per_publisher < 1:
+            raise ValueError("publishers, subscribers and events_per_publisher must be positive")
+        unknown = set(self.priority_mix) - set(EventLevel.__members__)
+        if unknown:
+            raise ValueError(f"Unknown event levels in priority_mix: {sorted(unknown)}")
+
+    @property
+    def total_events(self) -> int:
+        return self.publishers * self.events_per_publisher
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoadProfile":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {sorted(unknown)}")
+        return cls(**data)
+
+
+BUILTIN_PROFILES: Dict[str, LoadProfile] = {
+    profile.name: profile
+    for profile in (
+        # raw bus overhead: one publisher, one no-op subscriber
+        LoadProfile("baseline", events_per_publisher=20000),
+        # many publishers, every subscriber gets every event
+        LoadProfile("fanout", publishers=4, subscribers=8, events_per_publisher=5000),
+        # work queue: I/O-bound handlers share the events
+        LoadProfile(
+            "competing", publishers=4, subscribers=4, mode="competing",
+            events_per_publisher=2500, handler="sleep", handler_ms=1.0,
+        ),
+        # handlers that burn CPU on the loop
+        LoadProfile(
+            "cpu_handlers", publishers=2, subscribers=2, events_per_publisher=2000,
+            handler="cpu", handler_ms=0.2,
+        ),
+        # overload with mixed priorities: the bus queue fills and drops
+        LoadProfile(
+            "priority_mix", publishers=4, subscribers=2, events_per_publisher=5000,
+            handler="sleep", handler_ms=0.5, max_queue_size=2000,
+            priority_mix={"DEBUG": 4, "INFO": 3, "WARNING": 2, "ERROR": 1, "CRITICAL": 0.5},
+        ),
+        # steady paced load: latency rather than throughput
+        LoadProfile(
+            "paced", publishers=2, subscribers=4, events_per_publisher=1000, rate=250,
+            handler="sleep", handler_ms=0.2,
+        ),
+    )
+}
+
+
+def load_profiles(path: str) -> List[LoadProfile]:
+    """Profiles from a JSON file holding one profile object or a list of them"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    return [LoadProfile.from_dict(item) for item in data]
@@ -0,0 +1,160 @@
+"""
+Message bus load benchmark suite
+
+Drives the bus backends with reproducible load profiles (profiles.py):
+publisher and subscriber counts, broadcast or competing delivery, handler
+cost (none / awaiting sleep / CPU on the loop) and priority mix. Every
+(backend, profile) pair runs in a fresh process and reports throughput,
+end-to-end latency p50/p99 (publish to handler done, per delivery),
+drops and RSS.
+
+--output writes the results as JSON; --baseline compares against an
+earlier --output file and exits with status 1 when throughput fell or p99
+latency rose by more than --tolerance.
+
+Usage:
+    python benchmarks/bus/run.py [--backends memory enhanced sqlite] [--profiles baseline fanout]
+        [--profile-file custom.json] [--scale 0.1] [--output results.json]
+        [--baseline previous.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harness import BACKENDS, run_in_child
+from profiles import BUILTIN_PROFILES, load_profiles
+
+CHILD_TIMEOUT = 600  # seconds per (backend, profile) run
+
+
+def run_isolated(backend_name: str, profile) -> dict:
+    """Run one profile in a fresh process"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run_in_child, args=(backend_name, profile.to_dict(), results))
+    process.start()
+    try:
+        result = results.get(timeout=CHILD_TIMEOUT)
+    except Exception:
+        result = {"backend": backend_name, "profile": profile.name, "error": "timed out"}
+    process.join(10)
+    if process.is_alive():
+        process.kill()
+    return result
+
+
+def environment() -> dict:
+    """Where the numbers come from"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def regressions(results: list, profiles: dict, baseline: dict, tolerance: float) -> list:
+    """(backend, profile, metric, before, after) that got worse by more than tolerance"""
+    previous = {(r["backend"], r["profile"]): r for r in baseline.get("results", []) if "error" not in r}
+    # a profile whose definition changed is not comparable
+    baseline_profiles = {p["name"]: p for p in baseline.get("profiles", [])}
+    found = []
+    for result in results:
+        before = previous.get((result["backend"], result["profile"]))
+        if before is None or "error" in result:
+            continue
+        if baseline_profiles.get(result["profile"]) != profiles[result["profile"]]:
+            continue
+        if result["deliveries_per_s"] < before["deliveries_per_s"] * (1 - tolerance):
+            found.append((result["backend"], result["profile"], "deliveries_per_s",
+                          before["deliveries_per_s"], result["deliveries_per_s"]))
+        if result["latency_ms"]["p99_ms"] > before["latency_ms"]["p99_ms"] * (1 + tolerance):
+            found.append((result["backend"], result["profile"], "p99_ms",
+                          before["latency_ms"]["p99_ms"], result["latency_ms"]["p99_ms"]))
+    return found
+
+
+def print_result(result: dict):
+    if "error" in result:
+        print(f"{result['backend']:<9} {result['profile']:<13} ERROR {result['error']}")
+        return
+    latency = result["latency_ms"]
+    print(f"{result['backend']:<9} {result['profile']:<13} {result['published']:>8} {result['dropped']:>7} "
+          f"{result['deliveries_per_s']:>12,.0f} {latency['p50_ms']:>9.2f} {latency['p99_ms']:>9.2f} "
+          f"{result['rss_mb'] or 0:>8.1f} {result['peak_rss_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["memory", "enhanced", "sqlite"])
+    parser.add_argument("--profiles", nargs="+", default=None, help="built-in profile names (default all)")
+    parser.add_argument("--profile-file", help="JSON file with custom profiles (replaces the built-ins)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply events per publisher (quick runs)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    if args.profile_file:
+        profiles = load_profiles(args.profile_file)
+    else:
+        names = args.profiles or list(BUILTIN_PROFILES)
+        unknown = set(names) - set(BUILTIN_PROFILES)
+        if unknown:
+            parser.error(f"unknown profiles {sorted(unknown)}, built-in: {sorted(BUILTIN_PROFILES)}")
+        profiles = [BUILTIN_PROFILES[name] for name in names]
+    if args.scale != 1.0:
+        profiles = [
+            replace(p, events_per_publisher=max(1, int(p.events_per_publisher * args.scale))) for p in profiles
+        ]
+
+    print(f"{'backend':<9} {'profile':<13} {'published':>8} {'dropped':>7} {'deliveries/s':>12} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'rss MB':>8} {'peak MB':>9}")
+    results = []
+    for profile in profiles:
+        for backend_name in args.backends:
+            result = run_isolated(backend_name, profile)
+            print_result(result)
+            results.append(result)
+
+    report = {
+        "environment": environment(),
+        "profiles": [profile.to_dict() for profile in profiles],
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    status = 1 if any("error" in r for r in results) else 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(
+                results, {p.name: p.to_dict() for p in profiles}, json.load(f), args.tolerance,
+            )
+        for backend_name, profile_name, metric, before, after in found:
+            print(f"REGRESSION {backend_name}/{profile_name} {metric}: {before:.2f} -> {after:.2f}")
+        if found:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Event codec throughput and on-disk size
+
+Compares the JSON path (json.dumps(event.to_dict()) / Event.from_dict)
+with the binary codec: encode and decode rate, payload size, and the size
+of an SQLite table holding the encoded events.
+
+Usage:
+    python benchmarks/codec.py [--events 50000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.codec import get_codec
+from magi.events.events import Event, EventLevel
+
+
+def make_events(count: int) -> list:
+    """a mix resembling loop phase, user message and task events"""
+    events = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            events.append(Event(
+                type="LoopPhaseStarted",
+                data={"phase": "sense", "status": "started", "step": i},
+                source="loop",
+                level=EventLevel.DEBUG,
+            ))
+        elif kind == 1:
+            events.append(Event(
+                type="UserMessage",
+                data={"message": f"message number {i} " * 4, "user_id": "u1", "session_id": "s1"},
+                source="chat",
+                metadata={"channel": "web"},
+            ))
+        else:
+            events.append(Event(
+                type="TaskCompleted",
+                data={"task_id": f"task-{i}", "result": {"ok": True, "score": 0.87, "tags": ["a", "b"]}},
+                source="task_manager",
+                level=EventLevel.WARNING,
+            ))
+    return events
+
+
+def table_size(payloads: list) -> int:
+    """bytes used by an SQLite table of the payloads"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "codec.db")
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload BLOB)")
+        db.executemany("INSERT INTO t (payload) VALUES (?)", ((p,) for p in payloads))
+        db.commit()
+        db.execute("VACUUM")
+        db.close()
+        return os.path.getsize(path)
+
+
+def bench(name: str, events: list) -> dict:
+    """encode every event, then decode every payload"""
+    codec = get_codec(name)
+
+    start = time.perf_counter()
+    payloads = [codec.encode(event) for event in events]
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in payloads:
+        codec.decode(payload)
+    decode_s = time.perf_counter() - start
+
+    return {
+        "codec": name,
+        "encode_per_s": len(events) / encode_s,
+        "decode_per_s": len(events) / decode_s,
+        "avg_bytes": sum(len(p) for p in payloads) / len(payloads),
+        "table_bytes": table_size(payloads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=50000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    results = [bench("json", events), bench("binary", events)]
+
+    print(f"{'codec':<8}{'encode/s':>12}{'decode/s':>12}{'avg bytes':>11}{'table KiB':>11}")
+    for r in results:
+        print(
+            f"{r['codec']:<8}{r['encode_per_s']:>12.0f}{r['decode_per_s']:>12.0f}"
+            f"{r['avg_bytes']:>11.1f}{r['table_bytes'] / 1024:>11.0f}"
+        )
+
+    json_r, binary_r = results
+    print(
+        f"\nbinary vs json: encode {binary_r['encode_per_s'] / json_r['encode_per_s']:.2f}x, "
+        f"decode {binary_r['decode_per_s'] / json_r['decode_per_s']:.2f}x, "
+        f"size {binary_r['avg_bytes'] / json_r['avg_bytes']:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Dispatch hot-path microbenchmark
+
+Compares the previous per-event dispatch (partition the subscriber list
+and inspect each handler on every event) with the precompiled
+DispatchTable shared by the bus backends. The bus queue is not involved.
+DispatchTable only enqueues into subscriber mailboxes, so it reports both
+the time a bus worker spends dispatching and the time until every
+mailbox is drained. --slow-ms makes one broadcast subscriber per type slow,
+which the inline path pays on every event.
+
+Usage:
+    python benchmarks/dispatch.py [--events 200000] [--types 20] [--broadcast 4] [--competing 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.dispatch import DispatchTable
+from magi.events.events import Event
+
+
+class InlineDispatch:
+    """The dispatch loop the backends used before DispatchTable"""
+
+    def __init__(self, stats: dict):
+        self._stats = stats
+        self._subscriptions = defaultdict(list)
+        self._handler_pending = defaultdict(int)
+
+    def add(self, subscription: dict):
+        self._subscriptions[subscription["event_type"]].append(subscription)
+
+    async def dispatch(self, event: Event):
+        subscriptions = self._subscriptions.get(event.type, [])
+        if not subscriptions:
+            return
+
+        broadcast_subscriptions = [s for s in subscriptions if s["mode"] == "broadcast"]
+        competing_subscriptions = [s for s in subscriptions if s["mode"] == "competing"]
+
+        for subscription in broadcast_subscriptions:
+            await self._handle_event(subscription, event)
+
+        if competing_subscriptions:
+            subscription = min(
+                competing_subscriptions, key=lambda s: self._handler_pending[s["handler"]]
+            )
+            await self._handle_event(subscription, event)
+
+    async def _handle_event(self, subscription: dict, event: Event):
+        if subscription["filter_func"]:
+            try:
+                if not subscription["filter_func"](event):
+                    return
+            except Exception:
+                pass
+
+        handler = subscription["handler"]
+        self._handler_pending[handler] += 1
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                await handler(event)
+            else:
+                handler(event)
+            self._stats["processed_count"] += 1
+        except Exception:
+            self._stats["error_count"] += 1
+        finally:
+            self._handler_pending[handler] -= 1
+
+
+def build(table, event_types: int, broadcast: int, competing: int, slow_ms: float):
+    """subscribe a mix of async and sync no-op handlers to every event type"""
+    async def async_handler(event):
+        return None
+
+    def sync_handler(event):
+        return None
+
+    async def slow_handler(event):
+        await asyncio.sleep(slow_ms / 1000)
+
+    for t in range(event_types):
+        event_type = f"BenchEvent{t}"
+        for i in range(broadcast + competing):
+            handler = async_handler if i % 2 == 0 else sync_handler
+            if slow_ms and i == 0:
+                handler = slow_handler
+            table.add({
+                "id": f"{event_type}_{i}",
+                "event_type": event_type,
+                "handler": handler,
+                "mode": "broadcast" if i < broadcast else "competing",
+                "filter_func": None,
+            })
+
+
+async def bench(name: str, table, events: list) -> dict:
+    """dispatch all events through one implementation"""
+    start = time.perf_counter()
+    for event in events:
+        await table.dispatch(event)
+    dispatched = time.perf_counter() - start
+    if isinstance(table, DispatchTable):
+        await table.join()
+        await table.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "impl": name,
+        "dispatch_s": dispatched,
+        "elapsed_s": elapsed,
+        "events_per_s": len(events) / elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--types", type=int, default=20)
+    parser.add_argument("--broadcast", type=int, default=4)
+    parser.add_argument("--competing", type=int, default=3)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    events = [
+        Event(type=f"BenchEvent{i % args.types}", data={"seq": i}, source="bench")
+        for i in range(args.events)
+    ]
+
+    results = []
+    for name, table_cls in (("inline", InlineDispatch), ("compiled", DispatchTable)):
+        stats = {"processed_count": 0, "error_count": 0}
+        table = table_cls(stats)
+        build(table, args.types, args.broadcast, args.competing, args.slow_ms)
+        results.append(await bench(name, table, events))
+
+    print(f"{'impl':<10}{'dispatch(s)':>12}{'elapsed(s)':>12}{'events/s':>14}")
+    for r in results:
+        print(
+            f"{r['impl']:<10}{r['dispatch_s']:>12.3f}{r['elapsed_s']:>12.3f}"
+            f"{r['events_per_s']:>14.0f}"
+        )
+
+    print(f"\nspeedup: {results[1]['events_per_s'] / results[0]['events_per_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Event allocation benchmark
+
+Compares the previous dataclass Event (uuid4 correlation id and a fresh
+metadata dict in __post_init__) with the slotted Event (lazy metadata and
+lazy time-ordered correlation id) for loop-phase style events that are
+created, published in memory and dropped. Reports construction rate and
+memory held per event (tracemalloc).
+
+Usage:
+    python benchmarks/event_alloc.py [--events 200000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event, EventLevel
+from magi.events.ids import new_event_id
+
+
+@dataclass
+class DataclassEvent:
+    """The Event definition before the slotted rewrite"""
+    type: str
+    data: Any
+    timestamp: float = field(default_factory=time.time)
+    source: str = "unknown"
+    level: EventLevel = EventLevel.INFO
+    correlation_id: Optional[str] = field(default=None)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.correlation_id is None:
+            self.correlation_id = str(uuid.uuid4())
+
+
+def create(cls, count: int) -> list:
+    return [
+        cls(type="LoopPhaseStarted", data=None, source="LoopEngine", level=EventLevel.DEBUG)
+        for _ in range(count)
+    ]
+
+
+def bench(name: str, cls, count: int) -> dict:
+    start = time.perf_counter()
+    create(cls, count)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    events = create(cls, count)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+
+    return {
+        "impl": name,
+        "events_per_s": count / elapsed,
+        "bytes_per_event": held / count,
+    }
+
+
+def bench_ids(count: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(count):
+        str(uuid.uuid4())
+    uuid_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(count):
+        new_event_id()
+    ulid_s = time.perf_counter() - start
+    return {"uuid4_per_s": count / uuid_s, "new_event_id_per_s": count / ulid_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = [
+        bench("dataclass", DataclassEvent, args.events),
+        bench("slotted", Event, args.events),
+    ]
+
+    print(f"{'impl':<11}{'events/s':>12}{'bytes/event':>13}")
+    for r in results:
+        print(f"{r['impl']:<11}{r['events_per_s']:>12.0f}{r['bytes_per_event']:>13.0f}")
+
+    old, new = results
+    print(
+        f"\nslotted vs dataclass: {new['events_per_s'] / old['events_per_s']:.2f}x faster, "
+        f"{new['bytes_per_event'] / old['bytes_per_event']:.0%} of the memory"
+    )
+
+    ids = bench_ids(args.events)
+    print(f"ids/s: uuid4 {ids['uuid4_per_s']:.0f}, new_event_id {ids['new_event_id_per_s']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
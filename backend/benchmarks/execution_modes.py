@@ -0,0 +1,109 @@
+"""
+Event loop lag with a CPU-heavy subscriber
+
+A pure-Python CPU-bound handler (--work-ms per event, standing in for
+embedding generation or relation extraction) subscribes to a steady
+stream of events. While they are handled, a probe measures how late a
+1 ms timer fires on the loop, i.e. how long HTTP/websocket traffic would
+have been stalled. Compared for inline, thread and process execution.
+
+Usage:
+    python benchmarks/execution_modes.py [--events 200] [--work-ms 20] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.executors import HandlerExecutors
+from magi.events.histogram import LatencyHistogram
+from magi.events.memory_backend import MemoryMessageBackend
+
+
+def burn(event):
+    """CPU-bound handler: event.data loop iterations of pure Python"""
+    total = 0
+    for i in range(event.data):
+        total += i * i
+    return total
+
+
+def iterations_per_ms() -> int:
+    """Calibrate burn() on this machine"""
+    started = time.perf_counter()
+    burn(Event(type="Embed", data=1_000_000))
+    return int(1_000_000 / ((time.perf_counter() - started) * 1000))
+
+
+async def run(execution: str, args) -> dict:
+    executors = HandlerExecutors(thread_workers=args.workers, process_workers=args.workers)
+    backend = MemoryMessageBackend()
+    backend._dispatch._executors = executors
+    results = []
+
+    await backend.subscribe(
+        "Embed", burn, execution=execution, concurrency=args.workers,
+        on_result=lambda event, result: results.append(result),
+    )
+    await backend.start()
+
+    if execution == "process":
+        # pay the worker start-up before measuring
+        await backend.publish_many([Event(type="Embed", data=0) for _ in range(args.workers)])
+        while len(results) < args.workers:
+            await asyncio.sleep(0.01)
+        results.clear()
+
+    lag = LatencyHistogram()
+    done = asyncio.Event()
+
+    async def probe():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + 0.001
+            await asyncio.sleep(0.001)
+            lag.record(loop.time() - expected)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    for _ in range(args.events):
+        await backend.publish(Event(type="Embed", data=args.iterations))
+        await asyncio.sleep(0)
+    while len(results) < args.events:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    await backend.stop()
+    executors.shutdown()
+    return {
+        "execution": execution,
+        "handled": len(results),
+        "seconds": elapsed,
+        **{key: value for key, value in lag.snapshot().items() if key.endswith("_ms")},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--work-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    args.iterations = int(args.work_ms * iterations_per_ms())
+
+    print(f"{'execution':<10} {'handled':>8} {'seconds':>8} "
+          f"{'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for execution in ("inline", "thread", "process"):
+        r = await run(execution, args)
+        print(f"{r['execution']:<10} {r['handled']:>8} {r['seconds']:>8.2f} "
+              f"{r['p50_ms']:>11.2f} {r['p99_ms']:>11.2f} {r['max_ms']:>11.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+User-message latency under a flood
+
+A producer floods the memory bus with WARNING LoopPhaseCompleted events
+faster than their (I/O-bound, --handler-ms per event) subscriber can
+handle them, so the bus queue backs up, while UserMessage events
+(INFO) arrive every --user-interval-ms. Reports the UserMessage latency
+(publish to handler) and how many were refused, for the default priority
+queue and for scheduling="fair" (priority aging + per-type fair queuing).
+
+Usage:
+    python benchmarks/fair_scheduling.py [--seconds 3] [--flood-burst 100] [--handler-ms 0.5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event, EventLevel
+from magi.events.memory_backend import MemoryMessageBackend
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(scheduling: str, args) -> dict:
+    backend = MemoryMessageBackend(
+        max_queue_size=args.queue_size, num_workers=4, scheduling=scheduling,
+    )
+    latencies = []
+
+    async def flood_handler(event):
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    def user_handler(event):
+        latencies.append(time.perf_counter() - event.data)
+
+    await backend.subscribe("LoopPhaseCompleted", flood_handler, max_pending=64)
+    await backend.subscribe("UserMessage", user_handler)
+    await backend.start()
+
+    async def flood():
+        seq = 0
+        while time.perf_counter() < end:
+            await backend.publish_many([
+                Event(type="LoopPhaseCompleted", data=seq + i, level=EventLevel.WARNING)
+                for i in range(args.flood_burst)
+            ])
+            seq += args.flood_burst
+            await asyncio.sleep(0.001)
+
+    async def users():
+        sent = refused = 0
+        while time.perf_counter() < end:
+            sent += 1
+            if not await backend.publish(Event(type="UserMessage", data=time.perf_counter())):
+                refused += 1
+            await asyncio.sleep(args.user_interval_ms / 1000)
+        return sent, refused
+
+    end = time.perf_counter() + args.seconds
+    _, (sent, refused) = await asyncio.gather(flood(), users())
+    # handle what is still queued; messages still waiting count with their full wait
+    deadline = time.perf_counter() + 10
+    while len(latencies) < sent - refused and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    result = {
+        "scheduling": scheduling,
+        "sent": sent,
+        "refused": refused,
+        "handled": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=float("nan")) * 1000,
+        "flood_dropped": stats["dropped_count"] - refused,
+    }
+    if "queue_wait" in stats:
+        result["user_max_wait_ms"] = stats["queue_wait"]["UserMessage"]["max_wait_ms"]
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--flood-burst", type=int, default=100)
+    parser.add_argument("--handler-ms", type=float, default=0.5)
+    parser.add_argument("--user-interval-ms", type=float, default=10.0)
+    parser.add_argument("--queue-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'scheduling':<10} {'sent':>6} {'refused':>8} {'handled':>8} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'flood dropped':>14}")
+    for scheduling in ("priority", "fair"):
+        r = await run(scheduling, args)
+        print(f"{r['scheduling']:<10} {r['sent']:>6} {r['refused']:>8} {r['handled']:>8} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f} {r['flood_dropped']:>14}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
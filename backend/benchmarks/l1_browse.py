@@ -0,0 +1,111 @@
+"""
+L1 event browsing latency on a large event_store
+
+Compares what GET /api/memory/l1/events used to do per request - a fresh
+connection, ORDER BY timestamp DESC with LIMIT/OFFSET paging and a full
+COUNT(*) - with keyset pages (RawEventStore.page) and the in-memory
+counts.
+
+Usage:
+    python benchmarks/l1_browse.py [--rows 1000000] [--types 20] [--pages 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.memory.raw_event_store import RawEventStore
+
+PAGE_SIZE = 50
+
+
+async def fill(store: RawEventStore, rows: int, types: int):
+    rng = random.Random(1)
+    start = time.time() - rows
+    for seq in range(rows):
+        await store.store(Event(
+            type=f"Type{rng.randrange(types)}",
+            data={"seq": seq},
+            timestamp=start + seq,
+            source="bench",
+        ))
+    await store.flush()
+
+
+async def offset_request(db_path: str, event_type, page: int) -> float:
+    """one request of the old endpoint: page by OFFSET, COUNT(*) every time"""
+    begin = time.perf_counter()
+    where = "WHERE type = ?" if event_type else ""
+    params = (event_type,) if event_type else ()
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute(
+            f"SELECT * FROM event_store {where} ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (*params, PAGE_SIZE, page * PAGE_SIZE),
+        )
+        await cursor.fetchall()
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM event_store")
+        await cursor.fetchone()
+    return time.perf_counter() - begin
+
+
+async def keyset_request(store: RawEventStore, event_type, before) -> tuple:
+    begin = time.perf_counter()
+    page = await store.page(event_type=event_type, limit=PAGE_SIZE, before=before)
+    store.count()
+    store.type_counts()
+    return time.perf_counter() - begin, page["next_cursor"]
+
+
+def ms(seconds) -> str:
+    return f"{sorted(seconds)[len(seconds) // 2] * 1000:8.2f} ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--types", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20, help="pages walked from the newest")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RawEventStore(
+            db_path=os.path.join(tmp, "events.db"),
+            media_dir=os.path.join(tmp, "media"),
+            write_batch_size=2000,
+        )
+        await store.init()
+        started = time.perf_counter()
+        await fill(store, args.rows, args.types)
+        print(f"filled {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'query':<36} {'first page':>11} {'median':>11} {'last page':>11}")
+        for event_type in (None, "Type0"):
+            label = event_type or "all types"
+            offset = [
+                await offset_request(store._expanded_db_path, event_type, page)
+                for page in range(args.pages)
+            ]
+            keyset = []
+            before = None
+            for _ in range(args.pages):
+                seconds, before = await keyset_request(store, event_type, before)
+                keyset.append(seconds)
+            for name, times in (("offset + COUNT(*)", offset), ("keyset + cached counts", keyset)):
+                print(
+                    f"{name + ' (' + label + ')':<36} "
+                    f"{times[0] * 1000:8.2f} ms {ms(times)} {times[-1] * 1000:8.2f} ms"
+                )
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+RawEventStore (L1) ingest rate
+
+Compares the previous write path - a fresh connection, one INSERT and a
+commit per event - with the long-lived WAL connection and write-behind
+batching. Rates include the final flush, so every event is committed.
+
+Usage:
+    python benchmarks/l1_ingest.py [--events 5000] [--batch-size 256] [--max-delay 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.ids import new_event_id
+from magi.memory.raw_event_store import RawEventStore
+
+
+def make_event(seq: int) -> Event:
+    return Event(
+        type="UserMessage",
+        data={"text": f"message {seq} " + "x" * 200, "user_id": f"user-{seq % 10}"},
+        source="chat",
+    )
+
+
+async def store_per_connection(store: RawEventStore, event: Event) -> str:
+    """the write path before batching: connect, insert, commit"""
+    data, metadata = store._encode_columns(event)
+    event_id = new_event_id(event.timestamp)
+    async with aiosqlite.connect(store._expanded_db_path) as db:
+        await db.execute(store._INSERT_SQL, (
+            event_id, event.type, data, None, event.timestamp, event.source,
+            event.level.value, event.correlation_id, metadata, time.time(),
+        ))
+        await db.commit()
+    return event_id
+
+
+async def bench(mode: str, events: int, batch_size: int, max_delay: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RawEventStore(
+            db_path=os.path.join(tmp, "events.db"),
+            media_dir=os.path.join(tmp, "media"),
+            write_batch_size=batch_size,
+            write_max_delay=max_delay,
+        )
+        await store.init()
+        if mode == "per-event":
+            # the old path ran on a rollback-journal database with synchronous=FULL
+            await store.close()
+            async with aiosqlite.connect(store._expanded_db_path) as db:
+                await db.execute("PRAGMA journal_mode=DELETE")
+
+        batch = [make_event(seq) for seq in range(events)]
+        start = time.perf_counter()
+        if mode == "per-event":
+            for event in batch:
+                await store_per_connection(store, event)
+        else:
+            for event in batch:
+                await store.store(event)
+        store_done = time.perf_counter()
+        await store.close()
+        elapsed = time.perf_counter() - start
+        stats = store.get_stats()
+
+    return {
+        "mode": mode,
+        "events_per_s": events / elapsed,
+        "store_call_us": (store_done - start) / events * 1e6,
+        "batches": stats["write_batches"] if mode == "batched" else events,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'events/s':>10} {'store() us':>11} {'commits':>8}")
+    for mode in ("per-event", "batched"):
+        result = await bench(mode, args.events, args.batch_size, args.max_delay)
+        print(
+            f"{result['mode']:<10} {result['events_per_s']:>10.0f} "
+            f"{result['store_call_us']:>11.1f} {result['batches']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
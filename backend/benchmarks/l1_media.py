@@ -0,0 +1,102 @@
+"""
+L1 media storage: one file per event vs content-addressed streaming
+
+Stores --events events carrying --size MB attachments drawn from
+--distinct different payloads (users resending the same image) and
+compares the previous write path - the whole payload written inline on
+the event loop to a new file per event - with MediaStore: disk used,
+ingest time and how long the event loop was blocked (loop lag).
+
+Usage:
+    python benchmarks/l1_media.py [--events 200] [--distinct 20] [--size 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.executors import LoopLagMonitor
+from magi.memory.raw_event_store import RawEventStore
+
+
+class Media:
+    def __init__(self, data: bytes, extension: str = "jpg"):
+        self.data = data
+        self.extension = extension
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+async def save_per_event(media_dir: str, media: Media) -> str:
+    """the previous _save_media: a new file per event, written on the loop"""
+    path = os.path.join(media_dir, time.strftime("%Y-%m-%d"), f"{uuid.uuid4()}.{media.extension}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(media.data)
+    return path
+
+
+async def bench(mode: str, payloads: list, events: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        media_dir = os.path.join(tmp, "media")
+        store = RawEventStore(db_path=os.path.join(tmp, "events.db"), media_dir=media_dir)
+        await store.init()
+        monitor = LoopLagMonitor(interval=0.005)
+        monitor.start()
+
+        started = time.perf_counter()
+        for seq in range(events):
+            media = Media(payloads[seq % len(payloads)])
+            event = Event(type="UserMessage", data={"seq": seq}, source="bench")
+            if mode == "per-event":
+                await save_per_event(media_dir, media)
+                await store.store(event)
+            else:
+                await store.store(event, media=media)
+            await asyncio.sleep(0)  # other coroutines get a turn between events
+        await store.flush()
+        elapsed = time.perf_counter() - started
+
+        await monitor.stop()
+        await store.close()
+        lag = monitor.get_stats()
+        return {
+            "mode": mode,
+            "elapsed_s": elapsed,
+            "disk_mb": dir_size(media_dir) / 2**20,
+            "lag_max_ms": lag["max_ms"],
+            "lag_p99_ms": lag["p99_ms"],
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--size", type=float, default=4, help="attachment size in MB")
+    args = parser.parse_args()
+
+    payloads = [os.urandom(int(args.size * 2**20)) for _ in range(args.distinct)]
+    print(f"{args.events} events, {args.distinct} distinct {args.size:g} MB attachments")
+    print(f"{'mode':<18} {'time':>8} {'disk':>10} {'loop lag p99':>13} {'max':>9}")
+    for mode in ("per-event", "content-addressed"):
+        result = await bench(mode, payloads, args.events)
+        print(
+            f"{result['mode']:<18} {result['elapsed_s']:>6.2f} s {result['disk_mb']:>7.0f} MB "
+            f"{result['lag_p99_ms']:>10.1f} ms {result['lag_max_ms']:>6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
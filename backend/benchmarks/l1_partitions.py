@@ -0,0 +1,116 @@
+"""
+L1 time partitions: storage size and read latency after sealing
+
+Fills the event store with --days days of events, seals everything past
+the hot window into compressed segments and compares the on-disk size
+and the latency of newest-first pages, pages deep in the cold days and
+time-range queries against the same data left in the event_store table.
+
+Usage:
+    python benchmarks/l1_partitions.py [--days 60] [--per-day 5000] [--hot-days 7]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.memory.raw_event_store import DAY, RawEventStore, encode_cursor
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+async def fill(store: RawEventStore, days: int, per_day: int):
+    today = time.time() // DAY * DAY
+    for day in range(days, 0, -1):
+        start = today - day * DAY
+        for seq in range(per_day):
+            await store.store(Event(
+                type=("UserMessage", "AIResponse", "ToolInvoked", "TaskCompleted")[seq % 4],
+                data={"text": f"message {seq} of day {day}", "user_id": f"user-{seq % 50}"},
+                timestamp=start + seq * DAY / per_day,
+                source="chat",
+            ))
+    await store.flush()
+
+
+async def median_ms(query, repeat: int = 20) -> float:
+    times = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        await query()
+        times.append(time.perf_counter() - begin)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+async def measure(store: RawEventStore, days: int) -> dict:
+    today = time.time() // DAY * DAY
+    deep = encode_cursor(today - (days - 2) * DAY, "")  # two days after the oldest
+    return {
+        "newest page": await median_ms(lambda: store.page(limit=50)),
+        "deep cold page": await median_ms(lambda: store.page(limit=50, before=deep)),
+        "deep page, one type": await median_ms(
+            lambda: store.page(event_type="TaskCompleted", limit=50, before=deep)
+        ),
+        "1h range, 30 days ago": await median_ms(
+            lambda: store.get_events_by_time_range(today - 30 * DAY, today - 30 * DAY + 3600, limit=500)
+        ),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--per-day", type=int, default=5000)
+    parser.add_argument("--hot-days", type=float, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RawEventStore(
+            db_path=os.path.join(tmp, "events.db"),
+            media_dir=os.path.join(tmp, "media"),
+            write_batch_size=2000,
+            hot_days=args.hot_days,
+            seal_interval=0,
+        )
+        await store.init()
+        await fill(store, args.days, args.per_day)
+        async with store._connection() as db:
+            await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        unsealed_size = dir_size(tmp)
+        unsealed = await measure(store, args.days)
+
+        started = time.perf_counter()
+        sealed_rows = await store.seal()
+        seal_seconds = time.perf_counter() - started
+        async with store._connection() as db:
+            await db.execute("VACUUM")
+            await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        sealed_size = dir_size(tmp)
+        sealed = await measure(store, args.days)
+        stats = store.get_stats()
+        await store.close()
+
+    total = args.days * args.per_day
+    print(f"{total} events over {args.days} days, {args.hot_days:g} hot days")
+    print(
+        f"sealed {sealed_rows} events into {stats['segments']} segments in {seal_seconds:.1f}s "
+        f"({sealed_rows / seal_seconds:.0f} events/s)"
+    )
+    print(f"on disk: {unsealed_size / 2**20:.1f} MB in event_store -> {sealed_size / 2**20:.1f} MB sealed")
+    print(f"{'query (median)':<24} {'one table':>10} {'hot + cold':>11}")
+    for name in unsealed:
+        print(f"{name:<24} {unsealed[name]:>7.2f} ms {sealed[name]:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+L1 keyword search: FTS5 index vs scanning texts in memory
+
+Stores --events events with random multi-word texts (the FTS5 index is
+maintained by the batched writer), then compares keyword_search() with
+the previous approach - `query in text.lower()` over every text held in
+memory - for rare, common and two-term queries. Also reports the ingest
+cost of indexing.
+
+Usage:
+    python benchmarks/l1_search.py [--events 1000000] [--queries 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.memory.raw_event_store import RawEventStore, event_text
+
+VOCABULARY = [f"w{n}" for n in range(20000)]
+
+
+def make_texts(events: int) -> list:
+    rng = random.Random(7)
+    # Zipf-like: low word numbers are common, high ones rare
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    return [" ".join(rng.choices(VOCABULARY, weights, k=12)) for _ in range(events)]
+
+
+async def ingest(store: RawEventStore, texts: list) -> float:
+    started = time.perf_counter()
+    for seq, text in enumerate(texts):
+        await store.store(Event(type="UserMessage", data={"text": text}, source="bench", correlation_id=f"c{seq}"))
+    await store.flush()
+    return len(texts) / (time.perf_counter() - started)
+
+
+def scan(texts: list, query: str, top_k: int) -> list:
+    """the previous keyword search: substring test over every text"""
+    query_lower = query.lower()
+    results = [text for text in texts if query_lower in text.lower()]
+    results.sort(key=len)
+    return results[:top_k]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = make_texts(args.events)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = RawEventStore(
+            db_path=os.path.join(tmp, "plain.db"), media_dir=os.path.join(tmp, "media"),
+            write_batch_size=2000, full_text=False,
+        )
+        sample = texts[:min(len(texts), 100000)]
+        plain_rate = await ingest(plain, sample)
+        await plain.close()
+
+        store = RawEventStore(
+            db_path=os.path.join(tmp, "events.db"), media_dir=os.path.join(tmp, "media"),
+            write_batch_size=2000,
+        )
+        indexed_rate = await ingest(store, sample)
+        rest_rate = await ingest(store, texts[len(sample):]) if len(texts) > len(sample) else indexed_rate
+        print(
+            f"ingest ({len(sample)} events): {plain_rate:.0f}/s without index, "
+            f"{indexed_rate:.0f}/s with index; {args.events} events total ({rest_rate:.0f}/s)"
+        )
+
+        in_memory = [event_text(Event(type="UserMessage", data={"text": text})) for text in texts]
+        print(f"{'query':<18} {'scan':>10} {'fts5':>10} {'matches (scan)':>15}")
+        for label, query in (("rare word", "w15000"), ("common word", "w3"), ("two words", "w10 w200")):
+            scan_times, fts_times = [], []
+            for _ in range(args.queries):
+                begin = time.perf_counter()
+                scan(in_memory, query.split()[0], 10)
+                scan_times.append(time.perf_counter() - begin)
+                begin = time.perf_counter()
+                await store.keyword_search(query, top_k=10)
+                fts_times.append(time.perf_counter() - begin)
+                if len(scan_times) >= 3:
+                    break  # the scan is the slow side, a few runs are enough
+            for _ in range(args.queries - len(fts_times)):
+                begin = time.perf_counter()
+                await store.keyword_search(query, top_k=10)
+                fts_times.append(time.perf_counter() - begin)
+            scan_ms = sorted(scan_times)[len(scan_times) // 2] * 1000
+            fts_ms = sorted(fts_times)[len(fts_times) // 2] * 1000
+            count = sum(1 for text in in_memory if query.split()[0] in text)
+            print(f"{label:<18} {scan_ms:>7.1f} ms {fts_ms:>7.2f} ms {count:>15}")
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+L2 relation extraction: scanning all events vs secondary indexes
+
+Feeds --events events from --users users through
+MemoryIntegrationModule._extract_l2_relations and reports the per-event
+cost as the relation store grows, next to the previous same-user rule
+that compared every stored event's user_id with the new one.
+
+Usage:
+    python benchmarks/l2_relations.py [--events 20000] [--users 200] [--window 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.memory.integration import MemoryIntegrationModule
+from magi.memory.l2_event_relations import EventRelationStore
+
+
+def make_events(count: int, users: int) -> list:
+    rng = random.Random(7)
+    return [
+        Event(
+            type=rng.choice(("UserMessage", "AIResponse", "ToolInvoked")),
+            data={"user_id": f"user-{rng.randrange(users)}", "seq": seq},
+            correlation_id=f"turn-{seq // 4}",
+        )
+        for seq in range(count)
+    ]
+
+
+def scan_same_user(store: EventRelationStore, event_id: str, user_id: str) -> int:
+    """the previous same-user rule: compare against every stored event"""
+    linked = 0
+    for other_id, other_event in store._events.items():
+        if other_id != event_id and other_event.get("data", {}).get("data", {}).get("user_id") == user_id:
+            store.add_relation(other_id, event_id, "SAME_user", 0.7, {"user_id": user_id})
+            linked += 1
+    return linked
+
+
+async def indexed(events: list, window: int, checkpoints: set) -> dict:
+    store = EventRelationStore(user_window=window)
+    module = MemoryIntegrationModule(SimpleNamespace(l2_relations=store), message_bus=None)
+    timings, started = {}, time.perf_counter()
+    for seq, event in enumerate(events, 1):
+        await module._extract_l2_relations(event, f"e{seq}")
+        if seq in checkpoints:
+            timings[seq] = time.perf_counter() - started
+    return timings
+
+
+def scanned(events: list, checkpoints: set, budget: float) -> dict:
+    store = EventRelationStore()
+    timings, started = {}, time.perf_counter()
+    for seq, event in enumerate(events, 1):
+        event_id = f"e{seq}"
+        store.add_event(event_id, {"id": event_id, "type": event.type, "data": event.data})
+        scan_same_user(store, event_id, event.data["user_id"])
+        if seq in checkpoints:
+            timings[seq] = time.perf_counter() - started
+            if timings[seq] > budget:
+                break
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument("--scan-budget", type=float, default=120.0, help="stop the scan after this many seconds")
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.users)
+    checkpoints = sorted({args.events * n // 10 for n in range(1, 11)})
+    new = await indexed(events, args.window, set(checkpoints))
+    old = scanned(events, set(checkpoints), args.scan_budget)
+
+    print(f"{args.events} events, {args.users} users, same-user window {args.window}")
+    print(f"{'events':>8} {'scan (us/event)':>16} {'indexed (us/event)':>19}")
+    previous, previous_new, previous_old = 0, 0.0, 0.0
+    for seq in checkpoints:
+        span = seq - previous
+        per_new = (new[seq] - previous_new) / span * 1e6
+        per_old = f"{(old[seq] - previous_old) / span * 1e6:>16.0f}" if seq in old else f"{'-':>16}"
+        print(f"{seq:>8} {per_old} {per_new:>19.1f}")
+        previous, previous_new, previous_old = seq, new[seq], old.get(seq, previous_old)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Bulk publish throughput
+
+Producers emit bursts of related events (e.g. one perception event per
+perception in a sense phase). Compares publishing each burst with one
+`await publish()` per event against a single publish_many() call, for the
+memory backend and both SQLite connection modes.
+
+Usage:
+    python benchmarks/publish_many.py [--events 4000] [--burst 16]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.memory_backend import MemoryMessageBackend
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+
+def make_burst(burst: int, seq: int) -> list:
+    return [
+        Event(type="PerceptionReceived", data={"seq": seq, "i": i}, source="bench")
+        for i in range(burst)
+    ]
+
+
+async def run(backend, total_events: int, burst: int, bulk: bool) -> float:
+    """publish total_events in bursts, return elapsed seconds"""
+    start = time.perf_counter()
+    for seq in range(total_events // burst):
+        events = make_burst(burst, seq)
+        if bulk:
+            await backend.publish_many(events)
+        else:
+            for event in events:
+                await backend.publish(event)
+    return time.perf_counter() - start
+
+
+async def bench(name: str, factory, total_events: int, burst: int) -> dict:
+    result = {"backend": name}
+    for bulk in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = factory(tmp, total_events)
+            await backend.start()
+            elapsed = await run(backend, total_events, burst, bulk)
+            await backend.stop()
+        result["publish_many" if bulk else "publish"] = total_events / elapsed
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=4000)
+    parser.add_argument("--burst", type=int, default=16)
+    args = parser.parse_args()
+
+    backends = [
+        ("memory", lambda tmp, n: MemoryMessageBackend(max_queue_size=n * 2, num_workers=0)),
+        ("sqlite", lambda tmp, n: SQLiteMessageBackend(
+            db_path=os.path.join(tmp, "bench.db"), max_queue_size=n * 2, num_workers=0,
+        )),
+        ("sqlite-wal", lambda tmp, n: SQLiteMessageBackend(
+            db_path=os.path.join(tmp, "bench.db"), max_queue_size=n * 2, num_workers=0,
+            persistent_connection=True,
+        )),
+    ]
+    results = [await bench(name, factory, args.events, args.burst) for name, factory in backends]
+
+    print(f"{'backend':<12}{'publish ev/s':>14}{'publish_many ev/s':>19}{'speedup':>9}")
+    for r in results:
+        print(
+            f"{r['backend']:<12}{r['publish']:>14.0f}{r['publish_many']:>19.0f}"
+            f"{r['publish_many'] / r['publish']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Cross-process bus: shared-memory ring vs SQLite
+
+--producers processes publish --events events each to a bus that a
+consumer in this process subscribes to, once as fast as they can
+(throughput) and once paced at --rate events/s in total (latency,
+publish to handler). Compares SharedMemoryMessageBackend with
+SQLiteMessageBackend (persistent WAL connection, the fastest SQLite mode).
+
+Usage:
+    python benchmarks/shm_vs_sqlite.py [--producers 2] [--events 5000] [--rate 2000]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.histogram import LatencyHistogram
+from magi.events.shm_backend import SharedMemoryMessageBackend
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+RING_SLOTS = 65536
+
+
+def make_backend(kind: str, target: str, consumer: bool):
+    if kind == "shm":
+        return SharedMemoryMessageBackend(name=target, slot_count=RING_SLOTS, slot_size=512)
+    return SQLiteMessageBackend(
+        db_path=target,
+        persistent_connection=True,
+        max_queue_size=10_000_000,
+        num_workers=4 if consumer else 0,
+        claim_batch_size=64,
+        poll_interval=0.005,
+        compaction_interval=0,
+    )
+
+
+def producer(kind: str, target: str, events: int, interval: float, start_at: float):
+    async def produce():
+        backend = make_backend(kind, target, consumer=False)
+        if kind == "sqlite":
+            await backend.start()
+        while time.time() < start_at:
+            await asyncio.sleep(0.001)
+        next_at = time.perf_counter()
+        for seq in range(events):
+            await backend.publish(Event(type="Bench", data={"seq": seq, "sent": time.time()}))
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        if kind == "sqlite":
+            await backend.stop()
+        else:
+            backend._detach()
+
+    asyncio.run(produce())
+
+
+async def run(kind: str, args, rate: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "bench.db") if kind == "sqlite" else f"magi_bench_{uuid.uuid4().hex[:8]}"
+        backend = make_backend(kind, target, consumer=True)
+        latency = LatencyHistogram()
+        total = args.producers * args.events
+
+        def handler(event):
+            latency.record(time.time() - event.data["sent"])
+
+        await backend.subscribe("Bench", handler, max_pending=10_000)
+        await backend.start()
+
+        start_at = time.time() + 3  # after the producers imported and attached
+        interval = args.producers / rate if rate else 0.0
+        processes = [
+            multiprocessing.get_context("spawn").Process(
+                target=producer, args=(kind, target, args.events, interval, start_at),
+            )
+            for _ in range(args.producers)
+        ]
+        for process in processes:
+            process.start()
+
+        deadline = start_at + 120
+        while latency.count < total and time.time() < deadline:
+            await asyncio.sleep(0.005)
+            if all(not process.is_alive() for process in processes) and kind == "shm":
+                stats = await backend.get_stats()
+                if stats["read_lag"] == 0 and latency.count + stats["overrun_count"] >= total:
+                    break
+        elapsed = time.time() - start_at
+        stats = await backend.get_stats()
+        await backend.stop()
+        for process in processes:
+            process.join()
+        if kind == "shm":
+            backend.unlink()
+
+    return {
+        "backend": kind,
+        "handled": latency.count,
+        "lost": stats.get("overrun_count", 0),
+        "events_per_s": latency.count / elapsed,
+        **latency.snapshot(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--producers", type=int, default=2)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000.0)
+    parser.add_argument("--backends", nargs="+", default=["shm", "sqlite"])
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'phase':<11} {'handled':>8} {'lost':>6} {'events/s':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for phase, rate in (("throughput", 0.0), (f"{args.rate:.0f}/s", args.rate)):
+        for kind in args.backends:
+            r = await run(kind, args, rate)
+            print(f"{r['backend']:<8} {phase:<11} {r['handled']:>8} {r['lost']:>6} {r['events_per_s']:>10,.0f} "
+                  f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
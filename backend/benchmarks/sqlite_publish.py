@@ -0,0 +1,88 @@
+"""
+SQLiteMessageBackend publish throughput
+
+Compares the per-call-connection path with the persistent WAL connection
+(group commit) mode under concurrent publishers.
+
+Usage:
+    python benchmarks/sqlite_publish.py [--events 5000] [--publishers 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+
+async def run_publishers(backend: SQLiteMessageBackend, total_events: int, publishers: int) -> float:
+    """publish total_events from concurrent publishers, return elapsed seconds"""
+    per_publisher = total_events // publishers
+
+    async def publisher(publisher_id: int):
+        for i in range(per_publisher):
+            await backend.publish(Event(
+                type="BenchEvent",
+                data={"publisher": publisher_id, "seq": i},
+                source="bench",
+            ))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(publisher(p) for p in range(publishers)))
+    return time.perf_counter() - start
+
+
+async def bench_mode(persistent: bool, total_events: int, publishers: int) -> dict:
+    """run one publish benchmark against a fresh database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteMessageBackend(
+            db_path=os.path.join(tmp, "bench.db"),
+            max_queue_size=total_events * 2,
+            num_workers=0,  # publish path only
+            persistent_connection=persistent,
+        )
+        await backend.start()
+        elapsed = await run_publishers(backend, total_events, publishers)
+        stats = await backend.get_stats()
+        await backend.stop()
+
+    published = stats["published_count"]
+    return {
+        "mode": "persistent" if persistent else "per-call",
+        "published": published,
+        "elapsed_s": elapsed,
+        "events_per_s": published / elapsed if elapsed else 0.0,
+        "batches": stats["publish_batches"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--publishers", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [
+        await bench_mode(False, args.events, args.publishers),
+        await bench_mode(True, args.events, args.publishers),
+    ]
+
+    print(f"{'mode':<12}{'published':>10}{'elapsed(s)':>12}{'events/s':>12}{'batches':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['published']:>10}{r['elapsed_s']:>12.3f}"
+            f"{r['events_per_s']:>12.0f}{r['batches']:>10}"
+        )
+
+    baseline = results[0]["events_per_s"]
+    if baseline:
+        print(f"\nspeedup: {results[1]['events_per_s'] / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+SQLiteMessageBackend replay throughput
+
+Fills a bus database with processed events (half compacted into
+message_archive), then measures how fast history() streams them back and
+how fast replay() re-dispatches them to a handler and to a subscription
+mailbox, with and without an event type filter.
+
+Usage:
+    python benchmarks/sqlite_replay.py [--events 200000] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from magi.events.events import Event
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+
+async def fill(backend: SQLiteMessageBackend, events: int):
+    """write processed rows directly (the publish path is benchmarked elsewhere)"""
+    await backend._init_db()
+    base = time.time() - events / 1000
+    rows = [
+        backend._encode_row(Event(
+            type=f"Bench{i % 10}",
+            data={"seq": i, "text": "x" * 64},
+            timestamp=base + i / 1000,
+            source="bench",
+        ))
+        for i in range(events)
+    ]
+    async with aiosqlite.connect(backend._expanded_db_path) as db:
+        await db.executemany(backend._INSERT_SQL, rows)
+        await db.execute("UPDATE message_queue SET processed = true")
+        await db.commit()
+    backend.compaction_chunk_size = events // 2
+    await backend._compact_chunk()
+
+
+async def timed(label: str, coroutine) -> None:
+    started = time.perf_counter()
+    count = await coroutine
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {count:>8} {elapsed:>8.2f} {count / elapsed:>12,.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteMessageBackend(db_path=os.path.join(tmp, "bench.db"))
+        await fill(backend, args.events)
+
+        async def stream(event_types=None):
+            count = 0
+            async for _ in backend.history(event_types=event_types, batch_size=args.batch_size):
+                count += 1
+            return count
+
+        async def replay(target, event_types=None):
+            result = await backend.replay(target, event_types=event_types, batch_size=args.batch_size)
+            return result["replayed"]
+
+        handled = []
+        subscription_id = await backend.subscribe("Bench*", lambda event: None, max_pending=args.batch_size)
+
+        print(f"{'':<34} {'events':>8} {'seconds':>8} {'events/s':>12}")
+        await timed("history (all)", stream())
+        await timed("history (1 type of 10)", stream(["Bench3"]))
+        await timed("replay -> handler", replay(handled.append))
+        await timed("replay -> subscription mailbox", replay(subscription_id))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,7 +16,6 @@ from magi.events.enhanced_backend import (
     PropagationMode,
     DropPolicy,
     BoundedPriorityQueue,
-    LoadAwareDispatcher,
 )
 
 
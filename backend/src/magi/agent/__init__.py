@@ -139,6 +139,7 @@ async def initialize_chat_agent():
         # createmessage bus（使用SQLite持久化后端）
         message_bus = SQLiteMessageBackend(
             db_path=str(runtime_paths.events_db_path),
+            persistent_connection=True,
         )
         await message_bus.start()
 
@@ -14,6 +14,7 @@ from typing import Any, Optional, Dict, List
 from ..core.complete_agent import CompleteAgent
 from ..core.agent import AgentConfig
 from ..events.backend import MessageBusBackend
+from ..events.ids import new_event_id
 from ..llm.base import LLMAdapter
 from ..llm.provider_bridge import LLMProviderBridge
 from ..utils.agent_logger import get_agent_logger, log_chain_start, log_chain_step, log_chain_end
@@ -23,6 +24,7 @@ from ..tools.selector import ToolSelector
 from ..tools.context_decider import ContextDecider
 from ..tools.function_calling import FunctionCallingExecutor
 from ..tools.schema import ToolExecutionContext
+from ..memory.raw_event_store import decode_data_columns
 from ..memory.self_memory import SelfMemory
 from ..memory.other_memory import OtherMemory
 from ..memory.behavior_evolution import Satisfactionlevel
@@ -627,9 +629,9 @@ class ChatAgent(CompleteAgent):
                 "record": record,
             }
 
-            event_id = str(uuid.uuid4())
-            correlation_id = str(uuid.uuid4())
             timestamp = float(record.get("timestamp", time.time()))
+            event_id = new_event_id(timestamp)
+            correlation_id = new_event_id(timestamp)
             conn = sqlite3.connect(str(self._events_db_path))
             cur = conn.cursor()
             cur.execute(
@@ -801,9 +803,11 @@ class ChatAgent(CompleteAgent):
         restored = 0
         for event_type, raw_data in rows:
             try:
-                payload = json.loads(raw_data or "{}")
+                payload = decode_data_columns(raw_data, None)[0] if raw_data else {}
             except Exception:
                 continue
+            if not isinstance(payload, dict):
+                continue
             user_id = payload.get("user_id")
             if not user_id:
                 continue
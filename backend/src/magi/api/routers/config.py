@@ -37,7 +37,7 @@ class LoopConfigModel(BaseModel):
 
 class MessageBusConfigModel(BaseModel):
     """message busConfiguration"""
-    backend: str = Field(default="memory", description="后端type: memory, sqlite, redis")
+    backend: str = Field(default="memory", description="后端type: memory, sqlite, redis, shm")
     max_size: Optional[int] = Field(None, description="maximumqueuesize")
 
 
@@ -119,75 +119,81 @@ def get_memory_integration():
 async def get_l1_events(
     limit: int = Query(default=50, ge=1, le=500, description="Returnquantitylimitation"),
     event_type: Optional[str] = Query(None, description="filtereventtype"),
+    before: Optional[str] = Query(None, description="cursor: older events (next_cursor of a page)"),
+    after: Optional[str] = Query(None, description="cursor: newer events (prev_cursor of a page)"),
 ):
     """
-    get L1 原始eventlist
+    get L1 原始eventlist (newest first, keyset-paginated)
 
     Args:
         limit: Returnquantitylimitation
         event_type: filtereventtype
+        before: cursor of the next (older) page
+        after: cursor of the previous (newer) page
 
     Returns:
-        eventlistandstatisticsinfo
+        eventlist, page cursors andstatisticsinfo
     """
     unified_memory = get_unified_memory()
 
     if not unified_memory or not unified_memory.l1_raw:
         return {
             "events": [],
-            "stats": {"total": 0},
+            "next_cursor": None,
+            "prev_cursor": None,
+            "stats": {"total": 0, "by_type": {}},
         }
 
+    from ...memory.raw_event_store import decode_cursor
+
+    if before is not None and after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass either before or after, not both",
+        )
     try:
-        import aiosqlite
-        import json
-
-        # getevent（从 event_store table）
-        events = []
-        async with aiosqlite.connect(unified_memory.l1_raw._expanded_db_path) as db:
-            if event_type:
-                cursor = await db.execute("""
-                    SELECT id, Type, data, timestamp, source, level, correlation_id, metadata
-                    FROM event_store
-                    WHERE type = ?
-                    order BY timestamp DESC
-                    LIMIT ?
-                """, (event_type, limit))
-            else:
-                cursor = await db.execute("""
-                    SELECT id, Type, data, timestamp, source, level, correlation_id, metadata
-                    FROM event_store
-                    order BY timestamp DESC
-                    LIMIT ?
-                """, (limit,))
-            rows = await cursor.fetchall()
-            for row in rows:
-                events.append({
-                    "id": row[0],
-                    "type": row[1],
-                    "data": json.loads(row[2]) if row[2] else {},
-                    "timestamp": row[3],
-                    "source": row[4],
-                    "level": row[5],
-                    "correlation_id": row[6],
-                    "metadata": json.loads(row[7]) if row[7] else {},
-                })
-
-        # get总数
-        async with aiosqlite.connect(unified_memory.l1_raw._expanded_db_path) as db:
-            cursor = await db.execute("SELECT COUNT(*) FROM event_store")
-            total = (await cursor.fetchone())[0]
+        for cursor in (before, after):
+            if cursor is not None:
+                decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
 
-        return {
-            "events": events,
-            "stats": {"total": total},
-        }
+    l1_raw = unified_memory.l1_raw
+    try:
+        page = await l1_raw.page(event_type=event_type, limit=limit, before=before, after=after)
     except Exception as e:
         logger.error(f"Failed to get L1 events: {e}")
         return {
             "events": [],
-            "stats": {"total": 0},
+            "next_cursor": None,
+            "prev_cursor": None,
+            "stats": {"total": 0, "by_type": {}},
+        }
+
+    events = [
+        {
+            "id": event_id,
+            "type": event.type,
+            "data": event.data,
+            "timestamp": event.timestamp,
+            "source": event.source,
+            "level": event.level.value,
+            "correlation_id": event.correlation_id,
+            "metadata": event.metadata,
         }
+        for event_id, event in page["events"]
+    ]
+
+    # counts are maintained by the store, not counted per request
+    return {
+        "events": events,
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+        "stats": {"total": l1_raw.count(), "by_type": l1_raw.type_counts()},
+    }
 
 
 @memory_router.get("/l2/statistics")
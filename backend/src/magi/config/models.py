@@ -11,6 +11,7 @@ class MessageBusBackend(str, Enum):
     MEMORY = "memory"
     SQLITE = "sqlite"
     REDIS = "redis"
+    SHARED_MEMORY = "shm"
 
 
 class DropPolicy(str, Enum):
@@ -33,6 +34,9 @@ class MessageBusConfig(BaseModel):
     # RedisConfiguration
     redis: Optional[Dict[str, Any]] = Field(default=None)
 
+    # Shared memory ring Configuration (name, slot_count, slot_size, ...)
+    shm: Optional[Dict[str, Any]] = Field(default=None)
+
 
 class LLMProvider(str, Enum):
     """LLM提供商"""
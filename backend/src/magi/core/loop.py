@@ -291,11 +291,12 @@ class LoopEngine:
         sense_start = time.time()
         perceptions = await self.agent.perception_module.perceive()
 
-        # Publish perception received event
+        # Publish perception received events (one batch per sense phase)
         from ..events.events import Event, EventTypes, EventLevel
+        events = []
         for perception in perceptions:
             correlation_id = self._extract_perception_correlation_id(perception)
-            event = Event(
+            events.append(Event(
                 type=EventTypes.PERCEPTION_RECEIVED,
                 data={
                     "perception_type": perception.type,
@@ -305,8 +306,9 @@ class LoopEngine:
                 source="LoopEngine",
                 level=EventLevel.DEBUG,
                 correlation_id=correlation_id,
-            )
-            await self.agent.message_bus.publish(event)
+            ))
+        if events:
+            await self.agent.message_bus.publish_many(events)
 
         # Update statistics
         self._phase_stats["sense"]["count"] += 1
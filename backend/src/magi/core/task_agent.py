@@ -3,6 +3,7 @@ Agent Core - TaskAgent and WorkerAgent Implementation
 """
 import asyncio
 import logging
+import time
 from typing import Optional, Dict, Any, List
 from .agent import Agent, AgentState, AgentConfig
 from .task_database import Task, TaskStatus, TaskDatabase
@@ -86,22 +87,43 @@ class TaskAgent(Agent):
         self.llm = llm_adapter
         self.tool_registry = tool_registry
         self._pending_count = 0  # Current pending task count
-        self._scan_task: Optional[asyncio.Task] = None
+        self._scan_interval = 1.0
+        self._scan_schedule: Optional[str] = None
+        self._scan_subscription: Optional[str] = None
         self._running_workers: Dict[str, WorkerAgent] = {}
 
     async def _on_start(self):
         """Start TaskAgent"""
-        self._scan_task = asyncio.create_task(self._scan_tasks())
+        # Scans are driven by a recurring bus schedule instead of a sleep loop.
+        # A one-slot mailbox that drops new ticks keeps at most one scan queued
+        # behind a slow one.
+        self._scan_subscription = await self.message_bus.subscribe(
+            EventTypes.TASK_SCAN_DUE,
+            self._scan_tasks,
+            filter_func=lambda event: event.data.get("task_agent_id") == self.agent_id,
+            max_pending=1,
+            overflow_policy="drop_newest",
+        )
+        self._scan_schedule = await self.message_bus.schedule(
+            Event(
+                type=EventTypes.TASK_SCAN_DUE,
+                data={"task_agent_id": self.agent_id},
+                source=f"TaskAgent-{self.agent_id}",
+                level=EventLevel.DEBUG,
+            ),
+            interval=self._scan_interval,
+            start_at=time.time(),
+        )
         logger.info(f"TaskAgent-{self.agent_id} started")
 
     async def _on_stop(self):
         """Stop TaskAgent"""
-        if self._scan_task:
-            self._scan_task.cancel()
-            try:
-                await self._scan_task
-            except asyncio.CancelledError:
-                pass
+        if self._scan_schedule:
+            await self.message_bus.cancel_schedule(self._scan_schedule)
+            self._scan_schedule = None
+        if self._scan_subscription:
+            await self.message_bus.unsubscribe(self._scan_subscription)
+            self._scan_subscription = None
 
         # Wait for all WorkerAgents to finish
         if self._running_workers:
@@ -111,32 +133,32 @@ class TaskAgent(Agent):
 
         logger.info(f"TaskAgent-{self.agent_id} stopped")
 
-    async def _scan_tasks(self):
+    async def _scan_tasks(self, event: Event):
         """
         Scan task database
 
-        Continuously scan for pending tasks assigned to self and execute them
+        Runs on every TaskScanDue tick and executes pending tasks assigned to self
+
+        Args:
+            event: Scan tick from the bus schedule
         """
-        while self.state == AgentState.runNING:
-            try:
-                # Get pending tasks assigned to this TaskAgent
-                pending_tasks = await self.task_database.get_pending_tasks(
-                    limit=5,
-                    assigned_to=str(self.agent_id),
-                )
+        if self.state != AgentState.runNING:
+            return
 
-                for task in pending_tasks:
-                    if task.status == TaskStatus.pending.value:
-                        await self._process_task(task)
+        try:
+            # Get pending tasks assigned to this TaskAgent
+            pending_tasks = await self.task_database.get_pending_tasks(
+                limit=5,
+                assigned_to=str(self.agent_id),
+            )
 
-                # Wait for a while
-                await asyncio.sleep(1.0)
+            for task in pending_tasks:
+                if task.status == TaskStatus.pending.value:
+                    await self._process_task(task)
 
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"TaskAgent-{self.agent_id} scan error: {e}")
-                await self._publish_error_event(f"TaskAgent-{self.agent_id}", str(e))
+        except Exception as e:
+            logger.error(f"TaskAgent-{self.agent_id} scan error: {e}")
+            await self._publish_error_event(f"TaskAgent-{self.agent_id}", str(e))
 
     async def assign_task(self, task: Task):
         """
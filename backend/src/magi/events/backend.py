@@ -2,7 +2,8 @@
 Message Bus - Abstract Backend Interface
 """
 from abc import ABC, abstractmethod
-from typing import Callable, Optional, List
+from typing import Any, Callable, Optional, List, Union
+from .coalesce import CoalescePolicy
 from .events import Event
 
 
@@ -14,21 +15,77 @@ class MessageBusBackend(ABC):
     - MemoryMessageBackend: Memory queue based on asyncio.priorityQueue
     - SQLiteMessageBackend: persistent queue based on aiosqlite
     - RedisMessageBackend: Distributed queue based on Redis Streams
+    - SharedMemoryMessageBackend: Single-host multi-process ring buffer in shared memory
     """
 
     @abstractmethod
-    async def publish(self, Event: Event) -> bool:
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
         """
         Publish event to message bus
 
         Args:
             event: Event to publish
+            deliver_at: Unix time before which the event is not delivered
+                (None or a past time delivers immediately)
 
         Returns:
             bool: Whether the event was successfully published
         """
         pass
 
+    @abstractmethod
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        Publish a batch of events in one queue operation
+
+        Memory backends take the queue lock once for the whole batch,
+        persistent backends write it in one transaction / round-trip.
+
+        Args:
+            events: Events to publish, in order
+
+        Returns:
+            List[bool]: Per event, whether it was accepted under the drop policy
+        """
+        pass
+
+    @abstractmethod
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        Publish an event every interval seconds
+
+        Recurring schedules live in the bus process and are not persisted;
+        owners register them again on start.
+
+        Args:
+            event: Template event (published as a fresh copy each time)
+                or a zero-argument callable returning the event
+            interval: Period in seconds
+            start_at: Unix time of the first publish (default now + interval)
+
+        Returns:
+            str: Schedule id
+        """
+        pass
+
+    @abstractmethod
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """
+        Cancel a recurring schedule
+
+        Args:
+            schedule_id: Schedule id
+
+        Returns:
+            bool: Whether the schedule existed
+        """
+        pass
+
     @abstractmethod
     async def subscribe(
         self,
@@ -36,15 +93,35 @@ class MessageBusBackend(ABC):
         handler: Callable,
         propagation_mode: str = "broadcast",
         filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
     ) -> str:
         """
         Subscribe to event
 
+        Every subscription gets its own bounded mailbox drained by
+        `concurrency` consumer tasks; bus workers only enqueue into it.
+
         Args:
-            event_type: event type (e.g. "AgentStarted")
+            event_type: event type (e.g. "AgentStarted") or wildcard pattern
+                ("Task*", "Loop.*", "*"; see events.topics)
             handler: event handler function (async def handler(event: Event))
             propagation_mode: propagation mode ("broadcast" | "competing")
             filter_func: event filter function (only process when returns True)
+            concurrency: number of concurrent handler calls for this subscription
+            max_pending: mailbox capacity
+            overflow_policy: when the mailbox is full ("block" | "drop_oldest" | "drop_newest")
+            coalesce: coalescing policy for high-frequency event types
+                (CoalescePolicy.latest/aggregate/sample; see events.coalesce)
+            execution: where the handler runs ("inline" on the event loop,
+                "thread" in a thread pool, "process" in a worker process pool for
+                CPU-heavy handlers; see events.executors)
+            on_result: called on the loop with (event, handler return value)
+                after each handler call (sync or async)
 
         Returns:
             str: Subscription id
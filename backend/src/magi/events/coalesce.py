@@ -0,0 +1,232 @@
+"""
+Message Bus - per-subscription event coalescing
+
+High-frequency event types (LoopPhaseStarted/Completed for every phase of
+every iteration, sensor samples every second) do not need one handler
+call each for every subscriber. A subscription declares a CoalescePolicy
+and its events pass through a Coalescer before reaching the mailbox:
+
+- latest(window): the first event opens a window, later ones replace it,
+  the newest is delivered when the window closes
+- aggregate(window, reducer): like latest, but the delivered event's data
+  is reducer([data, ...]) of every event in the window (default the list)
+- sample(every): one event in every N is delivered
+
+Nothing is dropped silently: a delivered event that stands for more than
+one published event is a copy with metadata["coalesced"] = {"count": n,
+"first_timestamp": t}, and the subscription stats count coalesced events.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .events import Event
+from .mailbox import DeliveryTracker
+
+COALESCE_MODES = ("latest", "aggregate", "sample")
+
+
+class CoalescePolicy:
+    """How a subscription coalesces events (one state per event type)"""
+
+    __slots__ = ("mode", "window", "every", "reducer")
+
+    def __init__(
+        self,
+        mode: str,
+        window: float = 1.0,
+        every: int = 10,
+        reducer: Optional[Callable[[List[Any]], Any]] = None,
+    ):
+        """
+        initialize coalescing policy
+
+        Args:
+            mode: latest/aggregate/sample
+            window: latest/aggregate: seconds an event is held for later ones
+            every: sample: deliver one event in every `every`
+            reducer: aggregate: combines the data of the window's events (default list)
+        """
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"Unknown coalesce mode: {mode}")
+        if window <= 0 or every < 1:
+            raise ValueError("window and every must be positive")
+
+        self.mode = mode
+        self.window = window
+        self.every = every
+        self.reducer = reducer
+
+    @classmethod
+    def latest(cls, window: float) -> "CoalescePolicy":
+        """Deliver the newest event of each window"""
+        return cls("latest", window=window)
+
+    @classmethod
+    def aggregate(cls, window: float, reducer: Optional[Callable[[List[Any]], Any]] = None) -> "CoalescePolicy":
+        """Deliver one event per window carrying reducer(data of every event)"""
+        return cls("aggregate", window=window, reducer=reducer)
+
+    @classmethod
+    def sample(cls, every: int) -> "CoalescePolicy":
+        """Deliver one event in every `every`"""
+        return cls("sample", every=every)
+
+
+class _Window:
+    """Events of one type held until their window closes"""
+
+    __slots__ = ("event", "count", "first_timestamp", "data", "trackers", "timer")
+
+    def __init__(self, event: Event):
+        self.event = event
+        self.count = 1
+        self.first_timestamp = event.timestamp
+        self.data: List[Any] = [event.data]
+        self.trackers: List[DeliveryTracker] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class Coalescer:
+    """
+    Coalescing stage in front of one subscription's mailbox
+
+    Held events keep their delivery tracker, so persistent backends only
+    ack them once the coalesced event was handled (or on discard).
+    """
+
+    def __init__(self, policy: CoalescePolicy, put: Callable[[Event, Optional[DeliveryTracker]], Awaitable[bool]]):
+        """
+        initialize coalescer
+
+        Args:
+            policy: Coalescing policy
+            put: Mailbox put coroutine function
+        """
+        self.policy = policy
+        self._put = put
+        self._windows: Dict[str, _Window] = {}
+        self._sample_counts: Dict[str, int] = {}
+        self._flushing: set = set()  # emit tasks of closed windows
+
+        # statistics
+        self._coalesced = 0  # events folded into another delivered event
+        self._emitted = 0
+
+    def offer(self, event: Event, tracker: Optional[DeliveryTracker] = None) -> Optional[Event]:
+        """
+        Pass an event through the policy
+
+        Args:
+            event: Dispatched event
+            tracker: Its delivery tracker, held while the event waits in a window
+
+        Returns:
+            Optional[Event]: Event to put into the mailbox now (None: held or coalesced)
+        """
+        if self.policy.mode == "sample":
+            count = self._sample_counts.get(event.type, 0) + 1
+            if count < self.policy.every:
+                self._sample_counts[event.type] = count
+                self._coalesced += 1
+                return None
+            self._sample_counts[event.type] = 0
+            self._emitted += 1
+            return _annotate(event, event.data, count, None)
+
+        window = self._windows.get(event.type)
+        if window is None:
+            window = self._windows[event.type] = _Window(event)
+            window.timer = asyncio.get_running_loop().call_later(
+                self.policy.window, self._close, event.type
+            )
+        else:
+            window.event = event
+            window.count += 1
+            window.data.append(event.data)
+            self._coalesced += 1
+
+        if tracker is not None:
+            tracker.add()
+            window.trackers.append(tracker)
+        return None
+
+    def _close(self, event_type: str):
+        """Window timer: deliver the window's event"""
+        window = self._windows.pop(event_type, None)
+        if window is None:
+            return
+        task = asyncio.create_task(self._emit(window))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _emit(self, window: _Window):
+        """Put the coalesced event of a closed window into the mailbox"""
+        if self.policy.mode == "aggregate":
+            reducer = self.policy.reducer
+            data = reducer(window.data) if reducer is not None else window.data
+        else:
+            data = window.event.data
+        event = _annotate(window.event, data, window.count, window.first_timestamp)
+
+        trackers = window.trackers
+        tracker = None
+        if trackers:
+            # acked once the coalesced event was handled: release every held event then
+            tracker = DeliveryTracker(lambda: [held.done() for held in trackers])
+        try:
+            await self._put(event, tracker)
+            self._emitted += 1
+        finally:
+            if tracker is not None:
+                tracker.done()
+
+    async def flush(self):
+        """Deliver every open window now (bus stop)"""
+        for event_type in list(self._windows):
+            window = self._windows.get(event_type)
+            if window is not None and window.timer is not None:
+                window.timer.cancel()
+            self._close(event_type)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def discard(self):
+        """Drop open windows (unsubscribe), releasing their held deliveries"""
+        for window in self._windows.values():
+            if window.timer is not None:
+                window.timer.cancel()
+            for tracker in window.trackers:
+                tracker.done()
+        self._windows.clear()
+        for task in self._flushing:
+            task.cancel()
+
+    def get_stats(self) -> dict:
+        """Coalescing counters of the subscription"""
+        return {
+            "coalesce_mode": self.policy.mode,
+            "coalesced": self._coalesced,
+            "coalesce_emitted": self._emitted,
+            "coalesce_held": sum(window.count for window in self._windows.values()),
+        }
+
+
+def _annotate(event: Event, data: Any, count: int, first_timestamp: Optional[float]) -> Event:
+    """Copy of event standing for `count` events (the original is shared with other subscribers)"""
+    if count == 1 and data is event.data:
+        return event
+
+    metadata = dict(event.metadata) if event.has_metadata else {}
+    metadata["coalesced"] = {
+        "count": count,
+        "first_timestamp": event.timestamp if first_timestamp is None else first_timestamp,
+    }
+    return Event(
+        type=event.type,
+        data=data,
+        timestamp=event.timestamp,
+        source=event.source,
+        level=event.level,
+        correlation_id=event.correlation_id,
+        metadata=metadata,
+    )
@@ -0,0 +1,195 @@
+"""
+event system - event codecs
+
+Persisted and transported events go through an EventCodec:
+
+- JsonEventCodec: the original format, json.dumps(event.to_dict())
+- BinaryEventCodec: compact binary format, first byte is the format version
+
+decode_event() detects the format from the first byte, so rows written
+with the JSON codec stay readable after switching to the binary one.
+
+Binary format (the version byte says how the body is encoded):
+    version (1 byte) | level (uint8) | timestamp (float64)
+    | type, source, correlation_id (uint16 length + utf-8 each, 0xFFFF = None)
+    | body
+
+    v1: body is marshal format version 4 of (data, metadata)
+    v2: body is the utf-8 JSON text of [data, metadata]
+
+Marshal format version 4 is fixed (newer Pythons add versions, but keep
+reading and writing 4 as is) and keeps the Python types of plain data
+(tuples stay tuples, int dict keys stay ints, bytes are allowed), unlike
+JSON. It only accepts exact builtin types, so payloads holding anything
+else (str/int Enum members, OrderedDict, defaultdict, ...) are written
+as v2 instead, with JSON's conversions (Enum -> value, dict subclass ->
+dict).
+
+Nothing is cached on the event: an event mutated after being encoded is
+encoded again with its current data the next time.
+"""
+import json
+import marshal
+import struct
+from typing import Any, Dict, Union
+
+from .events import Event, EventLevel
+
+BINARY_V1 = 0x01  # marshal body
+BINARY_V2 = 0x02  # JSON body
+_BINARY_VERSIONS = (BINARY_V1, BINARY_V2)
+_MARSHAL_VERSION = 4
+_HEADER = struct.Struct("<BBd")  # version, level, timestamp
+_STR_LEN = struct.Struct("<H")
+_NONE_LEN = 0xFFFF
+_LEVELS = {level.value: level for level in EventLevel}
+
+
+class EventCodec:
+    """Event <-> bytes"""
+
+    name = "base"
+
+    def encode(self, event: Event) -> bytes:
+        """
+        Serialize an event
+
+        Args:
+            event: Event
+
+        Returns:
+            bytes: Encoded event
+        """
+        raise NotImplementedError
+
+    def decode(self, payload: Union[bytes, str]) -> Event:
+        """
+        Deserialize an event
+
+        Args:
+            payload: Encoded event
+
+        Returns:
+            Event: Decoded event
+        """
+        raise NotImplementedError
+
+
+class JsonEventCodec(EventCodec):
+    """JSON text of Event.to_dict() (the original persisted format)"""
+
+    name = "json"
+
+    def encode(self, event: Event) -> bytes:
+        return json.dumps(event.to_dict()).encode()
+
+    def decode(self, payload: Union[bytes, str]) -> Event:
+        return Event.from_dict(json.loads(payload))
+
+
+class BinaryEventCodec(EventCodec):
+    """Compact versioned binary format (see module docstring)"""
+
+    name = "binary"
+
+    def encode(self, event: Event) -> bytes:
+        body = (event.data, event.metadata if event.has_metadata else None)
+        try:
+            version, encoded = BINARY_V1, marshal.dumps(body, _MARSHAL_VERSION)
+        except ValueError:
+            # not plain builtin types: fall back to JSON (raises TypeError if that fails too)
+            version, encoded = BINARY_V2, json.dumps(body).encode()
+
+        parts = [_HEADER.pack(version, int(event.level), event.timestamp)]
+        for value in (event.type, event.source, event.correlation_id):
+            if value is None:
+                parts.append(_STR_LEN.pack(_NONE_LEN))
+            else:
+                raw = value.encode()
+                parts.append(_STR_LEN.pack(len(raw)))
+                parts.append(raw)
+        parts.append(encoded)
+        return b"".join(parts)
+
+    def decode(self, payload: Union[bytes, str]) -> Event:
+        version, level, timestamp = _HEADER.unpack_from(payload, 0)
+        if version not in _BINARY_VERSIONS:
+            raise ValueError(f"Unsupported binary event format version: {version}")
+
+        offset = _HEADER.size
+        strings = []
+        for _ in range(3):
+            (length,) = _STR_LEN.unpack_from(payload, offset)
+            offset += _STR_LEN.size
+            if length == _NONE_LEN:
+                strings.append(None)
+            else:
+                strings.append(payload[offset:offset + length].decode())
+                offset += length
+        if version == BINARY_V1:
+            data, metadata = marshal.loads(payload[offset:])
+        else:
+            data, metadata = json.loads(bytes(payload[offset:]))
+
+        return Event(
+            type=strings[0],
+            data=data,
+            timestamp=timestamp,
+            source=strings[1],
+            level=_LEVELS.get(level, level),
+            correlation_id=strings[2],
+            metadata=metadata,
+        )
+
+
+_CODECS: Dict[str, EventCodec] = {
+    JsonEventCodec.name: JsonEventCodec(),
+    BinaryEventCodec.name: BinaryEventCodec(),
+}
+
+
+def get_codec(codec: Union[str, EventCodec]) -> EventCodec:
+    """
+    Resolve a codec instance or registered codec name
+
+    Args:
+        codec: "json", "binary" or an EventCodec instance
+
+    Returns:
+        EventCodec: Codec instance
+    """
+    if isinstance(codec, EventCodec):
+        return codec
+    try:
+        return _CODECS[codec]
+    except KeyError:
+        raise ValueError(f"Unknown event codec: {codec}")
+
+
+def register_codec(codec: EventCodec):
+    """Register a custom codec under codec.name"""
+    _CODECS[codec.name] = codec
+
+
+def is_binary_payload(payload: Any) -> bool:
+    """Whether a stored value was written by the binary codec"""
+    return (
+        isinstance(payload, (bytes, bytearray, memoryview))
+        and len(payload) > 0
+        and payload[0] in _BINARY_VERSIONS
+    )
+
+
+def decode_event(payload: Union[bytes, str]) -> Event:
+    """
+    Decode an event written by any built-in codec (format detected from the first byte)
+
+    Args:
+        payload: Encoded event (binary bytes or JSON text/bytes)
+
+    Returns:
+        Event: Decoded event
+    """
+    if is_binary_payload(payload):
+        return _CODECS["binary"].decode(payload)
+    return _CODECS["json"].decode(payload)
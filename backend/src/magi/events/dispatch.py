@@ -0,0 +1,441 @@
+"""
+Message Bus - Shared dispatch table
+
+Subscriptions are compiled per event type when they change, so the hot
+path (one lookup per event) does not re-partition subscriber lists or
+re-inspect handlers. Dispatch only enqueues into per-subscriber mailboxes;
+handlers run on the mailboxes' consumer tasks.
+
+Wildcard subscriptions ("Task*", "Loop.*", "*") live in a topic trie; the
+routes they contribute to are resolved once per concrete event type and
+cached until the next subscribe/unsubscribe.
+
+Handlers run inline on the loop unless their subscription asks for
+thread or process execution (see events.executors).
+"""
+import asyncio
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .coalesce import Coalescer
+from .events import Event
+from .executors import HandlerExecutors, LoopLagMonitor, get_executors, validate_execution
+from .histogram import LatencyHistogram, merged
+from .mailbox import DeliveryTracker, SubscriberMailbox
+from .topics import TopicTrie, is_pattern
+
+_UNRESOLVED = object()
+
+
+class EventRoute:
+    """
+    Compiled routing for one event type
+
+    Subscriptions are split by propagation mode; each subscription dict
+    carries a precomputed "is_async" flag.
+    """
+
+    __slots__ = ("broadcast", "competing", "round_robin")
+
+    def __init__(self, broadcast: Tuple[Dict, ...], competing: Tuple[Dict, ...], round_robin: Tuple[Dict, ...]):
+        self.broadcast = broadcast
+        self.competing = competing
+        self.round_robin = round_robin
+
+
+class DispatchTable:
+    """
+    Subscription registry and dispatcher shared by the bus backends
+
+    - add/remove recompile the route of the affected event type (a wildcard
+      subscription invalidates every cached route)
+    - dispatch does one dict lookup, then walks prebuilt tuples and puts the
+      event into the selected subscribers' mailboxes
+    - competing picks the subscriber with the fewest pending events,
+      round_robin cycles through its subscribers
+    - handler errors are isolated and counted in the owning backend's stats
+    """
+
+    def __init__(self, stats: Dict[str, int], executors: Optional[HandlerExecutors] = None):
+        """
+        initialize dispatch table
+
+        Args:
+            stats: Backend statistics dict (processed_count/error_count are updated in place)
+            executors: Pools for thread/process handlers (default the process-wide ones)
+        """
+        self._stats = stats
+        self._executors = executors
+
+        # {event_type: [subscription]} in subscribe order (exact types only)
+        self._subscriptions: Dict[str, List[Dict]] = defaultdict(list)
+        self._patterns = TopicTrie()
+        self._pattern_counts: Dict[str, int] = {}
+        self._index: Dict[str, Dict] = {}  # {subscription_id: subscription}
+        self._seq = 0  # subscribe order across exact and wildcard subscriptions
+
+        # {concrete event_type: route or None}, resolved on first dispatch
+        self._routes: Dict[str, Optional[EventRoute]] = {}
+
+        self._round_robin_index: Dict[str, int] = {}
+        self._dispatching = 0  # dispatch() calls still enqueueing
+
+        # Deliveries per propagation mode
+        self.mode_counts: Dict[str, int] = {"broadcast": 0, "competing": 0, "round_robin": 0}
+
+        # Bus queue wait per event type (handler durations live in the mailboxes)
+        self._queue_wait: Dict[str, LatencyHistogram] = {}
+
+        # started on the first dispatch, stopped by close()
+        self._loop_lag = LoopLagMonitor()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, subscription_id: str) -> bool:
+        return subscription_id in self._index
+
+    def add(self, subscription: Dict) -> Dict:
+        """
+        Register a subscription (exact event type or wildcard pattern)
+
+        Mailbox options are read from the optional subscription keys
+        "concurrency", "max_pending" and "overflow_policy"; an optional
+        "coalesce" CoalescePolicy puts a Coalescer in front of the mailbox.
+        "execution" (inline/thread/process) selects where the handler runs,
+        "on_result" receives (event, handler return value).
+
+        Args:
+            subscription: Subscription info {id, event_type, handler, mode, filter_func, ...}
+
+        Returns:
+            Dict: The stored subscription (with "is_async" and "mailbox" filled in)
+
+        Raises:
+            ValueError: The handler cannot run in the requested execution mode
+        """
+        subscription["execution"] = subscription.get("execution") or "inline"
+        subscription.setdefault("on_result", None)
+        validate_execution(subscription["execution"], subscription["handler"])
+        subscription["is_async"] = asyncio.iscoroutinefunction(subscription["handler"])
+        event_type = subscription["event_type"]
+        wildcard = is_pattern(event_type)
+        if wildcard:
+            self._patterns.add(event_type, subscription)  # validates the pattern
+
+        self._seq += 1
+        subscription["seq"] = self._seq
+        subscription["mailbox"] = SubscriberMailbox(
+            subscription["id"],
+            lambda event, subscription=subscription: self.invoke(subscription, event),
+            concurrency=subscription.get("concurrency") or 1,
+            max_pending=subscription.get("max_pending") or 1000,
+            overflow_policy=subscription.get("overflow_policy") or "block",
+        )
+        coalesce = subscription.get("coalesce")
+        subscription["coalescer"] = (
+            Coalescer(coalesce, subscription["mailbox"].put) if coalesce is not None else None
+        )
+        self._index[subscription["id"]] = subscription
+
+        if wildcard:
+            self._pattern_counts[event_type] = self._pattern_counts.get(event_type, 0) + 1
+            self._routes.clear()
+        else:
+            self._subscriptions[event_type].append(subscription)
+            self._routes.pop(event_type, None)
+        return subscription
+
+    def remove(self, subscription_id: str) -> Optional[Dict]:
+        """
+        Remove a subscription and invalidate the routes it contributed to
+
+        Args:
+            subscription_id: Subscription id
+
+        Returns:
+            Optional[Dict]: The removed subscription, None if unknown
+        """
+        subscription = self._index.pop(subscription_id, None)
+        if subscription is None:
+            return None
+        subscription["mailbox"].discard()
+        if subscription["coalescer"] is not None:
+            subscription["coalescer"].discard()
+
+        event_type = subscription["event_type"]
+        if is_pattern(event_type):
+            self._patterns.remove(event_type, subscription)
+            self._pattern_counts[event_type] -= 1
+            if not self._pattern_counts[event_type]:
+                del self._pattern_counts[event_type]
+            self._routes.clear()
+            return subscription
+
+        remaining = [s for s in self._subscriptions[event_type] if s["id"] != subscription_id]
+        if remaining:
+            self._subscriptions[event_type] = remaining
+        else:
+            del self._subscriptions[event_type]
+        self._routes.pop(event_type, None)
+        return subscription
+
+    def get(self, subscription_id: str) -> Optional[Dict]:
+        """Get subscription info by id"""
+        return self._index.get(subscription_id)
+
+    def event_types(self, modes: Optional[Tuple[str, ...]] = None) -> List[str]:
+        """
+        Exact event types with at least one subscription
+
+        Args:
+            modes: Only count subscriptions with these propagation modes (default all)
+        """
+        if modes is None:
+            return list(self._subscriptions)
+        return [
+            event_type for event_type, subscriptions in self._subscriptions.items()
+            if any(s["mode"] in modes for s in subscriptions)
+        ]
+
+    def patterns(self, modes: Optional[Tuple[str, ...]] = None) -> List[str]:
+        """
+        Wildcard patterns with at least one subscription
+
+        Args:
+            modes: Only count subscriptions with these propagation modes (default all)
+        """
+        if modes is None:
+            return list(self._pattern_counts)
+        return list(dict.fromkeys(
+            s["event_type"] for s in self._index.values()
+            if s["mode"] in modes and s["event_type"] in self._pattern_counts
+        ))
+
+    def route(self, event_type: str) -> Optional[EventRoute]:
+        """Compiled route for a concrete event type, None if nothing matches"""
+        route = self._routes.get(event_type, _UNRESOLVED)
+        if route is _UNRESOLVED:
+            route = self._compile(event_type)
+        return route
+
+    def _compile(self, event_type: str) -> Optional[EventRoute]:
+        """Resolve exact and wildcard subscriptions of one event type and cache the route"""
+        subscriptions = list(self._subscriptions.get(event_type, ()))
+        if self._pattern_counts:
+            subscriptions.extend(self._patterns.match(event_type))
+            subscriptions.sort(key=lambda s: s["seq"])
+
+        route = None
+        if subscriptions:
+            route = EventRoute(
+                broadcast=tuple(s for s in subscriptions if s["mode"] == "broadcast"),
+                competing=tuple(s for s in subscriptions if s["mode"] == "competing"),
+                round_robin=tuple(s for s in subscriptions if s["mode"] == "round_robin"),
+            )
+        self._routes[event_type] = route
+        return route
+
+    async def dispatch(
+        self,
+        event: Event,
+        on_complete: Optional[Callable[[], None]] = None,
+        modes: Optional[Tuple[str, ...]] = None,
+        queue_wait: Optional[float] = None,
+    ):
+        """
+        Enqueue event for its subscribers according to propagation mode
+
+        Args:
+            event: Event to dispatch
+            on_complete: Called once every selected subscriber finished with the
+                event (immediately if nobody is subscribed)
+            modes: Only deliver to subscriptions with these propagation modes (default all)
+            queue_wait: Seconds the event waited in the bus queue (recorded per event type)
+        """
+        if queue_wait is not None:
+            self.record_queue_wait(event.type, queue_wait)
+        if not self._loop_lag.running:
+            self._loop_lag.start()
+        tracker = DeliveryTracker(on_complete) if on_complete is not None else None
+        route = self._routes.get(event.type, _UNRESOLVED)
+        if route is _UNRESOLVED:
+            route = self._compile(event.type)
+        if route is None:
+            if tracker is not None:
+                tracker.done()
+            return
+
+        self._dispatching += 1
+        try:
+            # broadcast mode: all subscribers receive the event
+            if route.broadcast and (modes is None or "broadcast" in modes):
+                for subscription in route.broadcast:
+                    await self._deliver(subscription, event, tracker)
+                self.mode_counts["broadcast"] += len(route.broadcast)
+
+            # competing mode: only the subscriber with the lowest load receives the event
+            competing = route.competing
+            if competing and (modes is None or "competing" in modes):
+                if len(competing) == 1:
+                    subscription = competing[0]
+                else:
+                    subscription = min(competing, key=lambda s: s["mailbox"].pending)
+                await self._deliver(subscription, event, tracker)
+                self.mode_counts["competing"] += 1
+
+            # round_robin mode: subscribers take turns
+            round_robin = route.round_robin
+            if round_robin and (modes is None or "round_robin" in modes):
+                index = self._round_robin_index.get(event.type, 0) % len(round_robin)
+                self._round_robin_index[event.type] = index + 1
+                await self._deliver(round_robin[index], event, tracker)
+                self.mode_counts["round_robin"] += 1
+        finally:
+            self._dispatching -= 1
+            if tracker is not None:
+                tracker.done()
+
+    async def deliver(self, subscription_id: str, event: Event) -> bool:
+        """
+        Deliver an event to one subscription only (replay)
+
+        Args:
+            subscription_id: Subscription id
+            event: Event
+
+        Returns:
+            bool: False if the subscription does not exist (any more)
+        """
+        subscription = self._index.get(subscription_id)
+        if subscription is None:
+            return False
+        await self._deliver(subscription, event, None)
+        return True
+
+    async def _deliver(self, subscription: Dict, event: Event, tracker: Optional[DeliveryTracker]):
+        """Apply the subscription filter, then put the event into its mailbox"""
+        filter_func = subscription["filter_func"]
+        if filter_func is not None:
+            try:
+                if not filter_func(event):
+                    return
+            except Exception:
+                # Filter function error, default to not filtering
+                pass
+
+        coalescer = subscription["coalescer"]
+        if coalescer is not None:
+            event = coalescer.offer(event, tracker)
+            if event is None:
+                return
+
+        await subscription["mailbox"].put(event, tracker)
+
+    async def invoke(self, subscription: Dict, event: Event):
+        """
+        Call single handler to process event (with error isolation)
+
+        Args:
+            subscription: Subscription info
+            event: Event
+        """
+        handler = subscription["handler"]
+        try:
+            execution = subscription["execution"]
+            if execution == "inline":
+                if subscription["is_async"]:
+                    result = await handler(event)
+                else:
+                    result = handler(event)
+            else:
+                executors = self._executors or get_executors()
+                result = await executors.run(execution, handler, event)
+
+            on_result = subscription["on_result"]
+            if on_result is not None:
+                outcome = on_result(event, result)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+
+            self._stats["processed_count"] += 1
+
+        except Exception:
+            # error isolation: single handler failure does not affect others
+            self._stats["error_count"] += 1
+
+    async def join(self):
+        """Wait until every dispatched event has been handled by its subscribers"""
+        # events held in coalescing windows are delivered now
+        for subscription in list(self._index.values()):
+            if subscription["coalescer"] is not None:
+                await subscription["coalescer"].flush()
+
+        while True:
+            for subscription in list(self._index.values()):
+                await subscription["mailbox"].join()
+            if self._dispatching == 0 and all(
+                s["mailbox"].is_idle() for s in self._index.values()
+            ):
+                return
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        """Stop all mailbox consumer tasks (queued events are kept)"""
+        for subscription in list(self._index.values()):
+            await subscription["mailbox"].close()
+        await self._loop_lag.stop()
+
+    def get_all_pending(self) -> Dict[str, int]:
+        """Get pending event count of all subscriptions"""
+        return {sub_id: s["mailbox"].pending for sub_id, s in self._index.items()}
+
+    def record_queue_wait(self, event_type: str, seconds: float):
+        """Record how long one event waited in the bus queue"""
+        histogram = self._queue_wait.get(event_type)
+        if histogram is None:
+            histogram = self._queue_wait[event_type] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def get_latency_stats(self) -> Dict[str, dict]:
+        """
+        Bus queue wait and handler duration percentiles per event type
+
+        Handler durations are merged from the subscriptions of each event
+        type (a wildcard subscription reports under its pattern).
+        """
+        handlers = defaultdict(list)
+        for subscription in self._index.values():
+            handlers[subscription["event_type"]].append(subscription["mailbox"].handler_histogram)
+
+        return {
+            event_type: {
+                "queue_wait": self._queue_wait.get(event_type, LatencyHistogram()).snapshot(),
+                "handler": merged(handlers.get(event_type, ())).snapshot(),
+            }
+            for event_type in sorted(set(self._queue_wait) | set(handlers))
+        }
+
+    def get_execution_stats(self) -> Dict[str, dict]:
+        """Event loop lag, subscriptions per execution mode and handler pool counters"""
+        subscriptions = {mode: 0 for mode in ("inline", "thread", "process")}
+        for subscription in self._index.values():
+            subscriptions[subscription["execution"]] += 1
+        return {
+            "loop_lag": self._loop_lag.get_stats(),
+            "subscriptions": subscriptions,
+            "pools": (self._executors or get_executors()).get_stats(),
+        }
+
+    def get_subscription_stats(self) -> Dict[str, dict]:
+        """Per-subscription mailbox statistics (lag, drops, handler latency)"""
+        return {
+            sub_id: {
+                "event_type": s["event_type"],
+                "mode": s["mode"],
+                "execution": s["execution"],
+                **s["mailbox"].get_stats(),
+                **(s["coalescer"].get_stats() if s["coalescer"] is not None else {}),
+            }
+            for sub_id, s in self._index.items()
+        }
@@ -11,11 +11,15 @@ Implementation：
 import asyncio
 import heapq
 import time
-from typing import Callable, Dict, List, Optional, Set
-from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 from enum import Enum
 from .events import Event, EventLevel
 from .backend import MessageBusBackend
+from .coalesce import CoalescePolicy
+from .dispatch import DispatchTable
+from .fair_queue import FairEventQueue
+from .scheduler import TimerWheel, recurring_event_factory
+from .wakeup import WorkerWakeup
 
 
 class propagationMode(Enum):
@@ -40,12 +44,17 @@ class BoundedpriorityQueue:
     - 背压机制（Backpressure）
     - 多种丢弃strategy
     - priority保证
+    - scheduling="fair"：priority aging + 按eventtype加权公平调度（FairEventQueue），
+      满时丢弃积压最多的type（oldest/lowest_priority均如此）
     """
 
     def __init__(
         self,
         max_size: int = 1000,
         drop_policy: DropPolicy = DropPolicy.LOWEST_PRIORITY,
+        scheduling: str = "priority",
+        aging_interval: float = 1.0,
+        type_weights: Optional[Dict[str, float]] = None,
     ):
         """
         initialize有界priorityqueue
@@ -53,13 +62,23 @@ class BoundedpriorityQueue:
         Args:
             max_size: queuemaximumlength
             drop_policy: 丢弃strategy
+            scheduling: "priority"（level, then FIFO）或"fair"（aging + 按type公平调度）
+            aging_interval: fair：等待多少秒提升一个level
+            type_weights: fair：每个eventtype的权重（默认1.0）
         """
+        if scheduling not in ("priority", "fair"):
+            raise ValueError(f"Unknown scheduling: {scheduling}")
+
         self.max_size = max_size
         self.drop_policy = drop_policy
+        self.scheduling = scheduling
 
         # priorityqueue
-        # 元素：(-priority, timestamp, event)
+        # 元素：(-priority, counter, enqueued_at, event)；fair时为FairEventQueue
+        self._fair: Optional[FairEventQueue] = None
         self._queue: List[tuple] = []
+        if scheduling == "fair":
+            self._fair = self._queue = FairEventQueue(aging_interval, type_weights)
         self._lock = asyncio.Lock()
         self._counter = 0
 
@@ -71,7 +90,7 @@ class BoundedpriorityQueue:
             "rejected": 0,
         }
 
-    async def enqueue(self, Event: Event) -> bool:
+    async def enqueue(self, event: Event) -> bool:
         """
         入队（带背压）
 
@@ -87,14 +106,33 @@ class BoundedpriorityQueue:
                 return await self._handle_queue_full(event)
 
             # 入队
-            priority = -event.level.value
-            timestamp = time.time()
-            heapq.heappush(self._queue, (priority, self._counter, event))
-            self._counter += 1
+            self._push(event)
 
             self._stats["enqueued"] += 1
             return True
 
+    async def enqueue_many(self, events: List[Event]) -> List[bool]:
+        """
+        批量入队（只获取一次锁）
+
+        Args:
+            events: Event列表
+
+        Returns:
+            每个event is notsuccess入队
+        """
+        results = []
+        async with self._lock:
+            for event in events:
+                if len(self._queue) >= self.max_size:
+                    results.append(await self._handle_queue_full(event))
+                    continue
+
+                self._push(event)
+                self._stats["enqueued"] += 1
+                results.append(True)
+        return results
+
     async def dequeue(self, timeout: float = 1.0) -> Optional[Event]:
         """
         出队
@@ -105,21 +143,46 @@ class BoundedpriorityQueue:
         Returns:
             event或None
         """
+        entry = await self.dequeue_with_wait(timeout)
+        return entry[0] if entry is not None else None
+
+    async def dequeue_with_wait(self, timeout: float = 1.0) -> Optional[Tuple[Event, float]]:
+        """
+        出队，并返回event在queue中等待的秒数
+
+        Args:
+            timeout: timeout时间
+
+        Returns:
+            (event, queue wait)或None
+        """
         try:
             async with self._lock:
                 if not self._queue:
                     return None
 
-                _, _, event = heapq.heappop(self._queue)
+                if self._fair is not None:
+                    entry = self._fair.pop_entry()
+                else:
+                    _, _, enqueued_at, event = heapq.heappop(self._queue)
+                    entry = (event, time.monotonic() - enqueued_at)
                 self._stats["dequeued"] += 1
-                return event
+                return entry
 
         except asyncio.CancelledError:
             raise  # Re-raise to allow proper cancellation
         except Exception:
             return None
 
-    async def _handle_queue_full(self, Event: Event) -> bool:
+    def _push(self, event: Event):
+        """入队一个event（调用者持有锁）"""
+        if self._fair is not None:
+            self._fair.push(event)
+        else:
+            heapq.heappush(self._queue, (-event.level.value, self._counter, time.monotonic(), event))
+        self._counter += 1
+
+    async def _handle_queue_full(self, event: Event) -> bool:
         """
         processqueue满的情况
 
@@ -133,6 +196,16 @@ class BoundedpriorityQueue:
             self._stats["rejected"] += 1
             return False
 
+        if self._fair is not None:
+            # 积压最多的type付出代价
+            if not self._fair.evict_for(event):
+                self._stats["rejected"] += 1
+                return False
+            self._stats["dropped"] += 1
+            self._push(event)
+            self._stats["enqueued"] += 1
+            return True
+
         elif self.drop_policy == DropPolicy.oldEST:
             # 丢弃最old的
             if self._queue:
@@ -140,9 +213,7 @@ class BoundedpriorityQueue:
                 self._stats["dropped"] += 1
 
             # 然后入队newevent
-            priority = -event.level.value
-            heapq.heappush(self._queue, (priority, self._counter, event))
-            self._counter += 1
+            self._push(event)
             self._stats["enqueued"] += 1
             return True
 
@@ -162,9 +233,7 @@ class BoundedpriorityQueue:
                     self._stats["dropped"] += 1
 
             # 入队newevent
-            priority = -event.level.value
-            heapq.heappush(self._queue, (priority, self._counter, event))
-            self._counter += 1
+            self._push(event)
             self._stats["enqueued"] += 1
             return True
 
@@ -183,100 +252,17 @@ class BoundedpriorityQueue:
         return len(self._queue) >= self.max_size
 
     def get_stats(self) -> dict:
-        """getstatisticsinfo"""
-        return {
+        """getstatisticsinfo（fair时含每个type的queue wait）"""
+        stats = {
             **self._stats,
             "current_size": len(self._queue),
             "max_size": self.max_size,
             "utilization": len(self._queue) / self.max_size,
+            "scheduling": self.scheduling,
         }
-
-
-class LoadAwareDispatcher:
-    """
-    负载Perception的调度器
-
-    根据handler的pendingquantity进rowload balance
-    """
-
-    def __init__(self):
-        """initialize调度器"""
-        # Handler的pending计数
-        self._handler_pending: Dict[Callable, int] = defaultdict(int)
-
-        # Round-robinindex
-        self._round_robin_index: Dict[str, int] = {}
-
-    def select_cometing_handler(
-        self,
-        subscriptions: List[Dict],
-        event_type: str,
-    ) -> Optional[Dict]:
-        """
-        选择competing pattern的handler（负载最低的）
-
-        Args:
-            subscriptions: subscribelist
-            event_type: eventtype
-
-        Returns:
-            选中的subscribe或None
-        """
-        if not subscriptions:
-            return None
-
-        # 选择pending最少的handler
-        selected = min(
-            subscriptions,
-            key=lambda s: self._handler_pending[s["handler"]]
-        )
-
-        return selected
-
-    def select_round_robin_handler(
-        self,
-        subscriptions: List[Dict],
-        event_type: str,
-    ) -> Optional[Dict]:
-        """
-        选择轮询pattern的handler
-
-        Args:
-            subscriptions: subscribelist
-            event_type: eventtype
-
-        Returns:
-            选中的subscribe或None
-        """
-        if not subscriptions:
-            return None
-
-        # get或initializeindex
-        index = self._round_robin_index.get(event_type, 0)
-        total = len(subscriptions)
-
-        selected = subscriptions[index % total]
-        self._round_robin_index[event_type] = (index + 1) % total
-
-        return selected
-
-    def increment_pending(self, handler: Callable):
-        """增加pending计数"""
-        self._handler_pending[handler] += 1
-
-    def decrement_pending(self, handler: Callable):
-        """减少pending计数"""
-        self._handler_pending[handler] -= 1
-        if self._handler_pending[handler] < 0:
-            self._handler_pending[handler] = 0
-
-    def get_pending_count(self, handler: Callable) -> int:
-        """getpending计数"""
-        return self._handler_pending.get(handler, 0)
-
-    def get_all_pending(self) -> Dict[Callable, int]:
-        """getallhandler的pending计数"""
-        return self._handler_pending.copy()
+        if self._fair is not None:
+            stats["types"] = self._fair.get_stats()
+        return stats
 
 
 class EnhancedMemoryMessageBackend(MessageBusBackend):
@@ -286,10 +272,12 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
     完整Implementation：
     - 双传播pattern（BROADCasT/COMPETING/round_RObin）
     - 背压机制（BoundedpriorityQueue）
-    - load balance调度（LoadAwareDispatcher）
+    - load balance调度（DispatchTable，按eventtype预编译路由）
     - eventfilter机制
     - error隔离
     - 优雅启停
+    - 延迟/周期投递（TimerWheel，到期后进入BoundedpriorityQueue）
+    - 公平调度（scheduling="fair"，见FairEventQueue）
     """
 
     def __init__(
@@ -297,6 +285,9 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         max_queue_size: int = 1000,
         num_workers: int = 4,
         drop_policy: DropPolicy = DropPolicy.LOWEST_PRIORITY,
+        scheduling: str = "priority",
+        aging_interval: float = 1.0,
+        type_weights: Optional[Dict[str, float]] = None,
     ):
         """
         initialize增强的message后端
@@ -305,42 +296,47 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
             max_queue_size: queuemaximumlength
             num_workers: Workerquantity
             drop_policy: 丢弃strategy
+            scheduling: "priority"或"fair"（priority aging + 按eventtype加权公平调度）
+            aging_interval: fair：等待多少秒提升一个level
+            type_weights: fair：每个eventtype的权重（默认1.0）
         """
         # 使用有界priorityqueue
         self._queue = BoundedpriorityQueue(
             max_size=max_queue_size,
             drop_policy=drop_policy,
+            scheduling=scheduling,
+            aging_interval=aging_interval,
+            type_weights=type_weights,
         )
 
-        # load balance调度器
-        self._dispatcher = LoadAwareDispatcher()
-
-        # subscribeinfo
-        # {event_type: [subscription]}
-        self._subscriptions: Dict[str, List[Dict]] = defaultdict(list)
-        self._subscription_index: Dict[str, Dict] = {}
-
         # worker management
         self._workers: List[asyncio.Task] = []
         self._running = False
         self._shutdown_requested = False
 
+        # 空闲worker在此等待，由publish唤醒
+        self._wakeup = WorkerWakeup()
+
+        # 延迟event与周期schedule
+        self._timers = TimerWheel(self._release_due)
+
         # statisticsinfo
         self._stats = {
             "published_count": 0,
             "processed_count": 0,
             "error_count": 0,
-            "broadcast_count": 0,
-            "competing_count": 0,
-            "round_robin_count": 0,
         }
 
-    async def publish(self, Event: Event) -> bool:
+        # subscribeinfo + load balance调度（按eventtype预编译）
+        self._dispatch = DispatchTable(self._stats)
+
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
         """
         Publish event
 
         Args:
             event: Event
+            deliver_at: 投递时间（Unix time），未到期前保存在timer wheel中
 
         Returns:
             is notsuccessrelease
@@ -349,22 +345,91 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         if self._shutdown_requested:
             return False
 
+        if deliver_at is not None and deliver_at > time.time():
+            self._timers.add(event, deliver_at)
+            return True
+
         # 入队
         success = await self._queue.enqueue(event)
 
         if success:
             self._stats["published_count"] += 1
+            self._wakeup.notify()
         else:
             self._stats["error_count"] += 1
 
         return success
 
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        批量Publish event（queue锁只获取一次）
+
+        Args:
+            events: Event列表
+
+        Returns:
+            每个event is not被接受
+        """
+        if self._shutdown_requested:
+            return [False] * len(events)
+
+        results = await self._queue.enqueue_many(events)
+
+        accepted = sum(results)
+        self._stats["published_count"] += accepted
+        self._stats["error_count"] += len(results) - accepted
+        if accepted:
+            self._wakeup.notify(accepted)
+
+        return results
+
+    async def _release_due(self, events: List[Event]):
+        """timer wheel callback：到期event入队"""
+        await self.publish_many(events)
+
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        周期Publish event
+
+        Args:
+            event: 模板event或返回event的无参Function
+            interval: 周期（seconds）
+            start_at: 首次publish时间（默认 now + interval）
+
+        Returns:
+            scheduleid
+        """
+        return self._timers.add_recurring(recurring_event_factory(event), interval, start_at)
+
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """
+        cancel周期schedule
+
+        Args:
+            schedule_id: scheduleid
+
+        Returns:
+            is notsuccess
+        """
+        return self._timers.cancel(schedule_id)
+
     async def subscribe(
         self,
         event_type: str,
         handler: Callable,
         propagation_mode: propagationMode = propagationMode.BROADCasT,
         filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
     ) -> str:
         """
         subscribeevent
@@ -374,6 +439,12 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
             handler: processFunction
             propagation_mode: 传播pattern
             filter_func: filterFunction
+            concurrency: Concurrent handler calls (mailbox consumer tasks)
+            max_pending: Mailbox capacity
+            overflow_policy: Mailbox overflow policy (block/drop_oldest/drop_newest)
+            coalesce: Coalescing policy (latest/aggregate/sample), see events.coalesce
+            execution: Handler execution mode (inline/thread/process), see events.executors
+            on_result: Receives (event, handler return value) after each call
 
         Returns:
             subscribeid
@@ -386,10 +457,15 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
             "handler": handler,
             "mode": propagation_mode.value,
             "filter_func": filter_func,
+            "concurrency": concurrency,
+            "max_pending": max_pending,
+            "overflow_policy": overflow_policy,
+            "coalesce": coalesce,
+            "execution": execution,
+            "on_result": on_result,
         }
 
-        self._subscriptions[event_type].append(subscription)
-        self._subscription_index[subscription_id] = subscription
+        self._dispatch.add(subscription)
 
         return subscription_id
 
@@ -403,19 +479,7 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         Returns:
             is notsuccess
         """
-        if subscription_id not in self._subscription_index:
-            return False
-
-        subscription = self._subscription_index[subscription_id]
-        event_type = subscription["event_type"]
-
-        # 从subscribelist中Remove
-        self._subscriptions[event_type] = [
-            s for s in self._subscriptions[event_type] if s["id"] != subscription_id
-        ]
-
-        del self._subscription_index[subscription_id]
-        return True
+        return self._dispatch.remove(subscription_id) is not None
 
     async def start(self):
         """start message bus"""
@@ -430,14 +494,16 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
             asyncio.create_task(self._worker(i))
             for i in range(4)  # 固定4个worker
         ]
+        await self._timers.start()
 
     async def stop(self):
         """stop message bus（优雅关闭）"""
         if not self._running:
             return
 
-        # request关闭
+        # request关闭（未到期的event留在timer wheel中）
         self._shutdown_requested = True
+        await self._timers.stop()
 
         # 等待queueclear或timeout
         timeout = 30  # seconds
@@ -446,6 +512,14 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         while not self._queue.is_empty() and (time.time() - start_time) < timeout:
             await asyncio.sleep(0.1)
 
+        # 等待subscribe者mailbox处理完已分发的event
+        try:
+            await asyncio.wait_for(
+                self._dispatch.join(), timeout=max(timeout - (time.time() - start_time), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
+
         # stopworker
         self._running = False
 
@@ -454,6 +528,7 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
 
         # 等待workerEnd
         await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._dispatch.close()
 
     async def _worker(self, worker_id: int):
         """
@@ -464,112 +539,33 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         """
         while self._running:
             try:
-                # 从queuegetevent
-                event = await self._queue.dequeue()
+                # 从queuegetevent（及其queue wait）
+                entry = await self._queue.dequeue_with_wait()
 
-                if event is None:
-                    # queue为空，短暂休眠后重试
-                    await asyncio.sleep(0.01)
+                if entry is None:
+                    # queue为空，等待publish唤醒
+                    await self._wakeup.wait()
                     continue
 
+                self._wakeup.consume()
+
                 # processevent
-                await self._process_event(event)
+                await self._process_event(*entry)
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self._stats["error_count"] += 1
 
-    async def _process_event(self, Event: Event):
+    async def _process_event(self, event: Event, queue_wait: Optional[float] = None):
         """
         processevent（根据传播pattern分发）
 
         Args:
             event: Event
+            queue_wait: event在queue中等待的秒数
         """
-        subscriptions = self._subscriptions.get(event.type, [])
-
-        if not subscriptions:
-            return
-
-        # 按传播patterngroup
-        broadcast_subs = []
-        competing_subs = []
-        round_robin_subs = []
-
-        for sub in subscriptions:
-            mode = sub.get("mode", "broadcast")
-            if mode == "broadcast":
-                broadcast_subs.append(sub)
-            elif mode == "competing":
-                competing_subs.append(sub)
-            elif mode == "round_robin":
-                round_robin_subs.append(sub)
-
-        # broadcast pattern：allsubscribe者都收到
-        for sub in broadcast_subs:
-            await self._handle_event(sub, event)
-            self._stats["broadcast_count"] += 1
-
-        # competing pattern：负载最低的subscribe者收到
-        if competing_subs:
-            selected = self._dispatcher.select_cometing_handler(
-                competing_subs,
-                event.type
-            )
-            if selected:
-                await self._handle_event(selected, event)
-                self._stats["competing_count"] += 1
-
-        # 轮询pattern：依次分发
-        if round_robin_subs:
-            selected = self._dispatcher.select_round_robin_handler(
-                round_robin_subs,
-                event.type
-            )
-            if selected:
-                await self._handle_event(selected, event)
-                self._stats["round_robin_count"] += 1
-
-    async def _handle_event(self, subscription: Dict, Event: Event):
-        """
-        call handler to process event（带error隔离）
-
-        Args:
-            subscription: subscribeinfo
-            event: Event
-        """
-        # checkfilterFunction
-        filter_func = subscription.get("filter_func")
-        if filter_func:
-            try:
-                if not filter_func(event):
-                    return  # 被filter
-            except Exception:
-                # filterFunction出错，default不filter
-                pass
-
-        handler = subscription["handler"]
-
-        # 增加pending计数
-        self._dispatcher.increment_pending(handler)
-
-        try:
-            # 调用handler
-            if asyncio.iscoroutinefunction(handler):
-                await handler(event)
-            else:
-                handler(event)
-
-            self._stats["processed_count"] += 1
-
-        except Exception as e:
-            # error隔离：单个handlerfailure不影响other
-            self._stats["error_count"] += 1
-
-        finally:
-            # 减少pending计数
-            self._dispatcher.decrement_pending(handler)
+        await self._dispatch.dispatch(event, queue_wait=queue_wait)
 
     def get_stats(self) -> dict:
         """
@@ -578,11 +574,19 @@ class EnhancedMemoryMessageBackend(MessageBusBackend):
         Returns:
             statisticsinfo
         """
+        mode_counts = self._dispatch.mode_counts
         return {
             **self._stats,
+            "broadcast_count": mode_counts["broadcast"],
+            "competing_count": mode_counts["competing"],
+            "round_robin_count": mode_counts["round_robin"],
             "queue_stats": self._queue.get_stats(),
-            "subscription_count": len(self._subscription_index),
+            "scheduled_count": len(self._timers),
+            "subscription_count": len(self._dispatch),
+            "subscriptions": self._dispatch.get_subscription_stats(),
+            "latency": self._dispatch.get_latency_stats(),
+            "execution": self._dispatch.get_execution_stats(),
             "worker_count": len(self._workers),
             "running": self._running,
-            "pending_stats": self._dispatcher.get_all_pending(),
+            "pending_stats": self._dispatch.get_all_pending(),
         }
@@ -2,10 +2,10 @@
 event system - event data structure definition
 """
 from enum import IntEnum
-from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 from time import time
-import uuid
+
+from .ids import new_event_id
 
 
 class EventLevel(IntEnum):
@@ -33,11 +33,16 @@ class PropagationMode:
     COMPETING = "competing"  # competing: only one subscriber receives
 
 
-@dataclass
 class Event:
     """
     eventdatastructure
 
+    Slotted and allocation-light: metadata is only allocated when it is
+    first accessed, and correlation_id is generated lazily from a
+    time-ordered id (see ids.new_event_id) the first time it is read. Loop
+    phase events that nobody persists pay for neither. Copying or pickling
+    an event generates the id, so copies keep the original's id.
+
     Attributes:
         type: eventtype（如 "AgentStarted", "PerceptionReceived"）
         data: eventdata（可以isanytype）
@@ -47,19 +52,76 @@ class Event:
         correlation_id: correlation id (for tracking event chain)
         metadata: additional metadata
     """
-    type: str
-    data: Any
-    timestamp: float = field(default_factory=time)
-    source: str = "unknown"
-    level: EventLevel = EventLevel.INFO
-    correlation_id: Optional[str] = field(default=None)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-
-    def __post_init__(self):
-        """process after initialization"""
-        if self.correlation_id is None:
-            # generation唯一的associateid
-            self.correlation_id = str(uuid.uuid4())
+
+    __slots__ = ("type", "data", "timestamp", "source", "level", "_correlation_id", "_metadata")
+
+    def __init__(
+        self,
+        type: str,
+        data: Any,
+        timestamp: Optional[float] = None,
+        source: str = "unknown",
+        level: EventLevel = EventLevel.INFO,
+        correlation_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.type = type
+        self.data = data
+        self.timestamp = time() if timestamp is None else timestamp
+        self.source = source
+        self.level = level
+        self._correlation_id = correlation_id
+        self._metadata = metadata
+
+    @property
+    def correlation_id(self) -> str:
+        """correlation id, generated on first access"""
+        if self._correlation_id is None:
+            self._correlation_id = new_event_id(self.timestamp)
+        return self._correlation_id
+
+    @correlation_id.setter
+    def correlation_id(self, value: Optional[str]):
+        self._correlation_id = value
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """additional metadata, allocated on first access"""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Optional[Dict[str, Any]]):
+        self._metadata = value
+
+    @property
+    def has_metadata(self) -> bool:
+        """whether metadata is non-empty (without allocating it)"""
+        return bool(self._metadata)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # copy, deepcopy and pickle: fix the lazy correlation id first, so the
+        # original and its copies share it
+        return (
+            self.__class__,
+            (self.type, self.data, self.timestamp, self.source, self.level,
+             self.correlation_id, self._metadata),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Event(type={self.type!r}, data={self.data!r}, timestamp={self.timestamp!r}, "
+            f"source={self.source!r}, level={self.level!r}, "
+            f"correlation_id={self._correlation_id!r}, metadata={self._metadata or {}!r})"
+        )
 
     def to_dict(self) -> Dict[str, Any]:
         """convert为dictionary"""
@@ -83,7 +145,7 @@ class Event:
             source=data.get("source", "unknown"),
             level=EventLevel(data.get("level", EventLevel.INFO)),
             correlation_id=data.get("correlation_id"),
-            metadata=data.get("metadata", {}),
+            metadata=data.get("metadata") or None,
         )
 
 
@@ -129,6 +191,7 @@ class EventTypes:
     TASK_STARTED = "TaskStarted"
     TASK_COMPLETED = "TaskCompleted"
     TASK_FAILED = "TaskFailed"
+    TASK_SCAN_DUE = "TaskScanDue"
 
     # User messageevent
     USER_MESSAGE = "UserMessage"
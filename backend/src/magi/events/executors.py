@@ -0,0 +1,282 @@
+"""
+Message Bus - handler execution modes
+
+Handlers run inline on the event loop by default, so a CPU-heavy
+subscriber (embedding generation, relation extraction, summaries) stalls
+every other coroutine - HTTP and websocket traffic included - while it
+runs. A subscription can choose another execution mode:
+
+- inline: called on the event loop (async or sync handlers)
+- thread: sync handler called in a thread pool; frees the loop while the
+  handler waits on I/O or runs C code that releases the GIL
+- process: sync, picklable (module-level) handler called in a pool of
+  worker processes; the event crosses the process boundary encoded with
+  the binary codec. Pure-Python CPU work no longer blocks the loop
+
+In every mode the handler's return value is passed to the
+subscription's on_result callback on the loop. Pools are shared by every bus in the process,
+created on first use and bounded: at most max_queued calls per pool are
+submitted or running, further calls wait (backpressure on the
+subscription's mailbox).
+
+LoopLagMonitor measures how late a periodic timer fires, i.e. how long
+the loop was blocked, so the effect of an execution mode shows up in the
+bus stats.
+"""
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from .codec import get_codec
+from .events import Event
+from .histogram import LatencyHistogram
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+
+def _run_in_process(handler: Callable[[Event], Any], payload: bytes) -> Any:
+    """Worker process entry point: decode the event and call the handler"""
+    return handler(get_codec("binary").decode(payload))
+
+
+def validate_execution(execution: str, handler: Callable):
+    """
+    Check that a handler can run in the requested execution mode
+
+    Args:
+        execution: inline/thread/process
+        handler: Subscription handler
+
+    Raises:
+        ValueError: Unknown mode, async handler outside inline mode or
+            unpicklable handler in process mode
+    """
+    if execution not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {execution}")
+    if execution == "inline":
+        return
+    if asyncio.iscoroutinefunction(handler):
+        raise ValueError(f"{execution} execution needs a sync handler")
+    if execution == "process":
+        try:
+            pickle.dumps(handler)
+        except Exception as e:
+            raise ValueError(f"process execution needs a picklable (module-level) handler: {e}") from e
+
+
+class _Pool:
+    """One lazily created executor with its submission limit and counters"""
+
+    def __init__(self, factory: Callable[[], Executor], max_queued: int):
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.max_queued = max_queued
+
+        # statistics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.waiting = 0  # calls waiting for a free slot
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Call func(*args) in the pool once a slot is free"""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            # the pool outlives event loops (tests, restarts), its limit is per loop
+            self._slots = asyncio.Semaphore(self.max_queued)
+            self._slots_loop = loop
+        slots = self._slots
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.submitted += 1
+        self.in_flight += 1
+        try:
+            if self._executor is None:
+                self._executor = self._factory()
+            result = await loop.run_in_executor(self._executor, func, *args)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM kill): start a fresh pool for the next call
+            self.failed += 1
+            self._executor = None
+            raise
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    def shutdown(self):
+        """Shut the executor down without waiting for running calls"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "started": self._executor is not None,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+
+class HandlerExecutors:
+    """
+    Thread and process pools for thread/process execution mode subscriptions
+    """
+
+    def __init__(
+        self,
+        thread_workers: int = 4,
+        process_workers: Optional[int] = None,
+        max_queued: int = 64,
+    ):
+        """
+        initialize handler executors (pools start on first use)
+
+        Args:
+            thread_workers: Threads for thread mode handlers
+            process_workers: Worker processes for process mode handlers (default CPU count)
+            max_queued: Calls per pool submitted or running at once
+        """
+        process_workers = process_workers or os.cpu_count() or 1
+        if thread_workers < 1 or process_workers < 1 or max_queued < 1:
+            raise ValueError("thread_workers, process_workers and max_queued must be positive")
+
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+
+        self._thread = _Pool(
+            lambda: ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="magi-bus-handler"),
+            max_queued,
+        )
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        self._process = _Pool(
+            lambda: ProcessPoolExecutor(
+                max_workers=process_workers, mp_context=multiprocessing.get_context("spawn"),
+            ),
+            max_queued,
+        )
+
+    async def run(self, execution: str, handler: Callable[[Event], Any], event: Event) -> Any:
+        """
+        Call handler(event) in the pool of the execution mode
+
+        Args:
+            execution: thread/process
+            handler: Sync handler
+            event: Event
+
+        Returns:
+            Any: The handler's return value
+        """
+        if execution == "process":
+            return await self._process.run(_run_in_process, handler, get_codec("binary").encode(event))
+        return await self._thread.run(handler, event)
+
+    def shutdown(self):
+        """Shut both pools down (they restart on the next call)"""
+        self._thread.shutdown()
+        self._process.shutdown()
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Per pool: size and submission counters"""
+        return {
+            "thread": {"workers": self.thread_workers, **self._thread.get_stats()},
+            "process": {"workers": self.process_workers, **self._process.get_stats()},
+        }
+
+
+_executors: Optional[HandlerExecutors] = None
+
+
+def get_executors() -> HandlerExecutors:
+    """Process-wide handler executors (created with defaults on first use)"""
+    global _executors
+    if _executors is None:
+        _executors = HandlerExecutors()
+    return _executors
+
+
+def configure_executors(
+    thread_workers: int = 4,
+    process_workers: Optional[int] = None,
+    max_queued: int = 64,
+) -> HandlerExecutors:
+    """
+    Replace the process-wide handler executors (call before subscribing)
+
+    Args:
+        thread_workers: Threads for thread mode handlers
+        process_workers: Worker processes for process mode handlers (default CPU count)
+        max_queued: Calls per pool submitted or running at once
+
+    Returns:
+        HandlerExecutors: The new executors
+    """
+    global _executors
+    if _executors is not None:
+        _executors.shutdown()
+    _executors = HandlerExecutors(thread_workers, process_workers, max_queued)
+    return _executors
+
+
+class LoopLagMonitor:
+    """
+    Event loop lag: how much later than scheduled a periodic timer fires
+    """
+
+    def __init__(self, interval: float = 0.05):
+        """
+        initialize loop lag monitor
+
+        Args:
+            interval: Seconds between probes
+        """
+        self.interval = interval
+        self.histogram = LatencyHistogram()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start probing on the running loop"""
+        if not self.running:
+            self._task = asyncio.create_task(self._probe())
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.histogram.record(loop.time() - expected)
+
+    async def stop(self):
+        """Stop probing (recorded lag is kept)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, float]:
+        """Lag percentiles in milliseconds"""
+        return self.histogram.snapshot()
@@ -0,0 +1,183 @@
+"""
+Message Bus - fair scheduling queue
+
+The default bus queue orders by EventLevel, then FIFO, so a flood of
+higher-level events (WARNING LoopPhase*, sensor bursts) can starve
+INFO-level events such as UserMessage for as long as the flood lasts.
+
+FairEventQueue is the scheduling="fair" alternative:
+
+- one sub-queue per event type, ordered by aged priority: an event gains
+  one level per aging_interval seconds it waits, so within a type old
+  events overtake newer higher-level ones
+- start-time fair queuing across types: each type with queued events has
+  a virtual start tag, the type with the smallest tag is served next and
+  its tag then advances by 1 / weight. The weight is the configured type
+  weight times (1 + aged level of the served event), so higher levels and
+  longer waits still get a larger share, but no type is starved
+- a type that was idle starts at the current virtual time, so sparse
+  types (user messages) are served almost immediately during a flood
+"""
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .events import Event
+
+
+class _TypeQueue:
+    """Queued events and fair-queuing state of one event type"""
+
+    __slots__ = ("event_type", "heap", "finish_tag", "active", "dequeued", "dropped", "wait_total", "max_wait")
+
+    def __init__(self, event_type: str):
+        self.event_type = event_type
+        self.heap: List[tuple] = []  # (aged rank, seq, enqueued_at, event)
+        self.finish_tag = 0.0
+        self.active = False  # has an entry in FairEventQueue._active
+        self.dequeued = 0
+        self.dropped = 0
+        self.wait_total = 0.0
+        self.max_wait = 0.0
+
+
+class FairEventQueue:
+    """
+    Event queue with priority aging and weighted fair queuing across event types
+
+    Not thread-safe, callers hold their queue lock (like the heaps it replaces).
+    """
+
+    def __init__(self, aging_interval: float = 1.0, type_weights: Optional[Dict[str, float]] = None):
+        """
+        initialize fair queue
+
+        Args:
+            aging_interval: Seconds of waiting that raise an event's priority by one level
+            type_weights: Relative share per event type (default 1.0)
+        """
+        if aging_interval <= 0:
+            raise ValueError(f"aging_interval must be positive, got {aging_interval}")
+
+        self.aging_interval = aging_interval
+        self.type_weights = dict(type_weights or {})
+
+        self._types: Dict[str, _TypeQueue] = {}
+        self._active: List[tuple] = []  # (start tag, seq, _TypeQueue)
+        self._virtual_time = 0.0
+        self._size = 0
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, event: Event):
+        """
+        Queue an event
+
+        Args:
+            event: Event
+        """
+        queue = self._types.get(event.type)
+        if queue is None:
+            queue = self._types[event.type] = _TypeQueue(event.type)
+
+        now = time.monotonic()
+        self._seq += 1
+        # waiting aging_interval seconds is worth one level: rank is static, no re-sorting
+        heapq.heappush(queue.heap, (now / self.aging_interval - event.level.value, self._seq, now, event))
+        self._size += 1
+
+        if not queue.active:
+            # an idle type does not get credit for the time it was idle
+            queue.active = True
+            heapq.heappush(self._active, (max(self._virtual_time, queue.finish_tag), self._seq, queue))
+
+    def pop(self) -> Optional[Event]:
+        """
+        Take the next event (None when empty)
+
+        Returns:
+            Event or None
+        """
+        entry = self.pop_entry()
+        return entry[0] if entry is not None else None
+
+    def pop_entry(self) -> Optional[Tuple[Event, float]]:
+        """
+        Take the next event with the seconds it waited (None when empty)
+
+        Returns:
+            (event, queue wait) or None
+        """
+        while self._active:
+            start_tag, _, queue = heapq.heappop(self._active)
+            if not queue.heap:
+                # emptied by eviction
+                queue.active = False
+                continue
+
+            _, _, enqueued_at, event = heapq.heappop(queue.heap)
+            self._size -= 1
+            self._virtual_time = start_tag
+
+            wait = time.monotonic() - enqueued_at
+            queue.dequeued += 1
+            queue.wait_total += wait
+            if wait > queue.max_wait:
+                queue.max_wait = wait
+
+            weight = self.type_weights.get(queue.event_type, 1.0) * (
+                1 + event.level.value + wait / self.aging_interval
+            )
+            queue.finish_tag = start_tag + 1 / weight
+            if queue.heap:
+                self._seq += 1
+                heapq.heappush(self._active, (queue.finish_tag, self._seq, queue))
+            else:
+                queue.active = False
+            return event, wait
+
+        return None
+
+    def evict_for(self, event: Event) -> bool:
+        """
+        Make room for event in a full queue (longest-queue drop)
+
+        The type with the most queued events pays: if that is event's own
+        type the new event is refused, otherwise the lowest-ranked event of
+        that type is dropped.
+
+        Args:
+            event: Event waiting to be queued
+
+        Returns:
+            bool: Whether room was made (False: refuse event)
+        """
+        own = self._types.get(event.type)
+        own_length = len(own.heap) if own is not None else 0
+        victim = max(self._types.values(), key=lambda queue: len(queue.heap), default=None)
+        if victim is None or len(victim.heap) <= own_length:
+            if own is not None:
+                own.dropped += 1
+            return False
+
+        heap = victim.heap
+        heap.remove(max(heap))
+        heapq.heapify(heap)
+        victim.dropped += 1
+        self._size -= 1
+        return True
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Per event type: queued, dequeued, dropped and queue wait (avg/max ms)"""
+        return {
+            event_type: {
+                "queued": len(queue.heap),
+                "dequeued": queue.dequeued,
+                "dropped": queue.dropped,
+                "avg_wait_ms": queue.wait_total / queue.dequeued * 1000 if queue.dequeued else 0.0,
+                "max_wait_ms": queue.max_wait * 1000,
+            }
+            for event_type, queue in self._types.items()
+        }
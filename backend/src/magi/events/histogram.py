@@ -0,0 +1,109 @@
+"""
+Message Bus - latency histograms
+
+Log-bucketed (HDR-style) histograms cheap enough to stay on in
+production: recording is a few integer operations and one list
+increment, memory is a fixed list of counters. Latencies are bucketed in
+microseconds, exactly below 16 us and with 8 linear sub-buckets per power
+of two above, so reported percentiles are within 1/16 (~6%) of the true
+value.
+
+The bus records:
+- bus queue wait per event type: from enqueue into the bus queue until a
+  worker dispatches the event
+- mailbox wait and handler duration per subscription; per event type the
+  handler durations of its subscriptions are merged when stats are read
+"""
+import math
+from typing import Dict, Iterable
+
+_SUB_BITS = 3  # 8 sub-buckets per power of two
+_LINEAR = 1 << (_SUB_BITS + 1)  # below 16 us every microsecond has its bucket
+_MAX_SHIFT = 60
+_BUCKETS = ((_MAX_SHIFT + 1) << _SUB_BITS) + _LINEAR
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (seconds in, milliseconds out)"""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self):
+        self._counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """
+        Record one latency
+
+        Args:
+            seconds: Latency in seconds (negative values, e.g. clock skew, count as 0)
+        """
+        if seconds < 0:
+            seconds = 0.0
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+        micros = int(seconds * 1e6)
+        if micros < _LINEAR:
+            self._counts[micros] += 1
+        else:
+            shift = micros.bit_length() - _SUB_BITS - 1  # < _MAX_SHIFT below ~36000 years
+            self._counts[(shift << _SUB_BITS) + (micros >> shift)] += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the recordings of another histogram"""
+        self._counts = [a + b for a, b in zip(self._counts, other._counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """
+        Latency at quantile q
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            float: Milliseconds (bucket midpoint, capped at the recorded max)
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                break
+
+        if index < _LINEAR:
+            micros = index + 0.5
+        else:
+            shift = (index >> _SUB_BITS) - 1
+            micros = ((index & ((1 << _SUB_BITS) - 1)) + (1 << _SUB_BITS) + 0.5) * (1 << shift)
+        return min(micros / 1000, self.max * 1000)
+
+    def snapshot(self) -> Dict[str, float]:
+        """count, avg/max and p50/p95/p99 in milliseconds"""
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max * 1000,
+        }
+
+
+def merged(histograms: Iterable[LatencyHistogram]) -> LatencyHistogram:
+    """One histogram holding the recordings of all given histograms"""
+    result = LatencyHistogram()
+    for histogram in histograms:
+        result.merge(histogram)
+    return result
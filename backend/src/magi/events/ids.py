@@ -0,0 +1,81 @@
+"""
+event system - time-ordered ids
+
+ULID-style identifiers: 26 Crockford base32 characters, 48-bit millisecond
+timestamp followed by 80 random bits. Ids sort lexicographically by time,
+so used as TEXT primary keys they append at the right edge of the B-tree
+instead of scattering inserts like uuid4. Within one millisecond the
+random part is incremented, keeping ids generated by this process
+strictly increasing.
+"""
+import os
+import threading
+from time import time
+from typing import Optional
+
+_ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODING = {c: i for i, c in enumerate(_ENCODING)}
+_PAIRS = [a + b for a in _ENCODING for b in _ENCODING]  # 10 bits -> 2 characters
+_RANDOM_MASK = (1 << 80) - 1
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+_last_prefix = ""
+
+
+def _encode_time(ms: int) -> str:
+    """48-bit millisecond timestamp -> 10 characters"""
+    chars = []
+    for _ in range(10):
+        chars.append(_ENCODING[ms & 31])
+        ms >>= 5
+    return "".join(reversed(chars))
+
+
+def new_event_id(timestamp: Optional[float] = None) -> str:
+    """
+    Generate a time-ordered id
+
+    Args:
+        timestamp: Unix time in seconds the id is ordered by (default now)
+
+    Returns:
+        str: 26-character id
+    """
+    global _last_ms, _last_random, _last_prefix
+
+    ms = int((time() if timestamp is None else timestamp) * 1000)
+    with _lock:
+        if ms == _last_ms:
+            _last_random = (_last_random + 1) & _RANDOM_MASK
+        else:
+            _last_ms = ms
+            _last_random = int.from_bytes(os.urandom(10), "big")
+            _last_prefix = _encode_time(ms)
+        r = _last_random
+        prefix = _last_prefix
+
+    return (
+        prefix
+        + _PAIRS[(r >> 70) & 1023] + _PAIRS[(r >> 60) & 1023]
+        + _PAIRS[(r >> 50) & 1023] + _PAIRS[(r >> 40) & 1023]
+        + _PAIRS[(r >> 30) & 1023] + _PAIRS[(r >> 20) & 1023]
+        + _PAIRS[(r >> 10) & 1023] + _PAIRS[r & 1023]
+    )
+
+
+def event_id_timestamp(event_id: str) -> float:
+    """
+    Unix time (seconds, millisecond precision) encoded in an id
+
+    Args:
+        event_id: Id from new_event_id()
+
+    Returns:
+        float: Timestamp
+    """
+    ms = 0
+    for char in event_id[:10]:
+        ms = (ms << 5) | _DECODING[char]
+    return ms / 1000
@@ -0,0 +1,228 @@
+"""
+Message Bus - per-subscriber mailboxes
+
+Every subscription gets a bounded mailbox drained by its own consumer
+task(s), so bus workers only enqueue and a slow handler delays nothing but
+its own subscription.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from .events import Event
+from .histogram import LatencyHistogram
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class DeliveryTracker:
+    """
+    Completion callback shared by all deliveries of one event
+
+    Calls on_complete once every mailbox the event was put into has
+    finished with it (handled, failed or dropped). Backends use it to ack
+    an event only after its handlers ran.
+    """
+
+    __slots__ = ("_remaining", "_on_complete")
+
+    def __init__(self, on_complete: Callable[[], None]):
+        self._remaining = 1  # held by the dispatcher until every delivery is enqueued
+        self._on_complete = on_complete
+
+    def add(self):
+        """Register one more delivery"""
+        self._remaining += 1
+
+    def done(self):
+        """Mark one delivery (or the dispatcher's hold) finished"""
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._on_complete()
+
+
+class SubscriberMailbox:
+    """
+    Bounded mailbox + consumer tasks for one subscription
+
+    - concurrency: number of consumer tasks (1 keeps per-subscriber ordering)
+    - max_pending: mailbox capacity
+    - overflow_policy: what put() does when the mailbox is full
+        - block: wait for space (backpressure on the bus worker)
+        - drop_oldest: discard the oldest queued event
+        - drop_newest: discard the event being delivered
+    """
+
+    def __init__(
+        self,
+        subscription_id: str,
+        invoke: Callable[[Event], Awaitable[None]],
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+    ):
+        """
+        initialize mailbox
+
+        Args:
+            subscription_id: Owning subscription id
+            invoke: Coroutine function that runs the handler for one event
+            concurrency: Number of consumer tasks
+            max_pending: Maximum queued events
+            overflow_policy: block/drop_oldest/drop_newest
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if concurrency < 1 or max_pending < 1:
+            raise ValueError("concurrency and max_pending must be positive")
+
+        self.subscription_id = subscription_id
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.overflow_policy = overflow_policy
+
+        self._invoke = invoke
+        # items: (event, enqueued_at, tracker)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._consumers: List[asyncio.Task] = []
+        self._in_flight = 0
+
+        # statistics
+        self._delivered = 0
+        self._dropped = 0
+        self._handled = 0
+        self._lag_ms = 0.0
+        self.wait_histogram = LatencyHistogram()  # enqueue -> handler start
+        self.handler_histogram = LatencyHistogram()
+
+    @property
+    def pending(self) -> int:
+        """Queued plus in-flight events (load signal for competing mode)"""
+        return self._queue.qsize() + self._in_flight
+
+    async def put(self, event: Event, tracker: Optional[DeliveryTracker] = None) -> bool:
+        """
+        Enqueue an event according to the overflow policy
+
+        Args:
+            event: Event
+            tracker: Completion tracker of the event, if the backend needs one
+
+        Returns:
+            bool: Whether the event was enqueued (False if dropped)
+        """
+        if len(self._consumers) < self.concurrency:
+            self._start_consumers()
+
+        if tracker is not None:
+            tracker.add()
+        item = (event, time.monotonic(), tracker)
+
+        queue = self._queue
+        if not queue.full():
+            queue.put_nowait(item)
+        elif self.overflow_policy == "drop_newest":
+            self._drop(item)
+            return False
+        elif self.overflow_policy == "drop_oldest":
+            self._drop(queue.get_nowait())
+            queue.task_done()
+            queue.put_nowait(item)
+        else:
+            await queue.put(item)
+
+        self._delivered += 1
+        return True
+
+    def _drop(self, item: tuple):
+        """Count a dropped item and release its delivery"""
+        self._dropped += 1
+        tracker = item[2]
+        if tracker is not None:
+            tracker.done()
+
+    def _start_consumers(self):
+        """(Re)start consumer tasks"""
+        self._consumers = [task for task in self._consumers if not task.done()]
+        while len(self._consumers) < self.concurrency:
+            self._consumers.append(asyncio.create_task(self._consume()))
+
+    async def _consume(self):
+        """Consumer task: run the handler for queued events one at a time"""
+        queue = self._queue
+        while True:
+            try:
+                event, enqueued_at, tracker = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                event, enqueued_at, tracker = await queue.get()
+            started = time.monotonic()
+            self._in_flight += 1
+            cancelled = False
+            try:
+                await self._invoke(event)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                finished = time.monotonic()
+                self._in_flight -= 1
+                # a handler cancelled partway (close()) keeps its delivery
+                # unreleased: the backend does not ack the event, and it is
+                # redelivered once its lease expires
+                if not cancelled:
+                    self._record(started - enqueued_at, finished - started)
+                    if tracker is not None:
+                        tracker.done()
+                self._queue.task_done()
+
+    def _record(self, lag: float, duration: float):
+        """Update lag and handler latency statistics (seconds in)"""
+        self._handled += 1
+        self._lag_ms = lag * 1000
+        self.wait_histogram.record(lag)
+        self.handler_histogram.record(duration)
+
+    def is_idle(self) -> bool:
+        """Nothing queued and nothing running"""
+        return self.pending == 0
+
+    async def join(self):
+        """Wait until every queued event has been handled"""
+        await self._queue.join()
+
+    async def close(self):
+        """Stop consumer tasks; queued events stay for the next start"""
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    def discard(self):
+        """Cancel consumers and drop everything queued (used on unsubscribe)"""
+        for task in self._consumers:
+            task.cancel()
+        self._consumers = []
+        while not self._queue.empty():
+            self._drop(self._queue.get_nowait())
+            self._queue.task_done()
+
+    def get_stats(self) -> dict:
+        """Per-subscriber lag, drops and handler latency (with p50/p95/p99 histograms)"""
+        waits = self.wait_histogram
+        handlers = self.handler_histogram
+        return {
+            "pending": self._queue.qsize(),
+            "in_flight": self._in_flight,
+            "delivered": self._delivered,
+            "handled": self._handled,
+            "dropped": self._dropped,
+            "lag_ms": self._lag_ms,
+            "max_lag_ms": waits.max * 1000,
+            "handler_avg_ms": handlers.total / handlers.count * 1000 if handlers.count else 0.0,
+            "handler_max_ms": handlers.max * 1000,
+            "concurrency": self.concurrency,
+            "max_pending": self.max_pending,
+            "overflow_policy": self.overflow_policy,
+            "queue_wait": waits.snapshot(),
+            "handler": handlers.snapshot(),
+        }
@@ -5,10 +5,14 @@ Memory queue based on asyncio.priorityQueue
 import asyncio
 import heapq
 import time
-from typing import Callable, Dict, List, Optional, Set
-from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from .backend import MessageBusBackend
+from .coalesce import CoalescePolicy
+from .dispatch import DispatchTable
 from .events import Event
+from .fair_queue import FairEventQueue
+from .scheduler import TimerWheel, recurring_event_factory
+from .wakeup import WorkerWakeup
 
 
 class MemoryMessageBackend(MessageBusBackend):
@@ -20,9 +24,14 @@ class MemoryMessageBackend(MessageBusBackend):
     - Fully async event processing, notttn-blocking publisher
     - Worker pool for concurrent event processing
     - error isolation: single handler failure does not affect others
+    - Delayed and recurring delivery: one timer wheel releases scheduled
+      events into the priority queue when they are due
+    - scheduling="fair": priority aging and weighted fair queuing across
+      event types (see FairEventQueue); when full, the most backlogged
+      type is dropped from (oldest and lowest_priority alike)
 
     Limitations:
-    - No persistence, unprocessed messages are lost after Agent restart
+    - No persistence, unprocessed and scheduled messages are lost after Agent restart
     """
 
     def __init__(
@@ -30,6 +39,9 @@ class MemoryMessageBackend(MessageBusBackend):
         max_queue_size: int = 1000,
         num_workers: int = 4,
         drop_policy: str = "lowest_priority",
+        scheduling: str = "priority",
+        aging_interval: float = 1.0,
+        type_weights: Optional[Dict[str, float]] = None,
     ):
         """
         initialize memory message backend
@@ -38,30 +50,39 @@ class MemoryMessageBackend(MessageBusBackend):
             max_queue_size: Maximum queue length
             num_workers: Number of worker threads
             drop_policy: Drop policy when queue is full (oldest/lowest_priority/reject)
+            scheduling: "priority" (level, then FIFO) or "fair" (aging + per-type fair queuing)
+            aging_interval: fair: seconds of waiting that raise an event by one level
+            type_weights: fair: relative share per event type (default 1.0)
         """
+        if scheduling not in ("priority", "fair"):
+            raise ValueError(f"Unknown scheduling: {scheduling}")
+
         self.max_queue_size = max_queue_size
         self.num_workers = num_workers
         self.drop_policy = drop_policy
+        self.scheduling = scheduling
 
         # priority queue (using heapq)
-        # Element format: (-priority, timestamp, event)
+        # Element format: (-priority, counter, enqueued_at, event)
         # Note: lower priority value means higher priority, so we use negative sign
+        # With scheduling="fair" this is a FairEventQueue instead
+        self._fair: Optional[FairEventQueue] = None
         self._queue: List[tuple] = []
+        if scheduling == "fair":
+            self._fair = self._queue = FairEventQueue(aging_interval, type_weights)
         self._queue_lock = asyncio.Lock()
 
-        # Subscription info
-        # {event_type: [{subscription_id, handler, mode, filter_func}]}
-        self._subscriptions: Dict[str, List[Dict]] = defaultdict(list)
-        self._subscription_index: Dict[str, Dict] = {}  # {subscription_id: subscription_info}
-
-        # Pending count (for load balancing)
-        self._handler_pending: Dict[Callable, int] = defaultdict(int)
-
         # Worker management
         self._workers: List[asyncio.Task] = []
         self._running = False
         self._counter = 0  # Used to ensure uniqueness of queue elements
 
+        # Idle workers wait here instead of sleep polling
+        self._wakeup = WorkerWakeup()
+
+        # Delayed events and recurring schedules
+        self._timers = TimerWheel(self._release_due)
+
         # Statistics
         self._stats = {
             "published_count": 0,
@@ -70,46 +91,131 @@ class MemoryMessageBackend(MessageBusBackend):
             "error_count": 0,
         }
 
-    async def publish(self, Event: Event) -> bool:
+        # Subscriptions, compiled per event type (also tracks pending counts for load balancing)
+        self._dispatch = DispatchTable(self._stats)
+
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
         """
         Publish event to queue
 
         Args:
             event: Event to publish
+            deliver_at: Unix time before which the event is held in the timer wheel
 
         Returns:
-            bool: Whether the event was successfully published
+            bool: Whether the event was successfully published (or scheduled)
         """
+        if deliver_at is not None and deliver_at > time.time():
+            self._timers.add(event, deliver_at)
+            return True
+
         async with self._queue_lock:
-            # Check if queue is full
-            if len(self._queue) >= self.max_queue_size:
-                # Handle according to policy
-                if self.drop_policy == "reject":
-                    self._stats["dropped_count"] += 1
+            accepted = self._push_locked(event)
+
+        if accepted:
+            # Wake one idle worker
+            self._wakeup.notify()
+        return accepted
+
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        Publish a batch of events, taking the queue lock once
+
+        Args:
+            events: Events to publish, in order
+
+        Returns:
+            List[bool]: Per event, whether it was accepted under the drop policy
+        """
+        async with self._queue_lock:
+            results = [self._push_locked(event) for event in events]
+
+        accepted = sum(results)
+        if accepted:
+            self._wakeup.notify(accepted)
+        return results
+
+    async def _release_due(self, events: List[Event]):
+        """Timer wheel callback: enqueue events whose delivery time has come"""
+        await self.publish_many(events)
+
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        Publish an event every interval seconds
+
+        Args:
+            event: Template event or a zero-argument callable returning the event
+            interval: Period in seconds
+            start_at: Unix time of the first publish (default now + interval)
+
+        Returns:
+            str: Schedule id
+        """
+        return self._timers.add_recurring(recurring_event_factory(event), interval, start_at)
+
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """
+        Cancel a recurring schedule
+
+        Args:
+            schedule_id: Schedule id
+
+        Returns:
+            bool: Whether the schedule existed
+        """
+        return self._timers.cancel(schedule_id)
+
+    def _push_locked(self, event: Event) -> bool:
+        """
+        Push one event, applying the drop policy (caller holds _queue_lock)
+
+        Args:
+            event: Event to enqueue
+
+        Returns:
+            bool: Whether the event was accepted
+        """
+        # Check if queue is full
+        if len(self._queue) >= self.max_queue_size:
+            # Handle according to policy
+            if self.drop_policy == "reject":
+                self._stats["dropped_count"] += 1
+                return False
+            elif self._fair is not None:
+                # The most backlogged event type pays (the new event itself if it is that type)
+                self._stats["dropped_count"] += 1
+                if not self._fair.evict_for(event):
                     return False
-                elif self.drop_policy == "oldest":
-                    # Drop the oldest (queue head)
-                    heapq.heappop(self._queue)
-                    self._stats["dropped_count"] += 1
-                elif self.drop_policy == "lowest_priority":
-                    # Compare new event with lowest priority in queue
-                    if self._queue:
-                        lowest_priority = -self._queue[0][0]
-                        if event.level.value > lowest_priority:
-                            heapq.heappop(self._queue)
-                            self._stats["dropped_count"] += 1
-                        else:
-                            # New event has lower priority, reject
-                            self._stats["dropped_count"] += 1
-                            return False
-
-            # Add to priority queue
-            # (-priority, counter, event) - counter ensures FIFO
-            priority = -event.level.value
-            self._counter += 1
-            heapq.heappush(self._queue, (priority, self._counter, event))
-            self._stats["published_count"] += 1
-            return True
+            elif self.drop_policy == "oldest":
+                # Drop the oldest (queue head)
+                heapq.heappop(self._queue)
+                self._stats["dropped_count"] += 1
+            elif self.drop_policy == "lowest_priority":
+                # Compare new event with lowest priority in queue
+                if self._queue:
+                    lowest_priority = -self._queue[0][0]
+                    if event.level.value > lowest_priority:
+                        heapq.heappop(self._queue)
+                        self._stats["dropped_count"] += 1
+                    else:
+                        # New event has lower priority, reject
+                        self._stats["dropped_count"] += 1
+                        return False
+
+        # Add to priority queue
+        # (-priority, counter, enqueued_at, event) - counter ensures FIFO
+        self._counter += 1
+        if self._fair is not None:
+            self._fair.push(event)
+        else:
+            heapq.heappush(self._queue, (-event.level.value, self._counter, time.monotonic(), event))
+        self._stats["published_count"] += 1
+        return True
 
     async def subscribe(
         self,
@@ -117,6 +223,12 @@ class MemoryMessageBackend(MessageBusBackend):
         handler: Callable,
         propagation_mode: str = "broadcast",
         filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
     ) -> str:
         """
         Subscribe to event
@@ -126,6 +238,12 @@ class MemoryMessageBackend(MessageBusBackend):
             handler: Handler function
             propagation_mode: propagation mode (broadcast/competing)
             filter_func: Filter function
+            concurrency: Concurrent handler calls (mailbox consumer tasks)
+            max_pending: Mailbox capacity
+            overflow_policy: Mailbox overflow policy (block/drop_oldest/drop_newest)
+            coalesce: Coalescing policy (latest/aggregate/sample), see events.coalesce
+            execution: Handler execution mode (inline/thread/process), see events.executors
+            on_result: Receives (event, handler return value) after each call
 
         Returns:
             str: Subscription id
@@ -138,10 +256,15 @@ class MemoryMessageBackend(MessageBusBackend):
             "handler": handler,
             "mode": propagation_mode,
             "filter_func": filter_func,
+            "concurrency": concurrency,
+            "max_pending": max_pending,
+            "overflow_policy": overflow_policy,
+            "coalesce": coalesce,
+            "execution": execution,
+            "on_result": on_result,
         }
 
-        self._subscriptions[event_type].append(subscription)
-        self._subscription_index[subscription_id] = subscription
+        self._dispatch.add(subscription)
 
         return subscription_id
 
@@ -155,19 +278,7 @@ class MemoryMessageBackend(MessageBusBackend):
         Returns:
             bool: Whether unsubscription was successful
         """
-        if subscription_id not in self._subscription_index:
-            return False
-
-        subscription = self._subscription_index[subscription_id]
-        event_type = subscription["event_type"]
-
-        # Remove from subscription list
-        self._subscriptions[event_type] = [
-            s for s in self._subscriptions[event_type] if s["id"] != subscription_id
-        ]
-
-        del self._subscription_index[subscription_id]
-        return True
+        return self._dispatch.remove(subscription_id) is not None
 
     async def start(self):
         """Start message bus (start worker pool)"""
@@ -178,27 +289,40 @@ class MemoryMessageBackend(MessageBusBackend):
         self._workers = [
             asyncio.create_task(self._worker(i)) for i in range(self.num_workers)
         ]
+        await self._timers.start()
 
     async def stop(self):
         """Stop message bus (graceful shutdown)"""
         if not self._running:
             return
 
-        self._running = False
+        # Events not yet due stay in the timer wheel
+        await self._timers.stop()
 
-        # Wait for queue to be processed or timeout
+        # Wait for queue to be processed or timeout (workers keep running meanwhile)
         timeout = 30  # seconds
         start_time = time.time()
 
         while self._queue and (time.time() - start_time) < timeout:
             await asyncio.sleep(0.1)
 
+        # Let subscriber mailboxes finish what was dispatched to them
+        try:
+            await asyncio.wait_for(
+                self._dispatch.join(), timeout=max(timeout - (time.time() - start_time), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+        self._running = False
+
         # Cancel all workers
         for worker in self._workers:
             worker.cancel()
 
         # Wait for workers to finish
         await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._dispatch.close()
 
     async def _worker(self, worker_id: int):
         """
@@ -209,96 +333,44 @@ class MemoryMessageBackend(MessageBusBackend):
         """
         while self._running:
             try:
-                # Get event from queue
-                event = await self._get_next_event()
+                # Get event (and its queue wait) from queue
+                entry = await self._get_next_event()
 
-                if event is None:
-                    await asyncio.sleep(0.1)
+                if entry is None:
+                    # Queue empty: sleep until a publish wakes this worker
+                    await self._wakeup.wait()
                     continue
 
+                self._wakeup.consume()
+
                 # process event
-                await self._process_event(event)
+                await self._process_event(*entry)
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self._stats["error_count"] += 1
 
-    async def _get_next_event(self) -> Optional[Event]:
-        """Get next event from queue"""
+    async def _get_next_event(self) -> Optional[Tuple[Event, float]]:
+        """Get next event from queue, with the seconds it waited there"""
         async with self._queue_lock:
             if not self._queue:
                 return None
 
-            _, _, event = heapq.heappop(self._queue)
-            return event
+            if self._fair is not None:
+                return self._fair.pop_entry()
+            _, _, enqueued_at, event = heapq.heappop(self._queue)
+            return event, time.monotonic() - enqueued_at
 
-    async def _process_event(self, Event: Event):
+    async def _process_event(self, event: Event, queue_wait: Optional[float] = None):
         """
         process event (dispatch to subscribers)
 
         Args:
             event: Event to process
+            queue_wait: Seconds the event waited in the queue
         """
-        subscriptions = self._subscriptions.get(event.type, [])
-
-        if not subscriptions:
-            return
-
-        # Handle according to propagation mode
-        broadcast_subscriptions = [s for s in subscriptions if s["mode"] == "broadcast"]
-        competing_subscriptions = [s for s in subscriptions if s["mode"] == "competing"]
-
-        # broadcast mode: all subscribers receive the event
-        for subscription in broadcast_subscriptions:
-            await self._handle_event(subscription, event)
-
-        # competing mode: only one subscriber receives the event (the one with lowest load)
-        if competing_subscriptions:
-            # Select handler with lowest pending count
-            subscription = min(
-                competing_subscriptions, key=lambda s: self._handler_pending[s["handler"]]
-            )
-            await self._handle_event(subscription, event)
-
-    async def _handle_event(self, subscription: Dict, Event: Event):
-        """
-        Call single handler to process event
-
-        Args:
-            subscription: Subscription info
-            event: Event
-        """
-        # Check filter function
-        if subscription["filter_func"]:
-            try:
-                if not subscription["filter_func"](event):
-                    return
-            except Exception:
-                # Filter function error, default to not filtering
-                pass
-
-        handler = subscription["handler"]
-
-        # Increment pending count
-        self._handler_pending[handler] += 1
-
-        try:
-            # Call handler
-            if asyncio.iscoroutinefunction(handler):
-                await handler(event)
-            else:
-                handler(event)
-
-            self._stats["processed_count"] += 1
-
-        except Exception as e:
-            # error isolation: single handler failure does not affect others
-            self._stats["error_count"] += 1
-
-        finally:
-            # Decrement pending count
-            self._handler_pending[handler] -= 1
+        await self._dispatch.dispatch(event, queue_wait=queue_wait)
 
     async def get_stats(self) -> dict:
         """
@@ -307,11 +379,20 @@ class MemoryMessageBackend(MessageBusBackend):
         Returns:
             dict: Statistics info
         """
-        return {
+        stats = {
             **self._stats,
             "queue_size": len(self._queue),
+            "scheduling": self.scheduling,
+            "scheduled_count": len(self._timers),
             "max_queue_size": self.max_queue_size,
-            "subscription_count": len(self._subscription_index),
+            "subscription_count": len(self._dispatch),
+            "subscriptions": self._dispatch.get_subscription_stats(),
+            "latency": self._dispatch.get_latency_stats(),
+            "execution": self._dispatch.get_execution_stats(),
             "worker_count": self.num_workers,
             "running": self._running,
         }
+        if self._fair is not None:
+            # per event type: queued, dequeued, dropped, avg/max queue wait
+            stats["queue_wait"] = self._fair.get_stats()
+        return stats
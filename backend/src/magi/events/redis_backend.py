@@ -0,0 +1,823 @@
+"""
+Message Bus - Redis Streams Backend Implementation
+Distributed queue based on Redis Streams and consumer groups
+"""
+import asyncio
+import functools
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .backend import MessageBusBackend
+from .coalesce import CoalescePolicy
+from .codec import EventCodec, decode_event, get_codec
+from .dispatch import DispatchTable
+from .events import Event
+from .scheduler import TimerWheel, recurring_event_factory
+from .topics import is_pattern
+
+logger = logging.getLogger(__name__)
+
+
+class RedisMessageBackend(MessageBusBackend):
+    """
+    Redis Streams based message queue backend
+
+    Features:
+    - One stream per event type ({stream_prefix}{event_type})
+    - Two consumer groups per stream:
+      - competing/round_robin subscriptions read through the shared group
+        (consumer_group): every entry goes to exactly one process
+      - broadcast subscriptions read through a per-process group
+        ({consumer_group}:{consumer_name}): every process sees every entry
+        published after its group was created. The group is kept across
+        restarts when consumer_name is configured, and destroyed on stop
+        when the name is generated.
+    - Local priority buffer: entries read from Redis are handled by EventLevel
+    - At-least-once delivery: entries are acked after handling with pipelined
+      batched XACKs; entries left pending longer than claim_idle_ms (e.g. by a
+      crashed process) are reclaimed with XAUTOCLAIM and handled again.
+      Entries this process still holds (buffered or in subscriber mailboxes)
+      are only re-claimed, which resets their idle time, never handled twice
+    - Delayed and recurring delivery: the publishing process holds scheduled
+      events in its timer wheel and XADDs them when due (not persisted)
+    - Safe trimming: every trim_interval seconds, entries delivered and acked
+      by all groups are trimmed (XTRIM MINID). Only a stream that still grows
+      beyond max_queue_size loses unconsumed entries, counted in dropped_count.
+
+    Applicable scenarios:
+    - Several API/agent processes sharing one bus
+    - Multi-host deployment
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        stream_prefix: str = "magi:events:",
+        consumer_group: str = "magi",
+        consumer_name: Optional[str] = None,
+        max_queue_size: int = 1000,
+        num_workers: int = 4,
+        read_count: int = 32,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 30000,
+        ack_batch_size: int = 32,
+        ack_interval: float = 0.05,
+        pattern_scan_interval: float = 5.0,
+        trim_interval: float = 1.0,
+        codec: Union[str, EventCodec] = "binary",
+        client=None,
+    ):
+        """
+        initialize Redis message backend
+
+        Args:
+            redis_url: Redis connection url (ignored when client is given)
+            stream_prefix: Stream key prefix, the event type is appended
+            consumer_group: Consumer group shared by all processes (competing subscriptions),
+                also the prefix of the per-process broadcast group
+            consumer_name: Unique consumer name of this process (default host-pid;
+                set it to keep the broadcast group across restarts)
+            max_queue_size: Maximum length of each stream, enforced by the trimmer
+            num_workers: Number of local workers
+            read_count: Maximum entries fetched per XREADGROUP
+            block_ms: XREADGROUP block timeout in milliseconds
+            claim_idle_ms: Pending entries idle this long are reclaimed
+            ack_batch_size: Acks buffered before a pipelined flush
+            ack_interval: Maximum seconds an ack stays buffered
+            pattern_scan_interval: Seconds between scans for streams matching wildcard subscriptions
+            trim_interval: Seconds between trims of consumed entries
+            codec: Event codec for stream entries ("binary", "json" or an EventCodec)
+            client: redis.asyncio compatible client (e.g. fakeredis for tests)
+        """
+        self.redis_url = redis_url
+        self.stream_prefix = stream_prefix
+        self.consumer_group = consumer_group
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.broadcast_group = f"{consumer_group}:{self.consumer_name}"
+        self._ephemeral_broadcast_group = consumer_name is None
+        self.max_queue_size = max_queue_size
+        self.num_workers = num_workers
+        self.read_count = read_count
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_interval
+        self.pattern_scan_interval = pattern_scan_interval
+        self.trim_interval = trim_interval
+        self._codec = get_codec(codec)
+
+        self._client = client
+        self._owns_client = client is None
+
+        # {group: propagation modes it delivers to}; the shared group starts at the
+        # beginning of the stream, the broadcast group at entries published from now on
+        self._group_modes = {
+            consumer_group: ("competing", "round_robin"),
+            self.broadcast_group: ("broadcast",),
+        }
+        self._group_start_ids = {consumer_group: "0", self.broadcast_group: "$"}
+        self._groups_created: set = set()  # {(stream, group)}
+        self._published_streams: set = set()
+
+        # Concrete event types of existing streams matched by wildcard subscriptions
+        self._pattern_types: List[str] = []
+        self._pattern_scanned_at = 0.0
+
+        # Local priority buffer: (-priority, counter, group, stream, entry_id, event)
+        self._buffer: Optional[asyncio.PriorityQueue] = None
+        self._counter = 0
+
+        # Ack buffer: {(group, stream): [entry_id]}
+        self._ack_buffer: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        self._ack_count = 0
+        self._ack_ready = asyncio.Event()
+
+        # (group, stream, entry_id) read by this process and not yet acked in Redis
+        self._inflight: set = set()
+
+        # Task management
+        self._workers: List[asyncio.Task] = []
+        self._reader_tasks: List[asyncio.Task] = []
+        self._reclaim_task: Optional[asyncio.Task] = None
+        self._trim_task: Optional[asyncio.Task] = None
+        self._ack_task: Optional[asyncio.Task] = None
+        self._running = False
+        self._reading = False  # readers/reclaimer/trimmer exit on their own (no cancel mid-command)
+        self._stop_reading = asyncio.Event()
+
+        # Delayed events and recurring schedules of this process
+        self._timers = TimerWheel(self._release_due)
+
+        # Statistics
+        self._stats = {
+            "published_count": 0,
+            "dropped_count": 0,
+            "processed_count": 0,
+            "error_count": 0,
+            "read_count": 0,
+            "acked_count": 0,
+            "ack_flushes": 0,
+            "reclaimed_count": 0,
+            "trimmed_count": 0,
+        }
+
+        # Subscription info, compiled per event type
+        self._dispatch = DispatchTable(self._stats)
+
+    def _stream_key(self, event_type: str) -> str:
+        """Stream key of an event type"""
+        return f"{self.stream_prefix}{event_type}"
+
+    async def _connect(self):
+        """Create the Redis client unless one was injected"""
+        if self._client is None:
+            import redis.asyncio as aioredis
+            self._client = aioredis.from_url(self.redis_url)
+
+    async def _ensure_group(self, stream: str, group: str):
+        """Create the consumer group (and stream) if it does not exist yet"""
+        if (stream, group) in self._groups_created:
+            return
+
+        try:
+            await self._client.xgroup_create(
+                stream, group, id=self._group_start_ids[group], mkstream=True
+            )
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        self._groups_created.add((stream, group))
+
+    async def _ensure_groups(self, event_type: str):
+        """Create the groups the subscriptions of an exact event type read through"""
+        for group, modes in self._group_modes.items():
+            if event_type in self._dispatch.event_types(modes):
+                await self._ensure_group(self._stream_key(event_type), group)
+
+    async def _subscribed_types(self, group: Optional[str] = None) -> List[str]:
+        """
+        Event types whose streams this process reads (through group, default any group)
+
+        Wildcard subscriptions are expanded to the existing streams they match
+        (SCAN, at most every pattern_scan_interval seconds).
+        """
+        modes = self._group_modes[group] if group is not None else None
+        event_types = self._dispatch.event_types(modes)
+        patterns = self._dispatch.patterns()
+        if not patterns:
+            return event_types
+
+        if time.monotonic() - self._pattern_scanned_at >= self.pattern_scan_interval:
+            matched = set()
+            for pattern in patterns:
+                async for key in self._client.scan_iter(
+                    match=self._stream_key(pattern), _type="stream"
+                ):
+                    if isinstance(key, bytes):
+                        key = key.decode()
+                    event_type = key[len(self.stream_prefix):]
+                    # Redis globs are looser than topic patterns ("*" spans dots)
+                    if self._dispatch.route(event_type) is not None:
+                        matched.add(event_type)
+            self._pattern_types = sorted(matched)
+            self._pattern_scanned_at = time.monotonic()
+
+        pattern_types = self._pattern_types
+        if modes is not None:
+            pattern_types = [t for t in pattern_types if self._routes_to(t, modes)]
+        return event_types + [t for t in pattern_types if t not in event_types]
+
+    def _routes_to(self, event_type: str, modes: Tuple[str, ...]) -> bool:
+        """Whether an event type has local subscriptions with one of the modes"""
+        route = self._dispatch.route(event_type)
+        return route is not None and any(getattr(route, mode) for mode in modes)
+
+    def _encode(self, event: Event) -> bytes:
+        """Serialize an event for a stream entry"""
+        return self._codec.encode(event)
+
+    @staticmethod
+    def _decode(payload: bytes) -> Event:
+        """Deserialize a stream entry payload (any built-in codec)"""
+        return decode_event(payload)
+
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
+        """
+        Append event to its stream
+
+        Args:
+            event: Event to publish
+            deliver_at: Unix time before which the event is held in this process's timer wheel
+
+        Returns:
+            bool: Whether the event was successfully published (or scheduled)
+        """
+        if deliver_at is not None and deliver_at > time.time():
+            self._timers.add(event, deliver_at)
+            return True
+
+        try:
+            if self._client is None:
+                await self._connect()
+
+            stream = self._stream_key(event.type)
+            await self._client.xadd(stream, {"event": self._encode(event), "level": event.level.value})
+            self._published_streams.add(stream)
+            self._stats["published_count"] += 1
+            return True
+
+        except Exception as e:
+            self._stats["error_count"] += 1
+            logger.error(f"Redis publish failed for {event.type}: {e}")
+            return False
+
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        Append a batch of events with one pipelined round-trip
+
+        Args:
+            events: Events to publish, in order
+
+        Returns:
+            List[bool]: Per event, whether its XADD succeeded
+        """
+        if not events:
+            return []
+
+        try:
+            if self._client is None:
+                await self._connect()
+
+            pipe = self._client.pipeline(transaction=False)
+            for event in events:
+                stream = self._stream_key(event.type)
+                pipe.xadd(stream, {"event": self._encode(event), "level": event.level.value})
+                self._published_streams.add(stream)
+            replies = await pipe.execute(raise_on_error=False)
+
+        except Exception as e:
+            self._stats["error_count"] += len(events)
+            logger.error(f"Redis publish_many failed for {len(events)} events: {e}")
+            return [False] * len(events)
+
+        results = [not isinstance(reply, Exception) for reply in replies]
+        accepted = sum(results)
+        self._stats["published_count"] += accepted
+        self._stats["error_count"] += len(results) - accepted
+        return results
+
+    async def _release_due(self, events: List[Event]):
+        """Timer wheel callback: append events whose delivery time has come"""
+        await self.publish_many(events)
+
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        Publish an event every interval seconds
+
+        Args:
+            event: Template event or a zero-argument callable returning the event
+            interval: Period in seconds
+            start_at: Unix time of the first publish (default now + interval)
+
+        Returns:
+            str: Schedule id
+        """
+        return self._timers.add_recurring(recurring_event_factory(event), interval, start_at)
+
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """
+        Cancel a recurring schedule
+
+        Args:
+            schedule_id: Schedule id
+
+        Returns:
+            bool: Whether the schedule existed
+        """
+        return self._timers.cancel(schedule_id)
+
+    async def subscribe(
+        self,
+        event_type: str,
+        handler: Callable,
+        propagation_mode: str = "broadcast",
+        filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
+    ) -> str:
+        """
+        Subscribe to event
+
+        The process starts reading the event type's stream on the next read
+        round: broadcast subscriptions through this process's own group,
+        competing/round_robin ones through the shared group. Wildcard
+        patterns ("Task*", "Loop.*") read every existing stream they match.
+
+        Args:
+            event_type: event type
+            handler: Handler function
+            propagation_mode: propagation mode (broadcast/competing)
+            filter_func: Filter function
+            concurrency: Concurrent handler calls (mailbox consumer tasks)
+            max_pending: Mailbox capacity
+            overflow_policy: Mailbox overflow policy (block/drop_oldest/drop_newest)
+            coalesce: Coalescing policy (latest/aggregate/sample), see events.coalesce
+            execution: Handler execution mode (inline/thread/process), see events.executors
+            on_result: Receives (event, handler return value) after each call
+
+        Returns:
+            str: Subscription id
+        """
+        subscription_id = f"{event_type}_{id(handler)}_{time.time()}"
+
+        subscription = {
+            "id": subscription_id,
+            "event_type": event_type,
+            "handler": handler,
+            "mode": propagation_mode,
+            "filter_func": filter_func,
+            "concurrency": concurrency,
+            "max_pending": max_pending,
+            "overflow_policy": overflow_policy,
+            "coalesce": coalesce,
+            "execution": execution,
+            "on_result": on_result,
+        }
+
+        self._dispatch.add(subscription)
+
+        if is_pattern(event_type):
+            self._pattern_scanned_at = 0.0  # rescan on the next read round
+        elif self._running:
+            await self._ensure_groups(event_type)
+
+        return subscription_id
+
+    async def unsubscribe(self, subscription_id: str) -> bool:
+        """
+        Unsubscribe from event
+
+        Args:
+            subscription_id: Subscription id
+
+        Returns:
+            bool: Whether unsubscription was successful
+        """
+        return self._dispatch.remove(subscription_id) is not None
+
+    async def start(self):
+        """Start message bus (reader, reclaimer, ack flusher, timer wheel and worker pool)"""
+        if self._running:
+            return
+
+        await self._connect()
+
+        for event_type in self._dispatch.event_types():
+            await self._ensure_groups(event_type)
+
+        self._buffer = asyncio.PriorityQueue(maxsize=max(self.read_count * 2, self.num_workers))
+        self._running = True
+        self._reading = True
+        self._stop_reading.clear()
+
+        self._reader_tasks = [asyncio.create_task(self._reader(group)) for group in self._group_modes]
+        self._reclaim_task = asyncio.create_task(self._reclaimer())
+        self._trim_task = asyncio.create_task(self._trimmer())
+        self._ack_task = asyncio.create_task(self._ack_flusher())
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.num_workers)
+        ]
+        await self._timers.start()
+
+    async def stop(self):
+        """Stop message bus (graceful shutdown)"""
+        if not self._running:
+            return
+
+        # Events not yet due stay in the timer wheel
+        await self._timers.stop()
+
+        # Stop reading new entries (within one block_ms), then let workers finish what is buffered
+        self._reading = False
+        self._stop_reading.set()
+        await asyncio.gather(
+            *self._reader_tasks, self._reclaim_task, self._trim_task, return_exceptions=True
+        )
+
+        try:
+            await asyncio.wait_for(self._buffer.join(), timeout=30)
+            await asyncio.wait_for(self._dispatch.join(), timeout=30)
+        except asyncio.TimeoutError:
+            pass
+
+        self._running = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._dispatch.close()
+
+        # Final ack flush; anything unacked is reclaimed by another consumer later
+        self._ack_ready.set()
+        await asyncio.gather(self._ack_task, return_exceptions=True)
+        await self._flush_acks()
+
+        if self._ephemeral_broadcast_group:
+            # a generated consumer name is never reused: drop its broadcast group
+            await self._destroy_broadcast_groups()
+
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _destroy_broadcast_groups(self):
+        """Remove this process's broadcast group from every stream it was created on"""
+        for stream, group in list(self._groups_created):
+            if group != self.broadcast_group:
+                continue
+            try:
+                await self._client.xgroup_destroy(stream, group)
+            except Exception as e:
+                logger.warning(f"Could not remove broadcast group {group} of {stream}: {e}")
+            self._groups_created.discard((stream, group))
+
+    # ==================== reading ====================
+
+    async def _reader(self, group: str):
+        """
+        Read new entries of one group's subscribed streams into the local buffer
+
+        Args:
+            group: Consumer group (shared or broadcast)
+        """
+        while self._reading:
+            try:
+                event_types = await self._subscribed_types(group)
+                streams = {self._stream_key(event_type): ">" for event_type in event_types}
+                if not streams:
+                    await asyncio.sleep(self.block_ms / 1000)
+                    continue
+
+                for stream in streams:
+                    await self._ensure_group(stream, group)
+
+                # Only read what the local buffer can take (backpressure)
+                free = self._buffer.maxsize - self._buffer.qsize()
+                if free <= 0:
+                    await asyncio.sleep(0.01)
+                    continue
+
+                started = time.monotonic()
+                response = await self._client.xreadgroup(
+                    group,
+                    self.consumer_name,
+                    streams,
+                    count=min(self.read_count, free),
+                    block=self.block_ms,
+                )
+                for stream, entries in response or []:
+                    await self._buffer_entries(group, stream, entries)
+
+                if not response:
+                    # servers that return before block_ms (e.g. in-process fakes) would spin here
+                    remaining = self.block_ms / 1000 - (time.monotonic() - started)
+                    if remaining > 0:
+                        await asyncio.sleep(min(remaining, 0.01))
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Redis read failed: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _reclaimer(self):
+        """Reclaim entries left pending by consumers that stopped acking them"""
+        interval = max(self.claim_idle_ms / 2000, 0.05)
+        while self._reading:
+            try:
+                try:
+                    await asyncio.wait_for(self._stop_reading.wait(), timeout=interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+                for group in self._group_modes:
+                    for event_type in await self._subscribed_types(group):
+                        await self._reclaim_stream(group, self._stream_key(event_type))
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Redis pending reclaim failed: {e}")
+
+    async def _reclaim_stream(self, group: str, stream: str):
+        """XAUTOCLAIM idle pending entries of one stream/group into the local buffer"""
+        if (stream, group) not in self._groups_created:
+            return
+
+        start_id = "0-0"
+        while True:
+            result = await self._client.xautoclaim(
+                stream,
+                group,
+                self.consumer_name,
+                min_idle_time=self.claim_idle_ms,
+                start_id=start_id,
+                count=self.read_count,
+            )
+            start_id, entries = result[0], result[1]
+            # own entries still being handled here: claiming them only reset their idle time
+            entries = [
+                entry for entry in entries
+                if self._entry_key(group, stream, entry[0]) not in self._inflight
+            ]
+            if entries:
+                self._stats["reclaimed_count"] += len(entries)
+                await self._buffer_entries(group, stream, entries)
+            if not entries or start_id in (b"0-0", "0-0"):
+                break
+
+    @staticmethod
+    def _entry_key(group: str, stream, entry_id) -> Tuple[str, str, str]:
+        """Normalized (group, stream, entry_id) of an entry, whatever the client's decode setting"""
+        if isinstance(stream, bytes):
+            stream = stream.decode()
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        return group, stream, entry_id
+
+    async def _buffer_entries(self, group: str, stream, entries: List[Tuple]):
+        """Decode stream entries of one group and put them into the local priority buffer"""
+        for entry_id, fields in entries:
+            self._inflight.add(self._entry_key(group, stream, entry_id))
+            if not fields:
+                # Entry was trimmed for overflow while pending (counted by the trimmer): just ack it
+                self._queue_ack(group, stream, entry_id)
+                continue
+
+            try:
+                event = self._decode(fields.get(b"event", fields.get("event")))
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Dropping undecodable stream entry {entry_id!r}: {e}")
+                self._queue_ack(group, stream, entry_id)
+                continue
+
+            self._stats["read_count"] += 1
+            self._counter += 1
+            await self._buffer.put((-event.level.value, self._counter, group, stream, entry_id, event))
+
+    # ==================== trimming ====================
+
+    async def _trimmer(self):
+        """Trim consumed entries of the streams this process reads or writes"""
+        while self._reading:
+            try:
+                try:
+                    await asyncio.wait_for(self._stop_reading.wait(), timeout=self.trim_interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+                streams = set(self._published_streams)
+                streams.update(self._stream_key(t) for t in await self._subscribed_types())
+                for stream in streams:
+                    await self._trim_stream(stream)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Redis stream trim failed: {e}")
+
+    async def _trim_stream(self, stream: str):
+        """
+        Trim one stream: entries every group has delivered and acked, then overflow
+
+        Args:
+            stream: Stream key
+        """
+        try:
+            groups = await self._client.xinfo_groups(stream)
+        except Exception:
+            return  # stream does not exist (yet)
+
+        # oldest entry some group still needs: its first pending or first undelivered entry
+        needed = []
+        for info in groups:
+            info = {k.decode() if isinstance(k, bytes) else k: v for k, v in info.items()}
+            name = info["name"]
+            if info["pending"]:
+                summary = await self._client.xpending(stream, name)
+                needed.append(_parse_id(summary["min"]))
+            else:
+                ms, seq = _parse_id(info["last-delivered-id"])
+                needed.append((ms, seq + 1))
+
+        if needed:
+            ms, seq = min(needed)
+            trimmed = await self._client.xtrim(stream, minid=f"{ms}-{seq}", approximate=False)
+            self._stats["trimmed_count"] += trimmed
+
+        # still over the limit: the oldest unconsumed entries are lost
+        if await self._client.xlen(stream) > self.max_queue_size:
+            dropped = await self._client.xtrim(stream, maxlen=self.max_queue_size, approximate=False)
+            self._stats["dropped_count"] += dropped
+            if dropped:
+                logger.warning(f"Redis stream {stream} over max_queue_size, dropped {dropped} entries")
+
+    # ==================== processing ====================
+
+    async def _worker(self, worker_id: int):
+        """
+        Worker: take events from the local buffer, dispatch, then queue the ack
+
+        Args:
+            worker_id: Worker id
+        """
+        while self._running:
+            try:
+                _, _, group, stream, entry_id, event = await self._buffer.get()
+                try:
+                    # ack once every local subscriber the group delivers to has handled the entry
+                    await self._process_event(
+                        event,
+                        on_complete=functools.partial(self._queue_ack, group, stream, entry_id),
+                        modes=self._group_modes[group],
+                        # entry ids start with the XADD time in ms
+                        queue_wait=time.time() - _parse_id(entry_id)[0] / 1000,
+                    )
+                finally:
+                    self._buffer.task_done()
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Redis worker {worker_id} dispatch failed: {e}")
+
+    async def _process_event(
+        self,
+        event: Event,
+        on_complete: Optional[Callable[[], None]] = None,
+        modes: Optional[Tuple[str, ...]] = None,
+        queue_wait: Optional[float] = None,
+    ):
+        """
+        process event (enqueue for local subscribers)
+
+        Args:
+            event: Event to process
+            on_complete: Called after every selected subscriber handled the event
+            modes: Propagation modes of the group the entry was read through
+            queue_wait: Seconds since the entry was added to its stream
+        """
+        await self._dispatch.dispatch(event, on_complete, modes, queue_wait)
+
+    # ==================== acking ====================
+
+    def _queue_ack(self, group: str, stream, entry_id):
+        """Buffer an ack; flushed in a pipeline by the ack flusher"""
+        self._ack_buffer[(group, stream)].append(entry_id)
+        self._ack_count += 1
+        if self._ack_count >= self.ack_batch_size:
+            self._ack_ready.set()
+
+    async def _ack_flusher(self):
+        """Flush buffered acks every ack_interval or when ack_batch_size is reached"""
+        while self._running:
+            try:
+                await asyncio.wait_for(self._ack_ready.wait(), timeout=self.ack_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ack_ready.clear()
+
+            try:
+                await self._flush_acks()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Redis ack flush failed: {e}")
+
+    async def _flush_acks(self):
+        """Send all buffered acks in one pipeline (one XACK per group and stream)"""
+        if not self._ack_count:
+            return
+
+        acks, self._ack_buffer = self._ack_buffer, defaultdict(list)
+        self._ack_count = 0
+
+        pipe = self._client.pipeline(transaction=False)
+        for (group, stream), entry_ids in acks.items():
+            pipe.xack(stream, group, *entry_ids)
+        try:
+            results = await pipe.execute()
+        finally:
+            # held until acked, so the reclaimer never hands them out again meanwhile
+            for (group, stream), entry_ids in acks.items():
+                for entry_id in entry_ids:
+                    self._inflight.discard(self._entry_key(group, stream, entry_id))
+
+        self._stats["acked_count"] += sum(int(r) for r in results)
+        self._stats["ack_flushes"] += 1
+
+    async def get_stats(self) -> dict:
+        """
+        Get statistics
+
+        Returns:
+            dict: Statistics info (stream lengths and pending entries per subscribed type)
+        """
+        streams = {}
+        event_types = self._dispatch.event_types() + self._pattern_types
+        if self._client is not None and event_types:
+            pipe = self._client.pipeline(transaction=False)
+            for event_type in event_types:
+                pipe.xlen(self._stream_key(event_type))
+            try:
+                lengths = await pipe.execute()
+                streams = dict(zip(event_types, lengths))
+            except Exception:
+                streams = {}
+
+        return {
+            **self._stats,
+            "queue_size": self._buffer.qsize() if self._buffer else 0,
+            "stream_lengths": streams,
+            "pending_acks": self._ack_count,
+            "scheduled_count": len(self._timers),
+            "max_queue_size": self.max_queue_size,
+            "subscription_count": len(self._dispatch),
+            "subscriptions": self._dispatch.get_subscription_stats(),
+            "latency": self._dispatch.get_latency_stats(),
+            "execution": self._dispatch.get_execution_stats(),
+            "worker_count": self.num_workers,
+            "consumer_group": self.consumer_group,
+            "broadcast_group": self.broadcast_group,
+            "consumer_name": self.consumer_name,
+            "running": self._running,
+        }
+
+
+def _parse_id(entry_id) -> Tuple[int, int]:
+    """Stream entry id ("ms-seq", str or bytes) as a comparable tuple"""
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
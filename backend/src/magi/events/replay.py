@@ -0,0 +1,113 @@
+"""
+Message Bus - replay command line
+
+Reads processed events back from a SQLite bus database (see
+SQLiteMessageBackend.history/replay), without starting the bus:
+
+    python -m magi.events.replay --db ~/.magi/data/message_queue.db \\
+        --since 2026-10-01T00:00 --type "Task*" > events.jsonl
+
+prints one JSON event per line, or re-dispatches them to a handler:
+
+    python -m magi.events.replay --handler mypackage.rebuild:on_event --speed 10
+
+The last cursor goes to stderr; pass it as --after to resume.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import sys
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .sqlite_backend import SQLiteMessageBackend
+
+
+def parse_time(value: str) -> float:
+    """Unix time or ISO 8601 date/time (local time unless it has an offset)"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_cursor(value: str) -> Tuple[float, int]:
+    """Cursor printed by an earlier run ("created_at:id")"""
+    created_at, row_id = value.rsplit(":", 1)
+    return float(created_at), int(row_id)
+
+
+def format_cursor(cursor: Optional[Tuple[float, int]]) -> str:
+    return f"{cursor[0]!r}:{cursor[1]}" if cursor is not None else ""
+
+
+def load_handler(spec: str):
+    """Import "module:function" """
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Handler must be given as module:function, got {spec}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+async def run(args: argparse.Namespace) -> int:
+    backend = SQLiteMessageBackend(db_path=args.db)
+    event_types: Optional[List[str]] = args.type or None
+
+    if args.handler:
+        result = await backend.replay(
+            load_handler(args.handler),
+            since=args.since,
+            until=args.until,
+            event_types=event_types,
+            after=args.after,
+            speed=args.speed,
+            batch_size=args.batch_size,
+        )
+        print(
+            f"replayed {result['replayed']} events in {result['duration_ms'] / 1000:.2f}s",
+            file=sys.stderr,
+        )
+        cursor = result["cursor"]
+    else:
+        cursor = args.after
+        out = sys.stdout
+        async for cursor, event in backend.history(
+            since=args.since,
+            until=args.until,
+            event_types=event_types,
+            after=args.after,
+            batch_size=args.batch_size,
+        ):
+            out.write(json.dumps(event.to_dict(), ensure_ascii=False, default=str))
+            out.write("\n")
+
+    print(f"cursor: {format_cursor(cursor)}", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m magi.events.replay",
+        description="Stream or re-dispatch processed events of a SQLite message bus",
+    )
+    parser.add_argument("--db", default="~/.magi/data/message_queue.db", help="bus database file")
+    parser.add_argument("--since", type=parse_time, help="first event time (unix or ISO 8601)")
+    parser.add_argument("--until", type=parse_time, help="stop before this time (unix or ISO 8601)")
+    parser.add_argument(
+        "--type", action="append", help="event type or pattern (repeatable, default all)"
+    )
+    parser.add_argument("--after", type=parse_cursor, help="resume after this cursor")
+    parser.add_argument("--handler", help="re-dispatch to module:function instead of printing")
+    parser.add_argument(
+        "--speed", type=float, default=None,
+        help="with --handler: pace events at original spacing / speed (default full speed)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per page")
+    args = parser.parse_args(argv)
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Message Bus - delayed and recurring delivery
+
+A hierarchical timer wheel driven by one asyncio task. Timers are hashed
+into slots by their absolute due tick: level 0 holds timers due within the
+current block of wheel_size ticks, level L those due within the current
+block of wheel_size^(L+1) ticks. When time reaches a higher-level slot its
+timers cascade down; timers beyond the top level wait in an overflow list.
+
+The driver task sleeps until the next occupied slot (or until a timer is
+added in front of it), so idle schedules cost nothing and adding or
+cancelling a timer is O(1) however many are pending.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from .events import Event
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer:
+    """One pending timer (one-shot item or recurring factory)"""
+
+    __slots__ = ("timer_id", "tick", "item", "factory", "interval_ticks", "cancelled")
+
+    def __init__(self, timer_id: str, tick: int, item: Any = None,
+                 factory: Optional[Callable[[], Any]] = None, interval_ticks: int = 0):
+        self.timer_id = timer_id
+        self.tick = tick
+        self.item = item
+        self.factory = factory
+        self.interval_ticks = interval_ticks
+        self.cancelled = False
+
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel releasing items when they are due
+
+    - add(item, deliver_at): one-shot timer, item is handed to on_due
+    - add_recurring(factory, interval): factory() is handed to on_due every
+      interval seconds; deadlines are kept in ticks so they do not drift,
+      and occurrences missed while the loop was busy are skipped
+    - items due in the same tick are released to on_due as one batch
+    """
+
+    def __init__(
+        self,
+        on_due: Callable[[List[Any]], Awaitable[None]],
+        tick: float = 0.01,
+        wheel_size: int = 64,
+        levels: int = 4,
+    ):
+        """
+        initialize timer wheel
+
+        Args:
+            on_due: Coroutine function called with the list of due items
+            tick: Resolution in seconds (timers never fire early, at most one tick late)
+            wheel_size: Slots per level
+            levels: Number of levels (span is tick * wheel_size ** levels seconds)
+        """
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self._on_due = on_due
+
+        # _spans[L] = ticks covered by one slot of level L
+        self._spans = [wheel_size ** level for level in range(levels + 1)]
+        self._wheels: List[List[List[_Timer]]] = [
+            [[] for _ in range(wheel_size)] for _ in range(levels)
+        ]
+        self._overflow: List[_Timer] = []  # beyond the top level
+        self._ready: List[_Timer] = []  # due when added or cascaded
+        self._timers: Dict[str, _Timer] = {}
+        self._current = self._now_tick()
+        self._seq = 0
+
+        # Driver task
+        self._task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._sleep_until: Optional[int] = None
+        self._closing = False
+
+        self._stats = {
+            "fired_count": 0,
+            "cancelled_count": 0,
+            "error_count": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def _now_tick(self) -> int:
+        return int(time.time() / self.tick)
+
+    # ==================== timers ====================
+
+    def add(self, item: Any, deliver_at: float) -> str:
+        """
+        Release item at deliver_at
+
+        Args:
+            item: Value handed to on_due
+            deliver_at: Unix time in seconds
+
+        Returns:
+            str: Timer id (for cancel)
+        """
+        return self._add(_Timer(self._next_id(), math.ceil(deliver_at / self.tick), item=item))
+
+    def add_recurring(
+        self,
+        factory: Callable[[], Any],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        Release factory() every interval seconds
+
+        Args:
+            factory: Called at every occurrence, its result is handed to on_due
+            interval: Period in seconds
+            start_at: Unix time of the first occurrence (default now + interval)
+
+        Returns:
+            str: Timer id (for cancel)
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+
+        first = time.time() + interval if start_at is None else start_at
+        timer = _Timer(
+            self._next_id(),
+            math.ceil(first / self.tick),
+            factory=factory,
+            interval_ticks=max(1, round(interval / self.tick)),
+        )
+        return self._add(timer)
+
+    def cancel(self, timer_id: str) -> bool:
+        """
+        Cancel a pending timer
+
+        Args:
+            timer_id: Id returned by add/add_recurring
+
+        Returns:
+            bool: Whether the timer was still pending
+        """
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            return False
+
+        # left in its slot, skipped when the slot is reached
+        timer.cancelled = True
+        self._stats["cancelled_count"] += 1
+        return True
+
+    def next_due_at(self) -> Optional[float]:
+        """Unix time of the next occupied slot (None when nothing is pending)"""
+        tick = self._next_tick()
+        return None if tick is None else tick * self.tick
+
+    def _next_id(self) -> str:
+        self._seq += 1
+        return f"timer_{self._seq}"
+
+    def _add(self, timer: _Timer) -> str:
+        self._timers[timer.timer_id] = timer
+        self._place(timer)
+
+        # wake the driver if the new timer is due before its current sleep target
+        if self._sleep_until is None or timer.tick < self._sleep_until:
+            self._changed.set()
+        return timer.timer_id
+
+    def _place(self, timer: _Timer):
+        """put a timer into the lowest level whose current block contains its tick"""
+        tick = timer.tick
+        if tick <= self._current:
+            self._ready.append(timer)
+            return
+
+        for level in range(self.levels):
+            block = self._spans[level + 1]
+            if tick // block == self._current // block:
+                slot = (tick // self._spans[level]) % self.wheel_size
+                self._wheels[level][slot].append(timer)
+                return
+
+        self._overflow.append(timer)
+
+    def _next_tick(self) -> Optional[int]:
+        """tick of the next slot that releases or cascades timers"""
+        if self._ready:
+            return self._current
+
+        current = self._current
+        for level in range(self.levels):
+            width = self._spans[level]
+            block = self._spans[level + 1]
+            digit = (current // width) % self.wheel_size
+            wheel = self._wheels[level]
+            for slot in range(digit + 1, self.wheel_size):
+                if wheel[slot]:
+                    # every higher-level boundary lies beyond this block
+                    return (current // block) * block + slot * width
+
+        if self._overflow:
+            top = self._spans[self.levels]
+            return min((timer.tick // top) * top for timer in self._overflow)
+        return None
+
+    def _advance(self, now_tick: int) -> List[_Timer]:
+        """move the wheel to now_tick, jumping over empty slots; return due timers"""
+        due: List[_Timer] = []
+        while True:
+            if self._ready:
+                due.extend(timer for timer in self._ready if not timer.cancelled)
+                self._ready = []
+
+            tick = self._next_tick()
+            if tick is None or tick > now_tick:
+                break
+            self._current = tick
+
+            # cascade from the top down, so timers can fall through several levels
+            if self._overflow and tick % self._spans[self.levels] == 0:
+                pending, self._overflow = self._overflow, []
+                for timer in pending:
+                    if not timer.cancelled:
+                        self._place(timer)
+
+            for level in range(self.levels - 1, 0, -1):
+                if tick % self._spans[level] == 0:
+                    slot = (tick // self._spans[level]) % self.wheel_size
+                    pending, self._wheels[level][slot] = self._wheels[level][slot], []
+                    for timer in pending:
+                        if not timer.cancelled:
+                            self._place(timer)
+
+            slot = tick % self.wheel_size
+            pending, self._wheels[0][slot] = self._wheels[0][slot], []
+            due.extend(timer for timer in pending if not timer.cancelled)
+
+        self._current = max(self._current, now_tick)
+        return due
+
+    # ==================== driver ====================
+
+    async def start(self):
+        """Start the driver task"""
+        if self._task is not None:
+            return
+
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the driver task (pending timers are kept, not fired)"""
+        if self._task is None:
+            return
+
+        self._closing = True
+        self._changed.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._sleep_until = None
+
+    async def _run(self):
+        """driver: release due timers, then sleep until the next occupied slot"""
+        while not self._closing:
+            self._changed.clear()
+
+            due = self._advance(self._now_tick())
+            if due:
+                await self._fire(due)
+                continue
+
+            tick = self._next_tick()
+            self._sleep_until = tick
+            timeout = None if tick is None else max(tick * self.tick - time.time(), 0)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, due: List[_Timer]):
+        """hand due items to on_due and re-arm recurring timers"""
+        items = []
+        for timer in due:
+            if timer.factory is None:
+                self._timers.pop(timer.timer_id, None)
+                items.append(timer.item)
+                continue
+
+            try:
+                items.append(timer.factory())
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Recurring timer {timer.timer_id} factory failed: {e}")
+
+            missed = (self._current - timer.tick) // timer.interval_ticks
+            timer.tick += (missed + 1) * timer.interval_ticks
+            self._place(timer)
+
+        if not items:
+            return
+
+        self._stats["fired_count"] += len(items)
+        try:
+            await self._on_due(items)
+        except Exception as e:
+            self._stats["error_count"] += 1
+            logger.error(f"Releasing {len(items)} due timers failed: {e}")
+
+    def get_stats(self) -> dict:
+        """Get statistics (pending timers, next due time)"""
+        return {
+            **self._stats,
+            "pending": len(self._timers),
+            "recurring": sum(1 for timer in self._timers.values() if timer.factory is not None),
+            "next_due_at": self.next_due_at(),
+        }
+
+
+def recurring_event_factory(event: Union[Event, Callable[[], Event]]) -> Callable[[], Event]:
+    """
+    Build a factory producing a fresh event for every occurrence of a schedule
+
+    Args:
+        event: Template event (copied with a new timestamp and correlation id)
+            or a zero-argument callable returning the event
+
+    Returns:
+        Callable[[], Event]: Event factory
+    """
+    if not isinstance(event, Event):
+        return event
+
+    def make() -> Event:
+        return Event(
+            type=event.type,
+            data=event.data,
+            source=event.source,
+            level=event.level,
+            metadata=dict(event.metadata) if event.has_metadata else None,
+        )
+
+    return make
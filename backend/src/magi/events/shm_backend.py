@@ -0,0 +1,537 @@
+"""
+Message Bus - shared-memory ring buffer backend
+
+Several Python processes on one host (e.g. uvicorn workers) share one bus
+without a broker: events are encoded once and copied into a ring of
+fixed-size slots in a multiprocessing.shared_memory segment, and every
+attached process reads every event from the ring and dispatches it to its
+own subscribers.
+
+Ring layout (little endian):
+
+    header  magic "MGRB" | version u32 | slot_count u32 | slot_size u32 | write_seq u64
+    slot i  stamp u64 | published_at f64 | length u32 | payload
+
+Sequence protocol: the event with sequence s lives in slot s % slot_count.
+Writers serialize on an flock()ed lock file (held for one copy, never
+across an await): stamp = 2s+1 (writing), copy payload, stamp = 2s+2
+(committed), write_seq = s+1. Readers never lock: they read slot s only if
+its stamp is 2s+2 before and after copying the payload. A larger stamp
+means writers lapped the reader; it skips to the oldest event still in the
+ring and counts the lost events as overruns.
+"""
+import asyncio
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .backend import MessageBusBackend
+from .coalesce import CoalescePolicy
+from .codec import EventCodec, decode_event, get_codec
+from .dispatch import DispatchTable
+from .events import Event
+from .scheduler import TimerWheel, recurring_event_factory
+from .wakeup import WorkerWakeup
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"MGRB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIII")
+_WRITE_SEQ = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = _HEADER.size
+_HEADER_SIZE = 64  # header padded to a cache line
+_STAMP = struct.Struct("<Q")
+_SLOT_META = struct.Struct("<dI")  # published_at, length (after the stamp)
+_SLOT_HEADER_SIZE = 24
+_UNTRACKED = sys.version_info >= (3, 13)  # SharedMemory(track=False)
+
+
+def _open_segment(name: str, create: bool, size: int = 0) -> shared_memory.SharedMemory:
+    """Create or attach a segment that outlives this process"""
+    if _UNTRACKED:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    # before Python 3.13 every attaching process registers the segment with its
+    # resource tracker, which unlinks it when that process exits
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class SharedMemoryMessageBackend(MessageBusBackend):
+    """
+    Single-host multi-process message bus on a shared-memory ring buffer
+
+    Features:
+    - no broker, no fsync: publish is one encode and one copy into the ring
+    - every attached process receives every event published after it attached
+      (also its own) and dispatches it to its local subscribers; competing and
+      round_robin choose among the subscribers of one process
+    - delivery order is publish order (EventLevel does not reorder the ring)
+    - delayed and recurring delivery through the local timer wheel
+
+    Limitations:
+    - no persistence, and no backpressure across processes: a reader that falls
+      more than slot_count events behind loses the oldest ones (overrun_count)
+    - events larger than slot_size - 24 bytes once encoded are refused
+    - needs fcntl (Linux, macOS)
+    """
+
+    def __init__(
+        self,
+        name: str = "magi_bus",
+        slot_count: int = 8192,
+        slot_size: int = 2048,
+        poll_interval: float = 0.0005,
+        max_poll_interval: float = 0.01,
+        read_batch_size: int = 256,
+        codec: Union[str, EventCodec] = "binary",
+    ):
+        """
+        initialize shared-memory message backend
+
+        Every process of a deployment must use the same name, slot_count and slot_size.
+
+        Args:
+            name: Shared memory segment name (also names the lock file)
+            slot_count: Events the ring holds
+            slot_size: Bytes per slot, including the 24-byte slot header
+            poll_interval: Seconds an idle reader first waits between ring checks
+            max_poll_interval: Idle polling backs off up to this many seconds
+            read_batch_size: Events a reader takes from the ring per pass
+            codec: Event codec for the ring payload ("binary", "json" or an EventCodec)
+        """
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryMessageBackend needs fcntl (Linux or macOS)")
+        if slot_count < 1 or slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError(f"slot_count must be positive and slot_size larger than {_SLOT_HEADER_SIZE}")
+
+        self.name = name
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.read_batch_size = max(1, read_batch_size)
+        self._codec = get_codec(codec)
+
+        # attached on first use (publish or start)
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._buffer: Optional[memoryview] = None
+        self._lock_fd: Optional[int] = None
+        self._read_seq = 0  # next sequence this process reads
+
+        self._reader: Optional[asyncio.Task] = None
+        self._running = False
+
+        # local publishes wake the reader at once; other processes' are polled
+        self._wakeup = WorkerWakeup()
+
+        # Delayed events and recurring schedules
+        self._timers = TimerWheel(self._release_due)
+
+        # Statistics
+        self._stats = {
+            "published_count": 0,
+            "dropped_count": 0,
+            "processed_count": 0,
+            "error_count": 0,
+            "read_count": 0,
+            "overrun_count": 0,
+        }
+
+        # Subscriptions, compiled per event type
+        self._dispatch = DispatchTable(self._stats)
+
+    # ==================== ring ====================
+
+    @property
+    def lock_path(self) -> str:
+        """File whose flock serializes writers of the segment"""
+        return os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _attach(self) -> memoryview:
+        """Attach the segment, creating and formatting it if this is the first process"""
+        if self._buffer is not None:
+            return self._buffer
+
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._write_lock():
+            try:
+                segment = _open_segment(self.name, create=False)
+            except FileNotFoundError:
+                segment = _open_segment(
+                    self.name, create=True, size=_HEADER_SIZE + self.slot_count * self.slot_size,
+                )
+                _HEADER.pack_into(segment.buf, 0, _MAGIC, _VERSION, self.slot_count, self.slot_size)
+                _WRITE_SEQ.pack_into(segment.buf, _WRITE_SEQ_OFFSET, 0)
+
+            magic, version, slot_count, slot_size = _HEADER.unpack_from(segment.buf, 0)
+            # like a fresh subscriber: events published before attaching are not delivered
+            self._read_seq = _WRITE_SEQ.unpack_from(segment.buf, _WRITE_SEQ_OFFSET)[0]
+
+        self._segment = segment
+        if (magic, version, slot_count, slot_size) != (_MAGIC, _VERSION, self.slot_count, self.slot_size):
+            self._detach()
+            raise ValueError(
+                f"Shared memory segment {self.name} has layout {magic!r} v{version} "
+                f"{slot_count}x{slot_size}, expected {self.slot_count}x{self.slot_size}"
+            )
+        self._buffer = segment.buf
+        return self._buffer
+
+    def _detach(self):
+        """Close this process's mapping and lock file (the segment stays)"""
+        self._buffer = None
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def unlink(self):
+        """Remove the segment and lock file (when every process is done with them)"""
+        self._detach()
+        try:
+            segment = _open_segment(self.name, create=False)
+        except FileNotFoundError:
+            pass
+        else:
+            segment.close()
+            if not _UNTRACKED:
+                # unlink() unregisters the segment, which _open_segment already did
+                resource_tracker.register(segment._name, "shared_memory")
+            segment.unlink()
+        try:
+            os.unlink(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+    def _write(self, payloads: List[Optional[bytes]]) -> List[bool]:
+        """Copy encoded events into the ring under the writer lock"""
+        buffer = self._attach()
+        published_at = time.time()
+        results = []
+        with self._write_lock():
+            seq = _WRITE_SEQ.unpack_from(buffer, _WRITE_SEQ_OFFSET)[0]
+            for payload in payloads:
+                if payload is None:
+                    results.append(False)
+                    continue
+                offset = _HEADER_SIZE + (seq % self.slot_count) * self.slot_size
+                _STAMP.pack_into(buffer, offset, 2 * seq + 1)
+                start = offset + _SLOT_HEADER_SIZE
+                buffer[start:start + len(payload)] = payload
+                _SLOT_META.pack_into(buffer, offset + _STAMP.size, published_at, len(payload))
+                _STAMP.pack_into(buffer, offset, 2 * seq + 2)
+                seq += 1
+                results.append(True)
+            _WRITE_SEQ.pack_into(buffer, _WRITE_SEQ_OFFSET, seq)
+        return results
+
+    def _encode(self, event: Event) -> Optional[bytes]:
+        """Encode an event for the ring, None (refused) if it cannot be encoded or is too large"""
+        try:
+            payload = self._codec.encode(event)
+        except Exception as e:
+            logger.error(f"Failed to encode event {event.type}: {e}")
+            return None
+        if len(payload) > self.slot_size - _SLOT_HEADER_SIZE:
+            logger.warning(
+                f"Event {event.type} is {len(payload)} bytes encoded, "
+                f"slots hold {self.slot_size - _SLOT_HEADER_SIZE}; refused"
+            )
+            return None
+        return payload
+
+    def _read(self) -> List[Tuple[Event, float]]:
+        """
+        Take up to read_batch_size committed events from the ring
+
+        Returns:
+            List[Tuple[Event, float]]: (event, seconds since it was published)
+        """
+        buffer = self._attach()
+        write_seq = _WRITE_SEQ.unpack_from(buffer, _WRITE_SEQ_OFFSET)[0]
+        seq = self._read_seq
+        if write_seq - seq > self.slot_count:
+            # lapped: the oldest events were overwritten
+            self._stats["overrun_count"] += write_seq - self.slot_count - seq
+            seq = write_seq - self.slot_count
+
+        entries = []
+        now = time.time()
+        end = min(write_seq, seq + self.read_batch_size)
+        while seq < end:
+            offset = _HEADER_SIZE + (seq % self.slot_count) * self.slot_size
+            committed = 2 * seq + 2
+            stamp = _STAMP.unpack_from(buffer, offset)[0]
+            if stamp == committed:
+                published_at, length = _SLOT_META.unpack_from(buffer, offset + _STAMP.size)
+                start = offset + _SLOT_HEADER_SIZE
+                payload = bytes(buffer[start:start + length])
+                if _STAMP.unpack_from(buffer, offset)[0] == committed:
+                    seq += 1
+                    try:
+                        entries.append((decode_event(payload), now - published_at))
+                    except Exception as e:
+                        self._stats["error_count"] += 1
+                        logger.error(f"Failed to decode ring slot {seq - 1}: {e}")
+                    continue
+                stamp = _STAMP.unpack_from(buffer, offset)[0]
+            if stamp < committed:
+                # reserved by write_seq but not committed yet (cannot happen under the
+                # writer lock unless a writer died mid-copy): retry on the next pass
+                break
+            # overwritten while we got here: skip to the oldest event still in the ring
+            write_seq = _WRITE_SEQ.unpack_from(buffer, _WRITE_SEQ_OFFSET)[0]
+            oldest = max(seq + 1, write_seq - self.slot_count + 1)
+            self._stats["overrun_count"] += oldest - seq
+            seq = oldest
+            end = min(write_seq, seq + self.read_batch_size)
+
+        self._read_seq = seq
+        self._stats["read_count"] += len(entries)
+        return entries
+
+    # ==================== publish ====================
+
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
+        """
+        Publish event to every attached process
+
+        Args:
+            event: Event to publish
+            deliver_at: Unix time before which the event is held in the local timer wheel
+
+        Returns:
+            bool: Whether the event was written (False: too large or not encodable)
+        """
+        if deliver_at is not None and deliver_at > time.time():
+            self._timers.add(event, deliver_at)
+            return True
+        return (await self.publish_many([event]))[0]
+
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        Publish a batch of events, taking the writer lock once
+
+        Args:
+            events: Events to publish, in order
+
+        Returns:
+            List[bool]: Per event, whether it was written
+        """
+        results = self._write([self._encode(event) for event in events])
+        accepted = sum(results)
+        self._stats["published_count"] += accepted
+        self._stats["dropped_count"] += len(results) - accepted
+        if accepted:
+            self._wakeup.notify()
+        return results
+
+    async def _release_due(self, events: List[Event]):
+        """Timer wheel callback: publish events whose delivery time has come"""
+        await self.publish_many(events)
+
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        Publish an event every interval seconds (from this process)
+
+        Args:
+            event: Template event or a zero-argument callable returning the event
+            interval: Period in seconds
+            start_at: Unix time of the first publish (default now + interval)
+
+        Returns:
+            str: Schedule id
+        """
+        return self._timers.add_recurring(recurring_event_factory(event), interval, start_at)
+
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """
+        Cancel a recurring schedule
+
+        Args:
+            schedule_id: Schedule id
+
+        Returns:
+            bool: Whether the schedule existed
+        """
+        return self._timers.cancel(schedule_id)
+
+    # ==================== subscribe ====================
+
+    async def subscribe(
+        self,
+        event_type: str,
+        handler: Callable,
+        propagation_mode: str = "broadcast",
+        filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
+    ) -> str:
+        """
+        Subscribe to event (in this process)
+
+        Args:
+            event_type: event type
+            handler: Handler function
+            propagation_mode: propagation mode among this process's subscribers
+            filter_func: Filter function
+            concurrency: Concurrent handler calls (mailbox consumer tasks)
+            max_pending: Mailbox capacity
+            overflow_policy: Mailbox overflow policy (block/drop_oldest/drop_newest)
+            coalesce: Coalescing policy (latest/aggregate/sample), see events.coalesce
+            execution: Handler execution mode (inline/thread/process), see events.executors
+            on_result: Receives (event, handler return value) after each call
+
+        Returns:
+            str: Subscription id
+        """
+        subscription_id = f"{event_type}_{id(handler)}_{time.time()}"
+
+        subscription = {
+            "id": subscription_id,
+            "event_type": event_type,
+            "handler": handler,
+            "mode": propagation_mode,
+            "filter_func": filter_func,
+            "concurrency": concurrency,
+            "max_pending": max_pending,
+            "overflow_policy": overflow_policy,
+            "coalesce": coalesce,
+            "execution": execution,
+            "on_result": on_result,
+        }
+
+        self._dispatch.add(subscription)
+
+        return subscription_id
+
+    async def unsubscribe(self, subscription_id: str) -> bool:
+        """
+        Unsubscribe from event
+
+        Args:
+            subscription_id: Subscription id
+
+        Returns:
+            bool: Whether unsubscription was successful
+        """
+        return self._dispatch.remove(subscription_id) is not None
+
+    # ==================== lifecycle ====================
+
+    async def start(self):
+        """Attach the ring and start reading it"""
+        if self._running:
+            return
+
+        self._attach()
+        self._running = True
+        self._reader = asyncio.create_task(self._read_loop())
+        await self._timers.start()
+
+    async def stop(self):
+        """Stop reading after dispatching what was published so far (the segment stays)"""
+        if not self._running:
+            return
+
+        # Events not yet due stay in the timer wheel
+        await self._timers.stop()
+
+        timeout = 30  # seconds
+        start_time = time.time()
+        write_seq = _WRITE_SEQ.unpack_from(self._buffer, _WRITE_SEQ_OFFSET)[0]
+        while self._read_seq < write_seq and (time.time() - start_time) < timeout:
+            self._wakeup.notify()
+            await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(
+                self._dispatch.join(), timeout=max(timeout - (time.time() - start_time), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+        self._running = False
+        self._reader.cancel()
+        await asyncio.gather(self._reader, return_exceptions=True)
+        self._reader = None
+        await self._dispatch.close()
+        self._detach()
+
+    async def _read_loop(self):
+        """Reader task: dispatch ring events in order, polling with backoff while idle"""
+        idle_wait = self.poll_interval
+        while self._running:
+            try:
+                entries = self._read()
+                if not entries:
+                    if not await self._wakeup.wait(idle_wait):
+                        idle_wait = min(idle_wait * 2, self.max_poll_interval)
+                    continue
+
+                idle_wait = self.poll_interval
+                for event, queue_wait in entries:
+                    await self._dispatch.dispatch(event, queue_wait=queue_wait)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Shared memory bus reader failed: {e}")
+
+    async def get_stats(self) -> dict:
+        """
+        Get statistics
+
+        Returns:
+            dict: Statistics info
+        """
+        write_seq = (
+            _WRITE_SEQ.unpack_from(self._buffer, _WRITE_SEQ_OFFSET)[0] if self._buffer is not None else None
+        )
+        return {
+            **self._stats,
+            "name": self.name,
+            "slot_count": self.slot_count,
+            "slot_size": self.slot_size,
+            "write_seq": write_seq,
+            "read_lag": write_seq - self._read_seq if write_seq is not None else 0,
+            "scheduled_count": len(self._timers),
+            "subscription_count": len(self._dispatch),
+            "subscriptions": self._dispatch.get_subscription_stats(),
+            "latency": self._dispatch.get_latency_stats(),
+            "execution": self._dispatch.get_execution_stats(),
+            "running": self._running,
+        }
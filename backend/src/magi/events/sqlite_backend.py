@@ -4,12 +4,21 @@ message bus - SQLitebackend implementation
 """
 import asyncio
 import aiosqlite
-import json
+import functools
+import logging
 import time
-from typing import Callable, Dict, List, Optional
-from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from .backend import MessageBusBackend
+from .coalesce import CoalescePolicy
+from .codec import EventCodec, decode_event, get_codec
+from .dispatch import DispatchTable
 from .events import Event
+from .scheduler import TimerWheel, recurring_event_factory
+from .topics import TopicTrie, is_pattern
+from .wakeup import WorkerWakeup
+
+logger = logging.getLogger(__name__)
 
 
 class SQLiteMessageBackend(MessageBusBackend):
@@ -21,11 +30,86 @@ class SQLiteMessageBackend(MessageBusBackend):
     - Agent重启后can restore unprocessed events
     - supportpriorityqueue（order BY priority DESC, created_at asC）
     - Worker池concurrently process events
+    - at-least-once delivery: workers lease up to claim_batch_size events per
+      round-trip, ack them in one statement after handling, and events whose
+      lease expires (visibility_timeout) without an ack are delivered again;
+      leases of rows still queued in or running on this process's subscriber
+      mailboxes are renewed, so only rows of a stopped process expire
+    - background compaction: processed rows are archived (or deleted) in bounded
+      chunks every compaction_interval seconds, followed by an incremental vacuum
+      when the file is in incremental auto_vacuum mode (new files are; existing
+      ones opt in with enable_incremental_vacuum()); the claim index only covers
+      unprocessed rows
+    - delayed delivery: rows published with deliver_at are persisted and only
+      claimable once due; a timer wheel wakes idle workers at that moment
+      (rows scheduled by other processes are picked up by the fallback poll)
+    - replay: history() streams processed events (queue and archive) by time
+      range and type with a keyset cursor, replay() re-dispatches them to one
+      subscriber at full speed or paced; see also python -m magi.events.replay
 
     applicable scenarios：
     - local deployment
     - 需要persistence guarantee
     - single machine run
+
+    Persistent connection mode (persistent_connection=True):
+    - One long-lived connection in WAL mode instead of a connection per call
+    - Queue depth is tracked in memory instead of counted before each insert
+    - Concurrent publish() calls are group-committed: one transaction per
+      flush window of at most publish_batch_size events / publish_max_delay seconds
+    - publish_many() writes its batch directly in one executemany transaction
+    """
+
+    # Insert statement shared by the per-call and group-commit publish paths
+    _INSERT_SQL = """
+        INSERT INTO message_queue (
+            event_type, event_data, priority, source,
+            correlation_id, metadata, created_at, deliver_at, processed
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, false)
+    """
+
+    # Overflow: discard the N oldest unclaimed rows (scheduled rows are never dropped)
+    _DROP_OLDEST_SQL = """
+        DELETE FROM message_queue
+        WHERE id IN (
+            SELECT id FROM message_queue
+            WHERE processed = false AND lease_expires_at IS NULL AND deliver_at IS NULL
+            ORDER BY created_at ASC
+            LIMIT ?
+        )
+    """
+
+    # Atomic batch claim: lease up to N ready (or lease-expired) rows that are due,
+    # in one statement, so two workers never hold the same row at the same time
+    _CLAIM_SQL = """
+        UPDATE message_queue
+        SET lease_expires_at = ?, delivery_count = delivery_count + 1
+        WHERE id IN (
+            SELECT id FROM message_queue
+            WHERE processed = false
+              AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+              AND (deliver_at IS NULL OR deliver_at <= ?)
+            ORDER BY priority DESC, created_at ASC
+            LIMIT ?
+        )
+        RETURNING id, event_data, priority, created_at, delivery_count, deliver_at
+    """
+
+    # One keyset page of processed events: each table is read by its own index
+    # and limited before the merge, so a page costs O(page) however long the history
+    _HISTORY_SQL = """
+        SELECT id, event_type, event_data, created_at FROM (
+            SELECT id, event_type, event_data, created_at FROM message_archive
+            WHERE (created_at, id) > (?, ?) AND created_at < ?{type_filter}
+            ORDER BY created_at, id LIMIT ?
+        )
+        UNION ALL
+        SELECT id, event_type, event_data, created_at FROM (
+            SELECT id, event_type, event_data, created_at FROM message_queue
+            WHERE processed = true AND (created_at, id) > (?, ?) AND created_at < ?{type_filter}
+            ORDER BY created_at, id LIMIT ?
+        )
+        ORDER BY created_at, id LIMIT ?
     """
 
     def __init__(
@@ -34,6 +118,18 @@ class SQLiteMessageBackend(MessageBusBackend):
         max_queue_size: int = 1000,
         num_workers: int = 4,
         memory_cache_size: int = 100,
+        persistent_connection: bool = False,
+        publish_batch_size: int = 64,
+        publish_max_delay: float = 0.002,
+        poll_interval: float = 1.0,
+        claim_batch_size: int = 8,
+        visibility_timeout: float = 30.0,
+        compaction_interval: float = 60.0,
+        compaction_chunk_size: int = 500,
+        compaction_mode: str = "archive",
+        vacuum_pages: int = 256,
+        codec: Union[str, EventCodec] = "binary",
+        stop_timeout: float = 30.0,
     ):
         """
         initialize SQLite message backend
@@ -43,31 +139,91 @@ class SQLiteMessageBackend(MessageBusBackend):
             max_queue_size: queuemaximumlength
             num_workers: number of worker threads
             memory_cache_size: memory cache size (reduce database queries)
+            persistent_connection: keep one long-lived WAL connection and group-commit publishes
+            publish_batch_size: maximum events per group-commit transaction
+            publish_max_delay: maximum seconds a publish waits for its batch to fill
+            poll_interval: fallback poll period (seconds) for rows written by other processes
+            claim_batch_size: maximum events a worker leases per claim
+            visibility_timeout: lease duration (seconds) before an unacked event is redelivered
+            compaction_interval: seconds between compaction runs (0 disables the compactor)
+            compaction_chunk_size: processed rows moved per compaction transaction
+            compaction_mode: "archive" (move to message_archive) or "delete"
+            vacuum_pages: freelist pages released by incremental vacuum per compaction run
+            codec: event codec for event_data ("binary", "json" or an EventCodec);
+                rows written with any built-in codec stay readable
+            stop_timeout: seconds stop() waits for due events to be handled; handlers
+                still running then are cancelled and their events redelivered later
         """
         self.db_path = db_path
         self.max_queue_size = max_queue_size
         self.num_workers = num_workers
         self.memory_cache_size = memory_cache_size
-
-        # subscribeinfo
-        self._subscriptions: Dict[str, List[Dict]] = defaultdict(list)
-        self._subscription_index: Dict[str, Dict] = {}
-
-        # pending count
-        self._handler_pending: Dict[Callable, int] = defaultdict(int)
+        self.persistent_connection = persistent_connection
+        self.publish_batch_size = max(1, publish_batch_size)
+        self.publish_max_delay = max(0.0, publish_max_delay)
+        self.poll_interval = poll_interval
+        self.claim_batch_size = max(1, claim_batch_size)
+        self.visibility_timeout = visibility_timeout
+        self.compaction_interval = compaction_interval
+        self.compaction_chunk_size = max(1, compaction_chunk_size)
+        self.compaction_mode = compaction_mode
+        self.vacuum_pages = vacuum_pages
+        self._codec = get_codec(codec)
+        self.stop_timeout = stop_timeout
+
+        # background compaction
+        self._compactor_task: Optional[asyncio.Task] = None
+
+        # lease renewal: {row_id: lease_expires_at} for rows claimed but not yet acked
+        self._leased: Dict[int, float] = {}
+        self._lease_task: Optional[asyncio.Task] = None
+        self._claim_latency_ms: Optional[float] = None  # EWMA of claim round-trips
+        self._last_compaction: Dict = {}
+        self._table_rows: Optional[int] = None
+        self._archive_rows: Optional[int] = None
+        self._queue_table_bytes: Optional[int] = None
+        self._incremental_vacuum = False
+
+        # persistent connection state (only used when persistent_connection=True)
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        self._queue_depth = 0
+        self._publish_buffer: List[tuple] = []  # [(row, future)]
+        self._publish_pending = asyncio.Event()
+        self._publish_batch_full = asyncio.Event()
+        self._publish_closing = False
+        self._flusher_task: Optional[asyncio.Task] = None
 
         # worker management
         self._workers: List[asyncio.Task] = []
         self._running = False
 
+        # same-process publishes wake idle workers directly; polling only covers other processes
+        self._wakeup = WorkerWakeup()
+
+        # wakes workers when scheduled rows fall due; also runs recurring schedules
+        self._timers = TimerWheel(self._release_due)
+
         # statisticsinfo
         self._stats = {
             "published_count": 0,
             "dropped_count": 0,
             "processed_count": 0,
             "error_count": 0,
+            "publish_batches": 0,
+            "claim_batches": 0,
+            "acked_count": 0,
+            "redelivered_count": 0,
+            "lease_renewals": 0,
+            "compacted_rows": 0,
+            "compaction_runs": 0,
+            "replayed_count": 0,
         }
 
+        # subscribeinfo, compiled per event type
+        self._dispatch = DispatchTable(self._stats)
+        self._completed_rows: List[int] = []  # handled rows waiting for the next ack
+
     @property
     def _expanded_db_path(self) -> str:
         """get expanded database path (process ~)"""
@@ -89,6 +245,22 @@ class SQLiteMessageBackend(MessageBusBackend):
             """)
             table_exists = await cursor.fetchone()
 
+            # incremental vacuum lets the compactor hand freed pages back to the filesystem.
+            # Only new files are switched here: existing ones (possibly shared with the
+            # L1 event_store) need a full VACUUM, see enable_incremental_vacuum()
+            cursor = await db.execute("PRAGMA auto_vacuum")
+            self._incremental_vacuum = (await cursor.fetchone())[0] == 2
+            if not self._incremental_vacuum:
+                cursor = await db.execute("PRAGMA page_count")
+                if (await cursor.fetchone())[0] == 0:
+                    await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    self._incremental_vacuum = True
+                else:
+                    logger.info(
+                        "Message queue database is not in incremental auto_vacuum mode; "
+                        "compaction frees pages for reuse but does not shrink the file"
+                    )
+
             if table_exists:
                 # check if has processed column
                 cursor = await db.execute("PRAGMA table_info(message_queue)")
@@ -98,8 +270,6 @@ class SQLiteMessageBackend(MessageBusBackend):
                 # if missing required column, rebuild table
                 required_columns = {'id', 'event_type', 'event_data', 'priority', 'source', 'correlation_id', 'metadata', 'created_at', 'processed'}
                 if not required_columns.issubset(set(column_names)):
-                    import logging
-                    logger = logging.getLogger(__name__)
                     logger.warning(f"Message queue table schema incompatible, recreating... Existing columns: {column_names}")
                     await db.execute("DROP table IF EXISTS message_queue")
                     await db.execute("DROP index IF EXISTS idx_message_queue_processed_priority")
@@ -114,79 +284,400 @@ class SQLiteMessageBackend(MessageBusBackend):
                     correlation_id TEXT NOT NULL,
                     metadata TEXT,
                     created_at real NOT NULL,
-                    processed boolEAN DEFAULT false
+                    processed boolEAN DEFAULT false,
+                    lease_expires_at REAL,
+                    delivery_count INTEGER NOT NULL DEFAULT 0,
+                    deliver_at REAL
                 )
             """)
 
-            # createindexoptimizequery
+            # lease and schedule columns were added later: migrate older tables in place
+            cursor = await db.execute("PRAGMA table_info(message_queue)")
+            column_names = {col[1] for col in await cursor.fetchall()}
+            if "lease_expires_at" not in column_names:
+                await db.execute("ALTER TABLE message_queue ADD COLUMN lease_expires_at REAL")
+            if "delivery_count" not in column_names:
+                await db.execute(
+                    "ALTER TABLE message_queue ADD COLUMN delivery_count INTEGER NOT NULL DEFAULT 0"
+                )
+            if "deliver_at" not in column_names:
+                await db.execute("ALTER TABLE message_queue ADD COLUMN deliver_at REAL")
+
+            # claim index only covers unprocessed rows, so it stays small however
+            # many processed rows are waiting for compaction
+            await db.execute("DROP INDEX IF EXISTS idx_message_queue_processed_priority")
             await db.execute("""
-                create index IF NOT EXISTS idx_message_queue_processed_priority
-                ON message_queue(processed, priority DESC, created_at asC)
+                CREATE INDEX IF NOT EXISTS idx_message_queue_pending
+                ON message_queue(priority DESC, created_at ASC)
+                WHERE processed = false
+            """)
+
+            # compacted processed rows (compaction_mode="archive")
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS message_archive (
+                    id INTEGER PRIMARY KEY,
+                    event_type TEXT NOT NULL,
+                    event_data TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    correlation_id TEXT NOT NULL,
+                    metadata TEXT,
+                    created_at REAL NOT NULL,
+                    delivery_count INTEGER NOT NULL DEFAULT 0,
+                    archived_at REAL NOT NULL
+                )
+            """)
+
+            # replay reads processed rows of both tables in (created_at, id) order
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_message_queue_history
+                ON message_queue(created_at)
+                WHERE processed = true
+            """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_message_archive_history
+                ON message_archive(created_at)
             """)
 
             await db.commit()
 
-    async def publish(self, Event: Event) -> bool:
+    async def publish(self, event: Event, deliver_at: Optional[float] = None) -> bool:
         """
         publish event to SQLite database
 
         Args:
             event: Event to publish
+            deliver_at: Unix time before which the row is not claimed
 
         Returns:
             bool: is notsuccessrelease
         """
+        # encode before buffering, so an unencodable event only fails its own publish
+        row = self._encode_row(event, deliver_at)
+        if row is None:
+            return False
+        if self._db is not None:
+            return await self._publish_grouped(row)
+
+        return (await self._write_rows_oneshot([row]))[0]
+
+    async def publish_many(self, events: List[Event]) -> List[bool]:
+        """
+        publish a batch of events with one executemany transaction
+
+        Overflow drops the oldest unclaimed rows; when the batch alone is
+        larger than max_queue_size its own oldest events are the ones dropped.
+
+        Args:
+            events: Events to publish, in order
+
+        Returns:
+            List[bool]: Per event, whether it was accepted
+        """
+        if not events:
+            return []
+
+        skipped = max(0, len(events) - self.max_queue_size)
+        if skipped:
+            self._stats["dropped_count"] += skipped
+        batch = events[skipped:]
+
+        rows = [self._encode_row(event) for event in batch]
+        encoded = [row for row in rows if row is not None]
+        if not encoded:
+            written = []
+        elif self._db is not None:
+            written = [False] * len(encoded) if self._publish_closing else await self._write_rows(encoded)
+        else:
+            written = await self._write_rows_oneshot(encoded)
+
+        results = iter(written)
+        return [False] * skipped + [row is not None and next(results) for row in rows]
+
+    async def _make_room(self, db, depth: int, incoming: int) -> Tuple[int, int]:
+        """
+        drop the oldest unclaimed rows so incoming rows fit into max_queue_size
+
+        Leased and scheduled rows are never dropped; when they alone keep the
+        queue full, the newest incoming rows that still do not fit are rejected.
+        Both dropped and rejected rows count in dropped_count.
+
+        Args:
+            db: connection of the open write transaction
+            depth: unprocessed rows in the queue
+            incoming: rows about to be inserted
+
+        Returns:
+            (number of incoming rows to insert, number of queued rows dropped)
+        """
+        overflow = depth + incoming - self.max_queue_size
+        if overflow <= 0:
+            return incoming, 0
+
+        cursor = await db.execute(self._DROP_OLDEST_SQL, (overflow,))
+        dropped = max(cursor.rowcount, 0)
+        rejected = min(overflow - dropped, incoming)
+        self._stats["dropped_count"] += dropped + rejected
+        if rejected:
+            logger.warning(
+                f"Message queue full of claimed/scheduled events, rejected {rejected} new events"
+            )
+        return incoming - rejected, dropped
+
+    async def _write_rows_oneshot(self, rows: List[tuple]) -> List[bool]:
+        """
+        insert rows on a short-lived connection in a single transaction
+
+        Args:
+            rows: message_queue row parameters (see _event_row)
+
+        Returns:
+            List[bool]: per row, whether it was committed (False for all on error,
+                for the newest rows when the queue is full, see _make_room)
+        """
         try:
             async with aiosqlite.connect(self._expanded_db_path) as db:
-                # checkqueuelength
                 cursor = await db.execute(
                     "SELECT COUNT(*) FROM message_queue WHERE processed = false",
                 )
                 count = (await cursor.fetchone())[0]
 
-                if count >= self.max_queue_size:
-                    # queue is full, discard oldest
-                    await db.execute("""
-                        delete FROM message_queue
-                        WHERE id IN (
-                            SELECT id FROM message_queue
-                            WHERE processed = false
-                            order BY created_at asC
-                            LIMIT 1
-                        )
-                    """)
-                    self._stats["dropped_count"] += 1
-
-                # insertnewevent
-                await db.execute("""
-                    INSERT intO message_queue (
-                        event_type, event_data, priority, source,
-                        correlation_id, metadata, created_at, processed
-                    ) valueS (?, ?, ?, ?, ?, ?, ?, false)
-                """, (
-                    event.type,
-                    json.dumps(event.to_dict()),
-                    event.level.value,
-                    event.source,
-                    event.correlation_id,
-                    json.dumps(event.metadata),
-                    event.timestamp,
-                ))
-
+                accepted, _ = await self._make_room(db, count, len(rows))
+                await db.executemany(self._INSERT_SQL, rows[:accepted])
                 await db.commit()
-                self._stats["published_count"] += 1
-                return True
 
+        except Exception:
+            self._stats["error_count"] += len(rows)
+            return [False] * len(rows)
+
+        self._stats["published_count"] += accepted
+        self._rows_written(rows[:accepted])
+        return [True] * accepted + [False] * (len(rows) - accepted)
+
+    def _event_row(self, event: Event, deliver_at: Optional[float] = None) -> tuple:
+        """build the message_queue row parameters for an event (metadata travels inside event_data)"""
+        if deliver_at is not None and deliver_at <= time.time():
+            deliver_at = None
+        return (
+            event.type,
+            self._codec.encode(event),
+            event.level.value,
+            event.source,
+            event.correlation_id,
+            None,
+            event.timestamp,
+            deliver_at,
+        )
+
+    def _encode_row(self, event: Event, deliver_at: Optional[float] = None) -> Optional[tuple]:
+        """_event_row, counting and logging events the codec cannot encode (None)"""
+        try:
+            return self._event_row(event, deliver_at)
         except Exception as e:
             self._stats["error_count"] += 1
+            logger.error(f"Cannot encode {event.type} event for the message queue: {e}")
+            return None
+
+    def _rows_written(self, rows: List[tuple]):
+        """wake workers for committed rows that are due, arm timers for the others"""
+        ready = 0
+        for row in rows:
+            if row[7] is None:
+                ready += 1
+            else:
+                self._timers.add(None, row[7])
+        if ready:
+            self._wakeup.notify(ready)
+
+    async def _release_due(self, items: List[Optional[Event]]):
+        """
+        timer wheel callback
+
+        Args:
+            items: None for each scheduled row that fell due, Events produced by recurring schedules
+        """
+        events = [item for item in items if item is not None]
+        if len(events) < len(items):
+            self._wakeup.notify(len(items) - len(events))
+        if events:
+            await self.publish_many(events)
+
+    async def _load_scheduled(self):
+        """arm timers for scheduled rows persisted before this start"""
+        async with self._connection() as db:
+            cursor = await db.execute(
+                "SELECT deliver_at FROM message_queue WHERE processed = false AND deliver_at > ?",
+                (time.time(),),
+            )
+            for (deliver_at,) in await cursor.fetchall():
+                self._timers.add(None, deliver_at)
+
+    async def schedule(
+        self,
+        event: Union[Event, Callable[[], Event]],
+        interval: float,
+        start_at: Optional[float] = None,
+    ) -> str:
+        """
+        publish an event every interval seconds (the schedule itself is not persisted)
+
+        Args:
+            event: Template event or a zero-argument callable returning the event
+            interval: Period in seconds
+            start_at: Unix time of the first publish (default now + interval)
+
+        Returns:
+            str: Schedule id
+        """
+        return self._timers.add_recurring(recurring_event_factory(event), interval, start_at)
+
+    async def cancel_schedule(self, schedule_id: str) -> bool:
+        """cancel a recurring schedule"""
+        return self._timers.cancel(schedule_id)
+
+    # ==================== persistent connection / group commit ====================
+
+    async def _open_connection(self):
+        """open the long-lived WAL connection and load the current queue depth"""
+        self._db = await aiosqlite.connect(self._expanded_db_path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+
+        cursor = await self._db.execute(
+            "SELECT COUNT(*) FROM message_queue WHERE processed = false"
+        )
+        self._queue_depth = (await cursor.fetchone())[0]
+
+        self._publish_closing = False
+        self._flusher_task = asyncio.create_task(self._publish_flusher())
+
+    async def _stop_flusher(self):
+        """commit everything still in the publish buffer and stop the flusher"""
+        self._publish_closing = True
+        self._publish_pending.set()
+        if self._flusher_task:
+            await self._flusher_task
+            self._flusher_task = None
+
+    async def _close_connection(self):
+        """flush buffered publishes and close the long-lived connection"""
+        await self._stop_flusher()
+        await self._db.close()
+        self._db = None
+
+    async def _publish_grouped(self, row: tuple) -> bool:
+        """
+        buffer a row for the next group commit and wait for its result
+
+        Args:
+            row: message_queue row parameters of the event to publish
+
+        Returns:
+            bool: whether the event was committed
+        """
+        if self._publish_closing:
             return False
 
+        future = asyncio.get_running_loop().create_future()
+        self._publish_buffer.append((row, future))
+        self._publish_pending.set()
+        if len(self._publish_buffer) >= self.publish_batch_size:
+            self._publish_batch_full.set()
+
+        return await future
+
+    async def _publish_flusher(self):
+        """background task: commit buffered publishes, one transaction per flush window"""
+        while True:
+            await self._publish_pending.wait()
+
+            # give concurrent publishers a short window to join this batch
+            if not self._publish_closing and self.publish_max_delay > 0:
+                try:
+                    await asyncio.wait_for(
+                        self._publish_batch_full.wait(), timeout=self.publish_max_delay
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._publish_buffer[:self.publish_batch_size]
+            del self._publish_buffer[:self.publish_batch_size]
+
+            if len(self._publish_buffer) < self.publish_batch_size:
+                self._publish_batch_full.clear()
+            if not self._publish_buffer and not self._publish_closing:
+                self._publish_pending.clear()
+
+            if batch:
+                try:
+                    await self._flush_publish_batch(batch)
+                except Exception as e:
+                    # never let one batch kill the flusher: fail its publishers, keep going
+                    self._stats["error_count"] += len(batch)
+                    logger.error(f"Message queue group commit failed: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(False)
+            elif self._publish_closing:
+                return
+
+    async def _flush_publish_batch(self, batch: List[tuple]):
+        """
+        write one batch of buffered events in a single transaction
+
+        Args:
+            batch: [(row, future)] taken from the publish buffer
+        """
+        written = await self._write_rows([row for row, _ in batch])
+
+        for (_, future), success in zip(batch, written):
+            if not future.done():
+                future.set_result(success)
+
+    async def _write_rows(self, rows: List[tuple]) -> List[bool]:
+        """
+        insert rows on the long-lived connection in a single transaction
+
+        Args:
+            rows: message_queue row parameters (see _event_row)
+
+        Returns:
+            List[bool]: per row, whether it was committed (False for all on error,
+                for the newest rows when the queue is full, see _make_room)
+        """
+        try:
+            async with self._db_lock:
+                # queue is full, discard oldest (depth is tracked in memory)
+                accepted, dropped = await self._make_room(self._db, self._queue_depth, len(rows))
+                await self._db.executemany(self._INSERT_SQL, rows[:accepted])
+                await self._db.commit()
+
+        except Exception:
+            self._stats["error_count"] += len(rows)
+            try:
+                await self._db.rollback()
+            except Exception:
+                pass
+            return [False] * len(rows)
+
+        self._queue_depth += accepted - dropped
+        self._stats["published_count"] += accepted
+        self._stats["publish_batches"] += 1
+        self._rows_written(rows[:accepted])
+        return [True] * accepted + [False] * (len(rows) - accepted)
+
     async def subscribe(
         self,
         event_type: str,
         handler: Callable,
         propagation_mode: str = "broadcast",
         filter_func: Optional[Callable[[Event], bool]] = None,
+        concurrency: int = 1,
+        max_pending: int = 1000,
+        overflow_policy: str = "block",
+        coalesce: Optional[CoalescePolicy] = None,
+        execution: str = "inline",
+        on_result: Optional[Callable[[Event, Any], Any]] = None,
     ) -> str:
         """subscribeevent"""
         subscription_id = f"{event_type}_{id(handler)}_{time.time()}"
@@ -197,27 +688,21 @@ class SQLiteMessageBackend(MessageBusBackend):
             "handler": handler,
             "mode": propagation_mode,
             "filter_func": filter_func,
+            "concurrency": concurrency,
+            "max_pending": max_pending,
+            "overflow_policy": overflow_policy,
+            "coalesce": coalesce,
+            "execution": execution,
+            "on_result": on_result,
         }
 
-        self._subscriptions[event_type].append(subscription)
-        self._subscription_index[subscription_id] = subscription
+        self._dispatch.add(subscription)
 
         return subscription_id
 
     async def unsubscribe(self, subscription_id: str) -> bool:
         """cancelsubscribe"""
-        if subscription_id not in self._subscription_index:
-            return False
-
-        subscription = self._subscription_index[subscription_id]
-        event_type = subscription["event_type"]
-
-        self._subscriptions[event_type] = [
-            s for s in self._subscriptions[event_type] if s["id"] != subscription_id
-        ]
-
-        del self._subscription_index[subscription_id]
-        return True
+        return self._dispatch.remove(subscription_id) is not None
 
     async def start(self):
         """start message bus"""
@@ -227,142 +712,567 @@ class SQLiteMessageBackend(MessageBusBackend):
         # initializedatabase
         await self._init_db()
 
+        if self.persistent_connection:
+            await self._open_connection()
+
+        await self._load_scheduled()
+
         self._running = True
         self._workers = [
             asyncio.create_task(self._worker(i)) for i in range(self.num_workers)
         ]
+        await self._timers.start()
+        self._lease_task = asyncio.create_task(self._lease_keeper())
+
+        if self.compaction_interval > 0:
+            self._compactor_task = asyncio.create_task(self._compactor())
 
     async def stop(self):
         """stop message bus"""
         if not self._running:
             return
 
-        self._running = False
+        # scheduled rows stay in the table and are picked up again after restart
+        await self._timers.stop()
 
-        # wait for pending to complete
-        timeout = 30
+        # commit events still waiting in the publish buffer
+        if self._db is not None:
+            await self._stop_flusher()
+
+        # wait for due events to complete (workers keep running while the queue drains)
+        timeout = self.stop_timeout
         start_time = time.time()
 
         while (time.time() - start_time) < timeout:
-            async with aiosqlite.connect(self._expanded_db_path) as db:
-                cursor = await db.execute(
-                    "SELECT COUNT(*) FROM message_queue WHERE processed = false"
-                )
-                count = (await cursor.fetchone())[0]
-
-                if count == 0:
-                    break
+            if await self._count_due() == 0:
+                break
 
             await asyncio.sleep(0.1)
 
+        try:
+            await asyncio.wait_for(
+                self._dispatch.join(), timeout=max(timeout - (time.time() - start_time), 0)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+        self._running = False
+
         # cancelworker
         for worker in self._workers:
             worker.cancel()
 
         await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._dispatch.close()
+        await self._ack_completed()
+
+        self._lease_task.cancel()
+        await asyncio.gather(self._lease_task, return_exceptions=True)
+        self._lease_task = None
+        self._leased.clear()  # unacked rows are redelivered once their lease expires
+
+        if self._compactor_task:
+            self._compactor_task.cancel()
+            await asyncio.gather(self._compactor_task, return_exceptions=True)
+            self._compactor_task = None
+
+        if self._db is not None:
+            await self._close_connection()
+
+    async def _count_unprocessed(self) -> int:
+        """number of unprocessed events (in-memory depth in persistent connection mode)"""
+        if self._db is not None:
+            return self._queue_depth
+
+        async with aiosqlite.connect(self._expanded_db_path) as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM message_queue WHERE processed = false"
+            )
+            return (await cursor.fetchone())[0]
+
+    async def _count_due(self) -> int:
+        """number of unprocessed events that are due (scheduled rows are not waited for)"""
+        async with self._connection() as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM message_queue "
+                "WHERE processed = false AND (deliver_at IS NULL OR deliver_at <= ?)",
+                (time.time(),),
+            )
+            return (await cursor.fetchone())[0]
 
     async def _worker(self, worker_id: int):
         """worker thread"""
         while self._running:
             try:
-                # atomically get and mark unprocessed event from database
-                event = await self._get_next_event()
+                # ack rows whose subscribers finished since the last round, in one statement
+                await self._ack_completed()
 
-                if event is None:
-                    await asyncio.sleep(0.1)
+                # lease a batch of unprocessed events from database
+                claimed = await self._claim_events()
+
+                if not claimed:
+                    # wait for a same-process publish or completed handlers,
+                    # fall back to polling after poll_interval
+                    await self._wakeup.wait(timeout=self.poll_interval)
                     continue
 
-                # processevent
-                await self._process_event(event)
+                for _ in claimed:
+                    self._wakeup.consume()
+
+                # hand events to subscriber mailboxes; rows are acked once handled
+                for row_id, event in claimed:
+                    await self._process_event(
+                        event, on_complete=functools.partial(self._complete_row, row_id)
+                    )
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self._stats["error_count"] += 1
 
-    async def _get_next_event(self) -> Optional[Event]:
-        """get from database and atomically mark next unprocessed event (by priority)"""
-        async with aiosqlite.connect(self._expanded_db_path) as db:
-            # atomic operation: SELECT + update in same transaction, prevent multiple workers from processing same event
-            cursor = await db.execute("""
-                update message_queue set processed = true
-                WHERE id = (
-                    SELECT id FROM message_queue
-                    WHERE processed = false
-                    order BY priority DESC, created_at asC
-                    LIMIT 1
+    def _complete_row(self, row_id: int):
+        """mark a row handled by all its subscribers; a worker acks it next round"""
+        self._completed_rows.append(row_id)
+        if len(self._completed_rows) == 1:
+            self._wakeup.notify()
+
+    async def _ack_completed(self):
+        """ack all rows completed so far"""
+        if self._completed_rows:
+            row_ids, self._completed_rows = self._completed_rows, []
+            await self._ack_events(row_ids)
+            for row_id in row_ids:
+                self._leased.pop(row_id, None)
+
+    async def _lease_keeper(self):
+        """background task: renew leases of claimed rows this process has not acked yet"""
+        interval = max(self.visibility_timeout / 3, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._renew_leases()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Message queue lease renewal failed: {e}")
+
+    async def _renew_leases(self):
+        """extend leases expiring within half a visibility_timeout, in one statement per 500 rows"""
+        now = time.time()
+        row_ids = [
+            row_id for row_id, expires in self._leased.items()
+            if expires - now < self.visibility_timeout / 2
+        ]
+        if not row_ids:
+            return
+
+        expires = now + self.visibility_timeout
+        for start in range(0, len(row_ids), 500):
+            chunk = row_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            async with self._connection() as db:
+                await db.execute(
+                    f"UPDATE message_queue SET lease_expires_at = ? "
+                    f"WHERE id IN ({placeholders}) AND processed = false",
+                    (expires, *chunk),
                 )
-                returnING event_data
-            """)
-            row = await cursor.fetchone()
+                await db.commit()
+
+        for row_id in row_ids:
+            if row_id in self._leased:
+                self._leased[row_id] = expires
+        self._stats["lease_renewals"] += len(row_ids)
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """the long-lived connection (serialized by the lock) or a per-call connection"""
+        if self._db is not None:
+            async with self._db_lock:
+                yield self._db
+        else:
+            async with aiosqlite.connect(self._expanded_db_path) as db:
+                yield db
+
+    async def _claim_events(self) -> List[Tuple[int, Event]]:
+        """
+        lease up to claim_batch_size unprocessed events (by priority)
+
+        Rows whose lease expired without an ack are claimed again.
+
+        Returns:
+            List[Tuple[int, Event]]: (row id, event) in priority order
+        """
+        now = time.time()
+        async with self._connection() as db:
+            started = time.perf_counter()
+            cursor = await db.execute(
+                self._CLAIM_SQL,
+                (now + self.visibility_timeout, now, now, self.claim_batch_size),
+            )
+            rows = await cursor.fetchall()
             await db.commit()
+            self._record_claim_latency((time.perf_counter() - started) * 1000)
 
-            if not row:
-                return None
+        if not rows:
+            return []
 
-            event_data = json.loads(row[0])
-            return event.from_dict(event_data)
+        # RETURNING does not preserve the subquery order
+        rows.sort(key=lambda row: (-row[2], row[3]))
 
-    async def _process_event(self, Event: Event):
-        """processevent"""
-        subscriptions = self._subscriptions.get(event.type, [])
+        self._stats["claim_batches"] += 1
+        self._stats["redelivered_count"] += sum(1 for row in rows if row[4] > 1)
+        for row in rows:
+            self._leased[row[0]] = now + self.visibility_timeout
 
-        if not subscriptions:
-            return
+        claimed = []
+        for row in rows:
+            event = decode_event(row[1])
+            # queued since the row was written (created_at is the event timestamp) or fell due
+            self._dispatch.record_queue_wait(event.type, now - max(row[3], row[5] or 0.0))
+            claimed.append((row[0], event))
+        return claimed
 
-        broadcast_subscriptions = [s for s in subscriptions if s["mode"] == "broadcast"]
-        competing_subscriptions = [s for s in subscriptions if s["mode"] == "competing"]
+    async def _ack_events(self, row_ids: List[int]):
+        """
+        mark handled events as processed in one statement
 
-        # broadcast pattern
-        for subscription in broadcast_subscriptions:
-            await self._handle_event(subscription, event)
+        Args:
+            row_ids: message_queue ids of handled events
+        """
+        if not row_ids:
+            return
 
-        # competing pattern
-        if competing_subscriptions:
-            subscription = min(
-                competing_subscriptions, key=lambda s: self._handler_pending[s["handler"]]
+        placeholders = ",".join("?" * len(row_ids))
+        async with self._connection() as db:
+            cursor = await db.execute(
+                f"UPDATE message_queue SET processed = true, lease_expires_at = NULL "
+                f"WHERE id IN ({placeholders}) AND processed = false",
+                row_ids,
             )
-            await self._handle_event(subscription, event)
+            await db.commit()
+            acked = max(cursor.rowcount, 0)
+
+        self._stats["acked_count"] += acked
+        if self._db is not None:
+            self._queue_depth = max(0, self._queue_depth - acked)
+
+    def _record_claim_latency(self, latency_ms: float):
+        """fold one claim round-trip into the claim latency EWMA"""
+        if self._claim_latency_ms is None:
+            self._claim_latency_ms = latency_ms
+        else:
+            self._claim_latency_ms += 0.1 * (latency_ms - self._claim_latency_ms)
+
+    # ==================== background compaction ====================
 
-    async def _handle_event(self, subscription: Dict, Event: Event):
-        """call handler to process event"""
-        if subscription["filter_func"]:
+    async def _compactor(self):
+        """background task: compact processed rows every compaction_interval seconds"""
+        while True:
+            await asyncio.sleep(self.compaction_interval)
             try:
-                if not subscription["filter_func"](event):
-                    return
+                await self.compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["error_count"] += 1
+                logger.error(f"Message queue compaction failed: {e}")
+
+    async def compact(self) -> int:
+        """
+        archive or delete processed rows in bounded chunks, then run an incremental vacuum
+
+        Each chunk is its own short transaction, so workers can claim and ack
+        between chunks.
+
+        Returns:
+            int: number of rows removed from message_queue
+        """
+        started = time.time()
+        probe_before = await self._probe_claim_latency()
+
+        compacted = 0
+        while True:
+            moved = await self._compact_chunk()
+            compacted += moved
+            if moved < self.compaction_chunk_size:
+                break
+            await asyncio.sleep(0)  # let claims and acks interleave
+
+        async with self._connection() as db:
+            if compacted and self.vacuum_pages > 0 and self._incremental_vacuum:
+                await db.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            cursor = await db.execute("SELECT COUNT(*) FROM message_queue")
+            self._table_rows = (await cursor.fetchone())[0]
+            cursor = await db.execute("SELECT COUNT(*) FROM message_archive")
+            self._archive_rows = (await cursor.fetchone())[0]
+            try:
+                # pages of the queue table and its indexes (dbstat is optional in SQLite builds)
+                cursor = await db.execute(
+                    "SELECT SUM(pgsize) FROM dbstat "
+                    "WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = 'message_queue')"
+                )
+                self._queue_table_bytes = (await cursor.fetchone())[0]
             except Exception:
-                pass
+                self._queue_table_bytes = None
+
+        probe_after = await self._probe_claim_latency()
+
+        self._stats["compacted_rows"] += compacted
+        self._stats["compaction_runs"] += 1
+        self._last_compaction = {
+            "at": started,
+            "rows": compacted,
+            "duration_ms": (time.time() - started) * 1000,
+            "claim_latency_before_ms": probe_before,
+            "claim_latency_after_ms": probe_after,
+        }
+        if compacted:
+            logger.debug(f"Message queue compacted | rows: {compacted} | mode: {self.compaction_mode}")
+
+        return compacted
+
+    async def enable_incremental_vacuum(self):
+        """
+        Switch an existing database file to incremental auto_vacuum (maintenance step)
 
-        handler = subscription["handler"]
-        self._handler_pending[handler] += 1
+        Runs a full VACUUM, which rewrites and locks the whole file, including
+        any other tables stored in it. Run it during maintenance, not on the
+        startup path of a live deployment. New database files get this mode
+        automatically.
+        """
+        async with self._connection() as db:
+            await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            logger.info("Converting message queue database to incremental auto_vacuum")
+            await db.execute("VACUUM")
+        self._incremental_vacuum = True
+
+    async def _compact_chunk(self) -> int:
+        """move (or delete) one chunk of processed rows in a single transaction"""
+        async with self._connection() as db:
+            try:
+                cursor = await db.execute(
+                    "SELECT id FROM message_queue WHERE processed = true ORDER BY id LIMIT ?",
+                    (self.compaction_chunk_size,),
+                )
+                row_ids = [row[0] for row in await cursor.fetchall()]
+                if not row_ids:
+                    return 0
+
+                placeholders = ",".join("?" * len(row_ids))
+                if self.compaction_mode == "archive":
+                    await db.execute(f"""
+                        INSERT OR REPLACE INTO message_archive (
+                            id, event_type, event_data, priority, source,
+                            correlation_id, metadata, created_at, delivery_count, archived_at
+                        )
+                        SELECT id, event_type, event_data, priority, source,
+                               correlation_id, metadata, created_at, delivery_count, ?
+                        FROM message_queue WHERE id IN ({placeholders})
+                    """, (time.time(), *row_ids))
+                await db.execute(
+                    f"DELETE FROM message_queue WHERE id IN ({placeholders})", row_ids
+                )
+                await db.commit()
+                return len(row_ids)
+
+            except BaseException:
+                # never leave half a chunk in the shared connection's transaction
+                await db.rollback()
+                raise
+
+    async def _probe_claim_latency(self) -> float:
+        """time the read side of a claim (pending index scan), in milliseconds"""
+        now = time.time()
+        async with self._connection() as db:
+            started = time.perf_counter()
+            cursor = await db.execute("""
+                SELECT id FROM message_queue
+                WHERE processed = false
+                  AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+                  AND (deliver_at IS NULL OR deliver_at <= ?)
+                ORDER BY priority DESC, created_at ASC
+                LIMIT ?
+            """, (now, now, self.claim_batch_size))
+            await cursor.fetchall()
+            return (time.perf_counter() - started) * 1000
+
+    async def _storage_stats(self) -> dict:
+        """
+        database file size and reclaimable space (cheap PRAGMA reads)
 
+        These cover the whole file, which may also hold other tables (e.g. the
+        L1 event_store); queue_table_bytes (measured by compact()) covers the queue only.
+        """
         try:
-            if asyncio.iscoroutinefunction(handler):
-                await handler(event)
+            async with self._connection() as db:
+                values = []
+                for pragma in ("page_size", "page_count", "freelist_count"):
+                    cursor = await db.execute(f"PRAGMA {pragma}")
+                    values.append((await cursor.fetchone())[0])
+        except Exception:
+            return {}
+
+        page_size, page_count, freelist_count = values
+        return {
+            "db_file_bytes": page_size * page_count,
+            "db_file_freelist_bytes": page_size * freelist_count,
+            "incremental_vacuum": self._incremental_vacuum,
+        }
+
+    # ==================== replay ====================
+
+    async def history(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        event_types: Optional[List[str]] = None,
+        after: Optional[Tuple[float, int]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Tuple[Tuple[float, int], Event]]:
+        """
+        stream processed events (message_queue and message_archive) in publish order
+
+        Rows are read in keyset pages of batch_size on a separate read
+        connection, so memory stays bounded and no read transaction is held
+        between pages. Rows deleted by compaction_mode="delete" are gone.
+
+        Args:
+            since: Unix time of the first event (inclusive, default the beginning)
+            until: Unix time to stop at (exclusive, default no limit)
+            event_types: Exact event types or wildcard patterns (default all)
+            after: Resume after this cursor (a cursor yielded earlier); overrides since
+            batch_size: Rows per page
+
+        Yields:
+            ((created_at, id) cursor, event)
+        """
+        exact, patterns = [], TopicTrie()
+        for event_type in event_types or ():
+            if is_pattern(event_type):
+                patterns.add(event_type, event_type)
             else:
-                handler(event)
+                exact.append(event_type)
 
-            self._stats["processed_count"] += 1
+        type_filter, type_args = "", []
+        if exact and not len(patterns):
+            type_filter = f" AND event_type IN ({','.join('?' * len(exact))})"
+            type_args = exact
+        exact_types = set(exact)
 
-        except Exception:
-            self._stats["error_count"] += 1
+        cursor_position = after if after is not None else (since if since is not None else float("-inf"), -1)
+        until = until if until is not None else float("inf")
+        sql = self._HISTORY_SQL.format(type_filter=type_filter)
 
-        finally:
-            self._handler_pending[handler] -= 1
+        async with aiosqlite.connect(self._expanded_db_path) as db:
+            while True:
+                bound = (*cursor_position, until, *type_args, batch_size)
+                db_cursor = await db.execute(sql, (*bound, *bound, batch_size))
+                rows = await db_cursor.fetchall()
+                for row_id, event_type, event_data, created_at in rows:
+                    cursor_position = (created_at, row_id)
+                    if len(patterns) and event_type not in exact_types and not patterns.match(event_type):
+                        continue
+                    yield cursor_position, decode_event(event_data)
+                if len(rows) < batch_size:
+                    return
+
+    async def replay(
+        self,
+        target: Union[str, Callable[[Event], Any]],
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        event_types: Optional[List[str]] = None,
+        after: Optional[Tuple[float, int]] = None,
+        speed: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        re-dispatch processed events to one subscriber
+
+        Replayed events are not written to the queue again and reach nobody
+        but the target.
+
+        Args:
+            target: Subscription id (delivered through its mailbox, filter and
+                execution mode) or a handler (sync or async) called directly
+            since: Unix time of the first event (inclusive)
+            until: Unix time to stop at (exclusive)
+            event_types: Exact event types or wildcard patterns (default all)
+            after: Resume after a cursor returned by an earlier replay
+            speed: None or 0 replays at full speed; otherwise events keep their
+                original spacing divided by speed (1.0 = real time)
+            batch_size: Rows per page
+
+        Returns:
+            Dict: replayed count, last cursor (resume point) and duration_ms
+        """
+        if isinstance(target, str):
+            if self._dispatch.get(target) is None:
+                raise ValueError(f"Unknown subscription: {target}")
+            deliver = functools.partial(self._dispatch.deliver, target)
+            is_async = True
+        else:
+            deliver = target
+            is_async = asyncio.iscoroutinefunction(target)
+
+        started = time.monotonic()
+        first_created = None
+        replayed = 0
+        last_cursor = after
+        async for cursor_position, event in self.history(since, until, event_types, after, batch_size):
+            if speed:
+                if first_created is None:
+                    first_created = cursor_position[0]
+                delay = (cursor_position[0] - first_created) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                if is_async:
+                    await deliver(event)
+                else:
+                    deliver(event)
+            except Exception as e:
+                # a failing handler does not stop the replay, like on the live bus
+                self._stats["error_count"] += 1
+                logger.error(f"Replay handler failed on {event.type}: {e}")
+            replayed += 1
+            last_cursor = cursor_position
+
+        if isinstance(target, str) and self._dispatch.get(target) is not None:
+            await self._dispatch.get(target)["mailbox"].join()
+
+        self._stats["replayed_count"] += replayed
+        return {
+            "replayed": replayed,
+            "cursor": last_cursor,
+            "duration_ms": (time.monotonic() - started) * 1000,
+        }
+
+    async def _process_event(self, event: Event, on_complete: Optional[Callable[[], None]] = None):
+        """processevent (enqueue for subscribers, on_complete once all handled)"""
+        await self._dispatch.dispatch(event, on_complete)
 
     async def get_stats(self) -> dict:
         """getstatisticsinfo"""
-        async with aiosqlite.connect(self._expanded_db_path) as db:
-            cursor = await db.execute(
-                "SELECT COUNT(*) FROM message_queue WHERE processed = false"
-            )
-            queue_size = (await cursor.fetchone())[0]
+        queue_size = await self._count_unprocessed()
 
         return {
             **self._stats,
             "queue_size": queue_size,
+            "scheduled_count": len(self._timers),
+            "persistent_connection": self._db is not None,
+            "table_rows": self._table_rows,
+            "archive_rows": self._archive_rows,
+            "queue_table_bytes": self._queue_table_bytes,
+            **(await self._storage_stats()),
+            "claim_latency_ms": self._claim_latency_ms,
+            "last_compaction": dict(self._last_compaction),
             "max_queue_size": self.max_queue_size,
-            "subscription_count": len(self._subscription_index),
+            "subscription_count": len(self._dispatch),
+            "subscriptions": self._dispatch.get_subscription_stats(),
+            "latency": self._dispatch.get_latency_stats(),
+            "execution": self._dispatch.get_execution_stats(),
             "worker_count": self.num_workers,
             "running": self._running,
         }
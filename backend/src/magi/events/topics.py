@@ -0,0 +1,169 @@
+"""
+Message Bus - wildcard topic matching
+
+Event types are treated as dot-separated topics ("Loop.Phase.Started";
+undotted types such as "TaskStarted" are a single segment). Patterns:
+
+- "*" in a segment matches any segment, "Task*" any segment starting with "Task"
+- a wildcard in the last segment also matches everything after it:
+  "Loop.*" matches "Loop.Started" and "Loop.Phase.Started",
+  "Task*" matches "TaskStarted", and "*" matches every event type
+- a wildcard in an inner segment matches exactly one segment
+  ("Agent.*.Failed")
+"""
+from typing import Dict, List, Optional
+
+
+def is_pattern(event_type: str) -> bool:
+    """Whether a subscription event_type is a wildcard pattern"""
+    return "*" in event_type
+
+
+def _split_pattern(pattern: str) -> List[str]:
+    """Split and validate a pattern into segments"""
+    segments = pattern.split(".")
+    for segment in segments:
+        if "*" in segment[:-1] or not segment:
+            raise ValueError(
+                f"Invalid topic pattern {pattern!r}: '*' may only end a non-empty segment"
+            )
+    return segments
+
+
+class _TrieNode:
+    """One pattern segment level"""
+
+    __slots__ = ("literal", "prefix", "items", "tail_items")
+
+    def __init__(self):
+        self.literal: Dict[str, "_TrieNode"] = {}  # exact segment -> child
+        self.prefix: Dict[str, "_TrieNode"] = {}   # "Task" for "Task*" -> child
+        self.items: List = []       # patterns ending here (match exactly this depth)
+        self.tail_items: List = []  # patterns whose last segment is a wildcard ending here
+
+    def is_empty(self) -> bool:
+        return not (self.literal or self.prefix or self.items or self.tail_items)
+
+
+class TopicTrie:
+    """
+    Trie of wildcard patterns
+
+    Matching walks the event type's segments once; only branches whose
+    segment (or segment prefix) matches are visited, so the cost depends on
+    the matching patterns rather than on how many patterns exist.
+    """
+
+    def __init__(self):
+        """initialize topic trie"""
+        self._root = _TrieNode()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern: str, item):
+        """
+        Register an item under a pattern
+
+        Args:
+            pattern: Wildcard pattern
+            item: Value returned by match()
+        """
+        segments = _split_pattern(pattern)
+        node = self._root
+        for i, segment in enumerate(segments):
+            last = i == len(segments) - 1
+            if segment.endswith("*"):
+                node = node.prefix.setdefault(segment[:-1], _TrieNode())
+                if last:
+                    node.tail_items.append(item)
+            else:
+                node = node.literal.setdefault(segment, _TrieNode())
+                if last:
+                    node.items.append(item)
+        self._count += 1
+
+    def remove(self, pattern: str, item) -> bool:
+        """
+        Remove an item registered under a pattern
+
+        Args:
+            pattern: Wildcard pattern
+            item: Registered value
+
+        Returns:
+            bool: Whether the item was found
+        """
+        segments = _split_pattern(pattern)
+        path = [self._root]
+        node = self._root
+        for segment in segments:
+            branch = node.prefix if segment.endswith("*") else node.literal
+            node = branch.get(segment[:-1] if segment.endswith("*") else segment)
+            if node is None:
+                return False
+            path.append(node)
+
+        bucket = node.tail_items if segments[-1].endswith("*") else node.items
+        for i, existing in enumerate(bucket):
+            if existing is item:
+                del bucket[i]
+                break
+        else:
+            return False
+        self._count -= 1
+
+        # prune empty branches
+        for depth in range(len(segments), 0, -1):
+            child = path[depth]
+            if not child.is_empty():
+                break
+            segment = segments[depth - 1]
+            parent = path[depth - 1]
+            if segment.endswith("*"):
+                del parent.prefix[segment[:-1]]
+            else:
+                del parent.literal[segment]
+        return True
+
+    def match(self, event_type: str) -> List:
+        """
+        All items whose pattern matches a concrete event type
+
+        Args:
+            event_type: Concrete event type
+
+        Returns:
+            List: Matching items (each at most once)
+        """
+        segments = event_type.split(".")
+        matched: List = []
+        self._match(self._root, segments, 0, matched)
+        return matched
+
+    def _match(self, node: _TrieNode, segments: List[str], depth: int, matched: List):
+        """Depth-first walk over the branches matching segments[depth:]"""
+        if depth == len(segments):
+            matched.extend(node.items)
+            return
+
+        segment = segments[depth]
+        child: Optional[_TrieNode] = node.literal.get(segment)
+        if child is not None:
+            self._match(child, segments, depth + 1, matched)
+
+        prefixes = node.prefix
+        if not prefixes:
+            return
+        if len(prefixes) <= len(segment) + 1:
+            children = [child for prefix, child in prefixes.items() if segment.startswith(prefix)]
+        else:
+            # many patterns at this level: probe the segment's own prefixes instead
+            children = [
+                prefixes[segment[:k]] for k in range(len(segment) + 1) if segment[:k] in prefixes
+            ]
+        for child in children:
+            # wildcard in the pattern's last segment: matches everything after it too
+            matched.extend(child.tail_items)
+            self._match(child, segments, depth + 1, matched)
@@ -0,0 +1,81 @@
+"""
+Message Bus - worker wakeup notification
+
+Replaces sleep polling in bus workers: publishers notify, idle workers wait.
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+
+
+class WorkerWakeup:
+    """
+    Wake idle bus workers when events are published
+
+    - notify() wakes exactly one idle worker per published event
+    - notifications sent while every worker is busy are kept as tokens,
+      so a worker that goes idle later does not sleep on pending work
+    - wait(timeout) lets backends keep a polling fallback for work that
+      cannot notify (e.g. rows written by another process)
+    """
+
+    def __init__(self):
+        """initialize wakeup notification"""
+        self._tokens = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def notify(self, count: int = 1):
+        """
+        Signal that count new events are available
+
+        Args:
+            count: Number of published events
+        """
+        for _ in range(count):
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(True)
+                    break
+            else:
+                self._tokens += 1
+
+    def consume(self):
+        """
+        Drop one pending notification
+
+        Called by a worker that found an event without waiting, so stale
+        tokens do not cause empty dequeue round-trips later.
+        """
+        if self._tokens > 0:
+            self._tokens -= 1
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until an event is published
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            bool: True if notified, False if the timeout expired
+        """
+        if self._tokens > 0:
+            self._tokens -= 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    @property
+    def idle_workers(self) -> int:
+        """number of workers currently waiting"""
+        return sum(1 for waiter in self._waiters if not waiter.done())
@@ -97,7 +97,7 @@ class UnifiedMemoryStore:
                 remote_dimension=emb_config.get("remote_dimension", 1536),
                 persist_path=str(persist_path / "embeddings.json"),
             )
-            self.l3_hybrid_search = HybrideventSearch(self.l3_embeddings)
+            self.l3_hybrid_search = HybrideventSearch(self.l3_embeddings, keyword_index=self.l1_raw)
 
         # L4: summarystorage
         self.l4_summaries = None
@@ -130,6 +130,11 @@ class UnifiedMemoryStore:
         self._initialized = True
         logger.info("Unified memory store initialized")
 
+    async def close(self):
+        """Flush buffered L1 writes and close the L1 connection"""
+        await self.l1_raw.close()
+        self._initialized = False
+
     async def add_event(
         self,
         event: Dict[str, Any],
@@ -240,14 +245,15 @@ class UnifiedMemoryStore:
             return await self.l3_hybrid_search.search(query, top_k=limit)
         elif search_type == "semantic" and self.l3_embeddings:
             return await self.l3_embeddings.similarity_search(query, top_k=limit)
-        elif search_type == "keyword" and self.l3_hybrid_search:
-            return self.l3_hybrid_search._keyword_search(query, top_k=limit)
+        elif search_type == "keyword":
+            return await self.l1_raw.keyword_search(query, top_k=limit)
         elif search_type == "relation":
-            # 按关key词查找relatedevent
+            # 按关key词查找relatedevent: keyword matches that are in the relation graph
             results = []
-            for event_id, event_data in self.l2_relations._events.items():
-                if query.lower() in str(event_data).lower():
-                    results.append({"event_id": event_id, "data": event_data})
+            for match in await self.l1_raw.keyword_search(query, top_k=limit * 4):
+                event_data = self.l2_relations._events.get(match["event_id"])
+                if event_data is not None:
+                    results.append({"event_id": match["event_id"], "data": event_data})
             return results[:limit]
         else:
             return []
@@ -334,9 +340,7 @@ class UnifiedMemoryStore:
     def get_statistics(self) -> Dict[str, Any]:
         """getall层级的statisticsinfo"""
         stats = {
-            "l1_raw": {
-                "db_path": self.l1_raw.db_path,
-            },
+            "l1_raw": self.l1_raw.get_stats(),
             "l2_relations": self.l2_relations.get_statistics(),
         }
 
@@ -361,6 +365,10 @@ class UnifiedMemoryStore:
         Args:
             older_than_days: 清理多少days前的data
         """
+        # L1: never deleted, days past the hot window move to compressed segments
+        await self.l1_raw.seal()
+        await self.l1_raw.collect_media_garbage()
+
         # L2: 清理oldrelationship
         self.l2_relations.clear_old_relations(older_than_days)
 
@@ -0,0 +1,199 @@
+"""
+Memory Storage - sealed L1 segments
+
+RawEventStore keeps recent events in the event_store table and seals
+each older day into one read-only, compressed segment file. A segment
+holds the day's event_store rows ordered by (timestamp, id):
+
+    magic | block ... | index | index offset (uint64) | magic
+
+Each block is a zlib-compressed marshal (format version 4, as in the
+event codec) list of up to block_rows row tuples. The index is a marshal
+dict with the day's totals and, per block, its offset, length, row
+count, first/last (timestamp, id) and the event types it contains, so
+readers decompress only blocks that can match a time range, a keyset
+cursor or an event type.
+
+Segments are immutable: re-sealing a day (events that arrived late)
+writes a new file that merges the old one.
+"""
+import marshal
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"MAGISEG1"
+_MARSHAL_VERSION = 4
+_TRAILER = struct.Struct("<Q8s")  # index offset, magic
+
+# event_store column positions
+_ID = 0
+_TYPE = 1
+_TIMESTAMP = 4
+
+
+def row_key(row: tuple) -> Tuple[float, str]:
+    """Sort key of an event_store row: (timestamp, id)"""
+    return row[_TIMESTAMP], row[_ID]
+
+
+def write_segment(path: str, rows: Iterable[tuple], block_rows: int = 1024, level: int = 6) -> Dict[str, Any]:
+    """
+    Write rows (sorted by row_key) to a new read-only segment file
+
+    The file is written next to path, synced and renamed into place.
+
+    Args:
+        path: Segment file path
+        rows: event_store rows ordered by (timestamp, id)
+        block_rows: Rows per compressed block
+        level: zlib compression level
+
+    Returns:
+        dict: The segment index
+    """
+    blocks = []
+    types: Dict[str, int] = {}
+    count = 0
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+
+        def write_block(block: List[tuple]):
+            payload = zlib.compress(marshal.dumps(block, _MARSHAL_VERSION), level)
+            first, last = row_key(block[0]), row_key(block[-1])
+            blocks.append((
+                f.tell(), len(payload), len(block),
+                first[0], first[1], last[0], last[1],
+                tuple(sorted({row[_TYPE] for row in block})),
+            ))
+            f.write(payload)
+
+        block: List[tuple] = []
+        for row in rows:
+            block.append(tuple(row))
+            types[row[_TYPE]] = types.get(row[_TYPE], 0) + 1
+            count += 1
+            if len(block) >= block_rows:
+                write_block(block)
+                block = []
+        if block:
+            write_block(block)
+
+        index = {
+            "version": 1,
+            "count": count,
+            "min_ts": blocks[0][3] if blocks else None,
+            "max_ts": blocks[-1][5] if blocks else None,
+            "types": types,
+            "blocks": blocks,
+        }
+        index_offset = f.tell()
+        f.write(marshal.dumps(index, _MARSHAL_VERSION))
+        f.write(_TRAILER.pack(index_offset, MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, path)
+    return index
+
+
+class EventSegment:
+    """
+    Read access to one sealed segment (index loaded on open, blocks on demand)
+    """
+
+    def __init__(self, path: str):
+        """
+        open a segment
+
+        Args:
+            path: Segment file path
+
+        Raises:
+            ValueError: Not a segment file
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not an event segment: {path}")
+            f.seek(-_TRAILER.size, os.SEEK_END)
+            end = f.tell()
+            index_offset, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Truncated event segment: {path}")
+            f.seek(index_offset)
+            self.index = marshal.loads(f.read(end - index_offset))
+
+    @property
+    def count(self) -> int:
+        return self.index["count"]
+
+    @property
+    def types(self) -> Dict[str, int]:
+        return self.index["types"]
+
+    def read_block(self, number: int) -> List[tuple]:
+        """Rows of one block"""
+        offset, length = self.index["blocks"][number][:2]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return marshal.loads(zlib.decompress(f.read(length)))
+
+    def rows(
+        self,
+        descending: bool = False,
+        event_type: Optional[str] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> Iterator[tuple]:
+        """
+        Matching rows in (timestamp, id) order, skipping blocks that cannot match
+
+        Args:
+            descending: Newest first
+            event_type: Only this event type
+            start_time: Only rows at or after this timestamp
+            end_time: Only rows at or before this timestamp
+            before: Only rows whose (timestamp, id) is smaller
+            after: Only rows whose (timestamp, id) is larger
+
+        Yields:
+            tuple: event_store row
+        """
+        if event_type is not None and event_type not in self.types:
+            return
+
+        numbers = range(len(self.index["blocks"]))
+        for number in (reversed(numbers) if descending else numbers):
+            _, _, _, first_ts, first_id, last_ts, last_id, types = self.index["blocks"][number]
+            if event_type is not None and event_type not in types:
+                continue
+            if start_time is not None and last_ts < start_time:
+                continue
+            if end_time is not None and first_ts > end_time:
+                continue
+            if before is not None and (first_ts, first_id) >= before:
+                continue
+            if after is not None and (last_ts, last_id) <= after:
+                continue
+
+            block = self.read_block(number)
+            for row in (reversed(block) if descending else block):
+                if event_type is not None and row[_TYPE] != event_type:
+                    continue
+                timestamp = row[_TIMESTAMP]
+                if start_time is not None and timestamp < start_time:
+                    continue
+                if end_time is not None and timestamp > end_time:
+                    continue
+                if before is not None and (timestamp, row[_ID]) >= before:
+                    continue
+                if after is not None and (timestamp, row[_ID]) <= after:
+                    continue
+                yield row
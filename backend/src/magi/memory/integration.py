@@ -160,9 +160,6 @@ class MemoryIntegrationModule:
             "l5_capabilities_extracted": 0,
         }
 
-        # relatedevent追踪（用于 L2 relationship提取）
-        self._correlation_tracker: Dict[str, List[str]] = {}
-
         logger.info("MemoryIntegrationModule initialized")
 
     async def start(self):
@@ -228,6 +225,12 @@ class MemoryIntegrationModule:
         # 持久化data
         await self._persist_all()
 
+        # L1: commit the write-behind buffer
+        try:
+            await self.unified_memory.close()
+        except Exception as e:
+            logger.error(f"Failed to flush L1 event store: {e}")
+
         logger.info("MemoryIntegrationModule stopped")
 
     async def _subscribe_to_events(self):
@@ -256,7 +259,7 @@ class MemoryIntegrationModule:
 
     # ==================== L1 eventfilterandconvert ====================
 
-    def _should_store_l1_event(self, Event: Event) -> bool:
+    def _should_store_l1_event(self, event: Event) -> bool:
         """
         判断eventis not应该storage到 L1
 
@@ -287,7 +290,7 @@ class MemoryIntegrationModule:
 
         return True
 
-    def _transform_to_business_event(self, Event: Event) -> Event:
+    def _transform_to_business_event(self, event: Event) -> Event:
         """
         将internaleventconvert为业务event
 
@@ -304,8 +307,8 @@ class MemoryIntegrationModule:
 
         # user_MESSAGE → user_input
         if event_type == EventTypes.USER_MESSAGE:
-            return event(
-                type=BusinessEventTypes.user_input,
+            return Event(
+                type=BusinessEventTypes.USER_INPUT,
                 data=event.data,
                 timestamp=event.timestamp,
                 source=event.source,
@@ -321,7 +324,7 @@ class MemoryIntegrationModule:
 
             if action_type == "ChatResponseAction":
                 # convert为 AI_RESPONSE
-                return event(
+                return Event(
                     type=BusinessEventTypes.AI_RESPONSE,
                     data={
                         "response": data.get("response", ""),
@@ -338,7 +341,7 @@ class MemoryIntegrationModule:
                 )
             else:
                 # otheractionconvert为 TOOL_INVOKED
-                return event(
+                return Event(
                     type=BusinessEventTypes.TOOL_INVOKED,
                     data={
                         "tool_name": action_type,
@@ -359,8 +362,8 @@ class MemoryIntegrationModule:
             level_value = event.level.value if hasattr(event.level, 'value') else event.level
             if level_value >= self.config.l1_error_min_level:
                 data = event.data if isinstance(event.data, dict) else {}
-                return event(
-                    type=BusinessEventTypes.system_error,
+                return Event(
+                    type=BusinessEventTypes.SYSTEM_ERROR,
                     data={
                         "error_code": data.get("error_code", "UNKNOWN"),
                         "error_message": data.get("error_message", str(data.get("error", ""))),
@@ -377,7 +380,7 @@ class MemoryIntegrationModule:
         # otherevent不convert
         return event
 
-    async def _handle_event(self, Event: Event):
+    async def _handle_event(self, event: Event):
         """
         processreceive到的event
 
@@ -393,13 +396,6 @@ class MemoryIntegrationModule:
             # 使用 correlation_id 作为event id
             event_id = event.correlation_id or str(uuid.uuid4())
 
-            # 追踪 correlation_id 用于relationship提取
-            correlation_id = event.correlation_id
-            if correlation_id:
-                if correlation_id not in self._correlation_tracker:
-                    self._correlation_tracker[correlation_id] = []
-                self._correlation_tracker[correlation_id].append(event_id)
-
             # L1: storage原始event（带filterandconvert）
             if self.config.enable_l1_raw:
                 # checkis not应该storage到 L1
@@ -443,7 +439,7 @@ class MemoryIntegrationModule:
 
     # ==================== L1: Raw event Storage ====================
 
-    async def _store_l1_event(self, Event: Event):
+    async def _store_l1_event(self, event: Event):
         """storage原始event到 L1 层"""
         try:
             event_id = await self.unified_memory.l1_raw.store(event)
@@ -454,11 +450,13 @@ class MemoryIntegrationModule:
 
     # ==================== L2: eventrelationship提取 ====================
 
-    async def _extract_l2_relations(self, Event: Event, event_id: str):
-        """提取eventrelationship到 L2 层"""
+    async def _extract_l2_relations(self, event: Event, event_id: str):
+        """提取eventrelationship到 L2 层（候选event来自 L2 的 user/correlation/type index）"""
         try:
+            relations = self.unified_memory.l2_relations
             event_type = event.type
             correlation_id = event.correlation_id
+            user_id = self._extract_user_id_from_event(event)
 
             # convert event 为dictionaryformatstorage
             event_dict = {
@@ -469,83 +467,79 @@ class MemoryIntegrationModule:
                 "source": event.source,
                 "correlation_id": correlation_id,
             }
+            if user_id:
+                event_dict["user_id"] = user_id
+
+            # 同 correlation_id 的前置event（加入index之前查询，不含自身）
+            correlated = relations.find_events(correlation_id=correlation_id) if correlation_id else []
 
             # addevent到index
-            self.unified_memory.l2_relations.add_event(event_id, event_dict)
+            relations.add_event(event_id, event_dict)
 
             # 提取基于rule的relationship
             relations_extracted = 0
 
             # 1. 同 correlation_id 的前后event建立 PRECEDE relationship
-            if correlation_id and correlation_id in self._correlation_tracker:
-                related_events = self._correlation_tracker[correlation_id]
-                for related_id in related_events:
-                    if related_id != event_id:
-                        self.unified_memory.l2_relations.add_relation(
-                            source_event_id=related_id,
-                            target_event_id=event_id,
-                            relation_type="PRECEDE",
-                            confidence=0.9,
-                            metadata={"correlation_id": correlation_id},
-                        )
-                        relations_extracted += 1
+            for related_id in correlated:
+                if related_id != event_id:
+                    relations.add_relation(
+                        source_event_id=related_id,
+                        target_event_id=event_id,
+                        relation_type="PRECEDE",
+                        confidence=0.9,
+                        metadata={"correlation_id": correlation_id},
+                    )
+                    relations_extracted += 1
 
             # 2. 根据eventtype提取特定relationship
-            if event_type == EventTypes.PERCEPTION_PROCESSED:
+            if event_type == EventTypes.PERCEPTION_PROCESSED and correlation_id:
                 # 查找同 correlation_id 的 PERCEPTION_receiveD
-                if correlation_id in self._correlation_tracker:
-                    for related_id in self._correlation_tracker[correlation_id]:
-                        related_event = self.unified_memory.l2_relations._events.get(related_id, {})
-                        if related_event.get("type") == EventTypes.PERCEPTION_RECEIVED:
-                            self.unified_memory.l2_relations.add_relation(
-                                source_event_id=related_id,
-                                target_event_id=event_id,
-                                relation_type="TRIGGER",
-                                confidence=0.95,
-                            )
-                            relations_extracted += 1
+                for related_id in relations.find_events(
+                    correlation_id=correlation_id, event_type=EventTypes.PERCEPTION_RECEIVED
+                ):
+                    relations.add_relation(
+                        source_event_id=related_id,
+                        target_event_id=event_id,
+                        relation_type="TRIGGER",
+                        confidence=0.95,
+                    )
+                    relations_extracted += 1
 
             elif event_type == EventTypes.EXPERIENCE_STORED:
                 # 建立与前置event的 FOLLOW relationship
-                if correlation_id in self._correlation_tracker:
-                    for related_id in self._correlation_tracker[correlation_id]:
-                        if related_id != event_id:
-                            self.unified_memory.l2_relations.add_relation(
-                                source_event_id=related_id,
-                                target_event_id=event_id,
-                                relation_type="FOLLOW",
-                                confidence=0.8,
-                            )
-                            relations_extracted += 1
-
-            # 3. 提取同user/同contextrelationship
-            user_id = self._extract_user_id_from_event(event)
+                for related_id in correlated:
+                    if related_id != event_id:
+                        relations.add_relation(
+                            source_event_id=related_id,
+                            target_event_id=event_id,
+                            relation_type="FOLLOW",
+                            confidence=0.8,
+                        )
+                        relations_extracted += 1
+
+            # 3. 提取同user/同contextrelationship（只链接该user最近 user_window 个event）
             if user_id:
-                # 查找同user的otherevent
-                for other_id, other_event in self.unified_memory.l2_relations._events.items():
+                for other_id in relations.find_events(user_id=user_id, limit=relations.user_window + 1):
                     if other_id != event_id:
-                        other_user = other_event.get("data", {}).get("user_id", "")
-                        if other_user == user_id:
-                            self.unified_memory.l2_relations.add_relation(
-                                source_event_id=other_id,
-                                target_event_id=event_id,
-                                relation_type="SAME_user",
-                                confidence=0.7,
-                                metadata={"user_id": user_id},
-                            )
-                            relations_extracted += 1
+                        relations.add_relation(
+                            source_event_id=other_id,
+                            target_event_id=event_id,
+                            relation_type="SAME_user",
+                            confidence=0.7,
+                            metadata={"user_id": user_id},
+                        )
+                        relations_extracted += 1
 
             if relations_extracted > 0:
                 self._stats["l2_relations_extracted"] += relations_extracted
 
-            # 持久化relationshipgraph（每次有newrelationship时）
-            if relations_extracted > 0:
-                self.unified_memory.l2_relations._save_to_disk()
+            # 持久化relationshipgraph（整图写盘，按 save_interval 节流；stop 时完整保存）
+            relations.save_if_due()
 
         except Exception as e:
             logger.error(f"L2 relation extraction failed: {e}")
 
-    def _extract_user_id_from_event(self, Event: Event) -> Optional[str]:
+    def _extract_user_id_from_event(self, event: Event) -> Optional[str]:
         """从event中提取user id"""
         # 从 data field中查找 user_id
         if isinstance(event.data, dict):
@@ -557,7 +551,7 @@ class MemoryIntegrationModule:
 
     # ==================== L3: Semantic Embeddingsgeneration ====================
 
-    async def _queue_l3_embedding(self, Event: Event, event_id: str):
+    async def _queue_l3_embedding(self, event: Event, event_id: str):
         """将event放入 L3 embeddingqueue"""
         try:
             if self._embedding_queue and not self._embedding_queue.full():
@@ -569,7 +563,7 @@ class MemoryIntegrationModule:
         except Exception as e:
             logger.error(f"L3 embedding queue failed: {e}")
 
-    async def _generate_l3_embedding(self, Event: Event, event_id: str):
+    async def _generate_l3_embedding(self, event: Event, event_id: str):
         """直接generation L3 embedding（synchronotttus）"""
         try:
             # 提取文本
@@ -623,7 +617,7 @@ class MemoryIntegrationModule:
 
         logger.info("L3 embedding processor stopped")
 
-    def _extract_text_from_event(self, Event: Event) -> str:
+    def _extract_text_from_event(self, event: Event) -> str:
         """从event中提取文本用于embedding"""
         parts = []
 
@@ -643,7 +637,7 @@ class MemoryIntegrationModule:
 
     # ==================== L4: summarycache ====================
 
-    def _cache_l4_event(self, Event: Event):
+    def _cache_l4_event(self, event: Event):
         """将eventadd到 L4 summarycache"""
         try:
             # convert为dictionaryformat
@@ -698,7 +692,7 @@ class MemoryIntegrationModule:
 
     # ==================== L5: Capability Extraction ====================
 
-    async def _handle_l5_capability(self, Event: Event):
+    async def _handle_l5_capability(self, event: Event):
         """process L5 capabilityrecordand提取"""
         try:
             event_type = event.type
@@ -712,7 +706,7 @@ class MemoryIntegrationModule:
         except Exception as e:
             logger.error(f"L5 capability handling failed: {e}")
 
-    def _record_task_capability(self, Event: Event):
+    def _record_task_capability(self, event: Event):
         """record任务complete到capabilitymemory"""
         data = event.data if isinstance(event.data, dict) else {}
         self.unified_memory.l5_capabilities.record_attempt(
@@ -724,7 +718,7 @@ class MemoryIntegrationModule:
             error=data.get("error"),
         )
 
-    def _record_action_attempt(self, Event: Event):
+    def _record_action_attempt(self, event: Event):
         """recordactionExecute尝试"""
         data = event.data if isinstance(event.data, dict) else {}
         action_type = data.get("action_type", "")
@@ -6,7 +6,7 @@ Supports relationship extraction, graph traversal, and relationship queries
 """
 import logging
 import time
-from typing import Dict, Any, List, Optional, Set, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 from collections import defaultdict
 import json
@@ -50,6 +50,13 @@ class EventRelationStore:
     event relationship store
 
     In-memory graph database implementation (extensible to NetworkX or Neo4j)
+
+    Secondary indexes by user_id, correlation_id and event type map a key
+    to its event ids in insertion order ({event_id: None}, so eviction is
+    O(1) and the newest ids come first from reversed()). Rule-based
+    extraction looks up candidates there instead of scanning all events,
+    and same-user linking only considers the last user_window events of
+    the user, so the cost of adding an event does not grow with the store.
     """
 
     # Relationship type definitions
@@ -75,14 +82,20 @@ class EventRelationStore:
         "enable": "Enable: A enables B",
     }
 
-    def __init__(self, persist_path: str = None):
+    def __init__(self, persist_path: str = None, user_window: int = 50, save_interval: float = 5.0):
         """
         initialize event relationship store
 
         Args:
             persist_path: persistence file path (optional)
+            user_window: Recent events of the same user linked to a new event
+            save_interval: Minimum seconds between saves from save_if_due()
         """
         self.persist_path = persist_path
+        self.user_window = user_window
+        self.save_interval = save_interval
+        self._last_save = 0.0
+        self._dirty = False
 
         # Graph data structure: {event_id: {relation_type: {target_event_id: EventRelation}}}
         self._graph: Dict[str, Dict[str, Dict[str, EventRelation]]] = defaultdict(
@@ -97,6 +110,11 @@ class EventRelationStore:
         # event index: {event_id: event_data}
         self._events: Dict[str, Dict[str, Any]] = {}
 
+        # Secondary indexes: {key: {event_id: None}} in insertion order
+        self._by_user: Dict[str, Dict[str, None]] = {}
+        self._by_correlation: Dict[str, Dict[str, None]] = {}
+        self._by_type: Dict[str, Dict[str, None]] = {}
+
         # Load persisted data
         if persist_path:
             self._load_from_disk()
@@ -109,13 +127,113 @@ class EventRelationStore:
             event_id: event id
             event_data: event data
         """
+        if event_id in self._events:
+            self._unindex_event(event_id)
         self._events[event_id] = {
             "id": event_id,
             "data": event_data,
             "timestamp": time.time(),
         }
+        self._index_event(event_id)
+        self._dirty = True
         logger.debug(f"event indexed: {event_id}")
 
+    @staticmethod
+    def _index_keys(event_data: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """(index name, key) pairs of an event's data"""
+        data = event_data.get("data")
+        user_id = event_data.get("user_id") or (data.get("user_id") if isinstance(data, dict) else None)
+        if user_id:
+            yield "_by_user", user_id
+        if event_data.get("correlation_id"):
+            yield "_by_correlation", event_data["correlation_id"]
+        if event_data.get("type"):
+            yield "_by_type", event_data["type"]
+
+    def _index_event(self, event_id: str):
+        for index, key in self._index_keys(self._events[event_id]["data"]):
+            getattr(self, index).setdefault(key, {})[event_id] = None
+
+    def _unindex_event(self, event_id: str):
+        for index, key in self._index_keys(self._events[event_id]["data"]):
+            ids = getattr(self, index).get(key)
+            if ids is not None:
+                ids.pop(event_id, None)
+                if not ids:
+                    del getattr(self, index)[key]
+
+    def _rebuild_indexes(self):
+        self._by_user, self._by_correlation, self._by_type = {}, {}, {}
+        for event_id in self._events:
+            self._index_event(event_id)
+
+    def find_events(
+        self,
+        user_id: str = None,
+        correlation_id: str = None,
+        event_type: str = None,
+        limit: int = None,
+    ) -> List[str]:
+        """
+        Look up event ids through the secondary indexes
+
+        Args:
+            user_id: Only events of this user
+            correlation_id: Only events with this correlation id
+            event_type: Only events of this type
+            limit: Maximum number of ids (None means all)
+
+        Returns:
+            event ids, newest first
+        """
+        lookups = [
+            index.get(key, {})
+            for index, key in (
+                (self._by_user, user_id),
+                (self._by_correlation, correlation_id),
+                (self._by_type, event_type),
+            )
+            if key is not None
+        ]
+        if not lookups:
+            raise ValueError("find_events needs user_id, correlation_id or event_type")
+
+        # walk the smallest index, check the others by membership
+        lookups.sort(key=len)
+        result = []
+        for event_id in reversed(lookups[0]):
+            if all(event_id in ids for ids in lookups[1:]):
+                result.append(event_id)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def remove_event(self, event_id: str) -> bool:
+        """
+        Remove an event with its relationships and index entries
+
+        Args:
+            event_id: event id
+
+        Returns:
+            Whether the event was indexed
+        """
+        for targets in self._graph.pop(event_id, {}).values():
+            for target_id in targets:
+                for sources in self._reverse_graph.get(target_id, {}).values():
+                    sources.pop(event_id, None)
+        for sources in self._reverse_graph.pop(event_id, {}).values():
+            for source_id in sources:
+                for targets in self._graph.get(source_id, {}).values():
+                    targets.pop(event_id, None)
+
+        if event_id not in self._events:
+            return False
+        self._unindex_event(event_id)
+        del self._events[event_id]
+        self._dirty = True
+        return True
+
     def add_relation(
         self,
         source_event_id: str,
@@ -147,6 +265,7 @@ class EventRelationStore:
 
         # Add to reverse graph
         self._reverse_graph[target_event_id][relation_type][source_event_id] = relation
+        self._dirty = True
 
         logger.debug(f"Relation added: {source_event_id} -> {target_event_id} ({relation_type})")
 
@@ -323,7 +442,6 @@ class EventRelationStore:
             Number of extracted relationships
         """
         extracted_count = 0
-        event_index = {e.get("id", e.get("event_id", "")): e for e in events}
 
         # First add all events to index
         for event in events:
@@ -342,17 +460,17 @@ class EventRelationStore:
             # Rule-based structured event relationship extraction
             if event_type == "ToolExecution":
                 # Tool execution -> task completion
-                self._extract_tool_relations(event, event_index)
+                self._extract_tool_relations(event)
                 extracted_count += 1
 
             elif event_type == "LLMCall":
                 # LLM call -> tool selection
-                self._extract_llm_relations(event, event_index)
+                self._extract_llm_relations(event)
                 extracted_count += 1
 
             elif event_type == "UserMessage":
                 # User message -> LLM response
-                self._extract_message_relations(event, event_index)
+                self._extract_message_relations(event)
                 extracted_count += 1
 
             # Extract temporal relationships (adjacent events)
@@ -381,7 +499,7 @@ class EventRelationStore:
 
         return extracted_count
 
-    def _extract_tool_relations(self, Event: Dict[str, Any], event_index: Dict):
+    def _extract_tool_relations(self, event: Dict[str, Any]):
         """Extract tool execution event relationships"""
         event_id = event.get("id", "")
         data = event.get("data", {})
@@ -389,20 +507,20 @@ class EventRelationStore:
         # Tool execution is usually a response to some task
         tool_name = data.get("tool", "")
         if tool_name:
-            # Find related LLM call events
-            for other_event_id, other_event in event_index.items():
-                if other_event.get("type") == "LLMCall":
-                    llm_data = other_event.get("data", {})
-                    if tool_name in str(llm_data):
-                        self.add_relation(
-                            source_event_id=other_event_id,
-                            target_event_id=event_id,
-                            relation_type="TRIGGER",
-                            confidence=0.8,
-                            metadata={"tool": tool_name},
-                        )
-
-    def _extract_llm_relations(self, Event: Dict[str, Any], event_index: Dict):
+            # Find related LLM calls among the recent ones of the same user (or of any user)
+            user_id = data.get("user_id") or None
+            for other_event_id in self.find_events(user_id=user_id, event_type="LLMCall", limit=self.user_window):
+                llm_data = self._events[other_event_id]["data"].get("data", {})
+                if tool_name in str(llm_data):
+                    self.add_relation(
+                        source_event_id=other_event_id,
+                        target_event_id=event_id,
+                        relation_type="TRIGGER",
+                        confidence=0.8,
+                        metadata={"tool": tool_name},
+                    )
+
+    def _extract_llm_relations(self, event: Dict[str, Any]):
         """Extract LLM call event relationships"""
         event_id = event.get("id", "")
         data = event.get("data", {})
@@ -410,28 +528,24 @@ class EventRelationStore:
         # LLM call is a response to user message
         user_id = data.get("user_id", "")
         if user_id:
-            for other_event_id, other_event in event_index.items():
-                if (other_event.get("type") == "UserMessage" and
-                    other_event.get("data", {}).get("user_id") == user_id):
-                    self.add_relation(
-                        source_event_id=other_event_id,
-                        target_event_id=event_id,
-                        relation_type="TRIGGER",
-                        confidence=0.9,
-                    )
-
-    def _extract_message_relations(self, Event: Dict[str, Any], event_index: Dict):
+            for other_event_id in self.find_events(user_id=user_id, event_type="UserMessage", limit=self.user_window):
+                self.add_relation(
+                    source_event_id=other_event_id,
+                    target_event_id=event_id,
+                    relation_type="TRIGGER",
+                    confidence=0.9,
+                )
+
+    def _extract_message_relations(self, event: Dict[str, Any]):
         """Extract user message event relationships"""
         # User messages may have session relationships
         event_id = event.get("id", "")
         user_id = event.get("data", {}).get("user_id", "")
 
         if user_id:
-            # Find other messages from the same user
-            for other_event_id, other_event in event_index.items():
-                if (other_event.get("type") == "UserMessage" and
-                    other_event.get("data", {}).get("user_id") == user_id and
-                    other_event_id != event_id):
+            # Link the recent messages from the same user
+            for other_event_id in self.find_events(user_id=user_id, event_type="UserMessage", limit=self.user_window + 1):
+                if other_event_id != event_id:
                     self.add_relation(
                         source_event_id=other_event_id,
                         target_event_id=event_id,
@@ -456,10 +570,30 @@ class EventRelationStore:
             with open(self.persist_path, "wb") as f:
                 pickle.dump(data, f)
 
+            self._dirty = False
+            self._last_save = time.time()
             logger.debug(f"event relations saved to {self.persist_path}")
         except Exception as e:
             logger.error(f"Failed to save event relations: {e}")
 
+    def save_if_due(self) -> bool:
+        """
+        Save changes unless the last save is less than save_interval ago
+
+        Each save pickles the whole graph, so per-event callers use this
+        instead of _save_to_disk(); the remaining changes are written by
+        the next due save or an explicit _save_to_disk().
+
+        Returns:
+            Whether the store was saved
+        """
+        if not self.persist_path or not self._dirty:
+            return False
+        if time.time() - self._last_save < self.save_interval:
+            return False
+        self._save_to_disk()
+        return True
+
     def _load_from_disk(self):
         """Load from disk"""
         if not self.persist_path:
@@ -485,6 +619,7 @@ class EventRelationStore:
                 data.get("reverse_graph", {})
             )
             self._events = data.get("events", {})
+            self._rebuild_indexes()
 
             logger.info(f"event relations loaded from {self.persist_path}")
         except Exception as e:
@@ -505,19 +640,7 @@ class EventRelationStore:
                 events_to_remove.append(event_id)
 
         for event_id in events_to_remove:
-            # Delete all relationships for the event
-            if event_id in self._graph:
-                del self._graph[event_id]
-            if event_id in self._reverse_graph:
-                del self._reverse_graph[event_id]
-
-            # Remove from other events' relationships
-            for source_events in self._graph.values():
-                for targets in source_events.values():
-                    if event_id in targets:
-                        del targets[event_id]
-
-            del self._events[event_id]
+            self.remove_event(event_id)
 
         logger.info(f"Cleared {len(events_to_remove)} old events from relation store")
 
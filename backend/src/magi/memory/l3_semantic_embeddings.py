@@ -432,8 +432,18 @@ class HybrideventSearch:
     Combines keyword search and semantic search
     """
 
-    def __init__(self, embedding_store: eventEmbeddingStore):
+    def __init__(self, embedding_store: eventEmbeddingStore, keyword_index=None):
+        """
+        initialize hybrid search
+
+        Args:
+            embedding_store: Embeddings for the semantic part
+            keyword_index: Store with an async keyword_search(query, top_k)
+                (the L1 RawEventStore); without one, keywords are matched
+                against the embedded texts in memory
+        """
         self.embedding_store = embedding_store
+        self.keyword_index = keyword_index
 
     async def search(
         self,
@@ -462,7 +472,10 @@ class HybrideventSearch:
         )
 
         # Keyword search
-        keyword_results = self._keyword_search(query, top_k=top_k * 2)
+        if self.keyword_index is not None:
+            keyword_results = await self.keyword_index.keyword_search(query, top_k=top_k * 2)
+        else:
+            keyword_results = self._keyword_search(query, top_k=top_k * 2)
 
         # Merge results
         combined = self._combine_results(
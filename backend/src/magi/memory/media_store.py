@@ -0,0 +1,182 @@
+"""
+Memory Storage - content-addressed media files
+
+Media attached to L1 events (images, audio) is stored once per content:
+the file name is the SHA-256 of the bytes, so a payload sent again is
+not written again. Layout under the media directory:
+
+    ab/cd/abcd...ef.png      (first two bytes of the digest as directories)
+
+put() streams the payload in chunks - bytes, a file path, a binary file
+object, or a (sync or async) iterable of chunks - into a temporary file
+while hashing it; hashing and file I/O run in a worker thread, so large
+payloads neither block the event loop nor have to fit in memory. The
+finished file is renamed to its digest name, or dropped if that content
+is already stored.
+
+Files are immutable; open() returns a read-only view of a memory map
+instead of loading them. Reference counts live with the event rows that use them (see
+RawEventStore), this module only deals with files.
+"""
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+_EXTENSION = re.compile(r"^[A-Za-z0-9]{1,16}$")
+_KEY = re.compile(r"^[0-9a-f]{64}(\.[A-Za-z0-9]{1,16})?$")
+
+
+def media_key(digest: str, extension: Optional[str]) -> str:
+    """Storage key of content: hex digest plus the (sanitized) file extension"""
+    extension = (extension or "").lstrip(".")
+    return f"{digest}.{extension.lower()}" if _EXTENSION.match(extension) else digest
+
+
+class MediaStore:
+    """
+    Content-addressed, immutable media files
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1 << 20):
+        """
+        initialize media store
+
+        Args:
+            root: Media directory
+            chunk_size: Bytes per read/write chunk
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def path(self, key: str) -> str:
+        """
+        File path of a key
+
+        Raises:
+            ValueError: Not a media key
+        """
+        if not _KEY.match(key):
+            raise ValueError(f"Invalid media key: {key!r}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    async def put(self, source: Any, extension: Optional[str] = None) -> Tuple[str, int]:
+        """
+        Store content (no-op if the same content is already stored)
+
+        Args:
+            source: bytes-like, file path, binary file object, or an
+                iterable / async iterable of bytes chunks
+            extension: File extension kept on the stored file
+
+        Returns:
+            (key, size in bytes)
+        """
+        Path(self.root).mkdir(parents=True, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".incoming-{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            if hasattr(source, "__aiter__"):
+                with open(tmp_path, "wb") as f:
+                    async for chunk in source:
+                        size += await asyncio.to_thread(self._write_chunk, f, digest, chunk)
+            else:
+                size = await asyncio.to_thread(self._write_all, tmp_path, digest, source)
+            key = media_key(digest.hexdigest(), extension)
+            await asyncio.to_thread(self._commit, tmp_path, key)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return key, size
+
+    @staticmethod
+    def _write_chunk(f, digest, chunk) -> int:
+        digest.update(chunk)
+        f.write(chunk)
+        return len(chunk)
+
+    def _chunks(self, source: Any) -> Iterator[bytes]:
+        """chunks of a sync source"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source).cast("B")
+            for start in range(0, len(view), self.chunk_size):
+                yield view[start:start + self.chunk_size]
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from iter(lambda: f.read(self.chunk_size), b"")
+        elif hasattr(source, "read"):
+            yield from iter(lambda: source.read(self.chunk_size), b"")
+        elif isinstance(source, Iterable):
+            yield from source
+        else:
+            raise TypeError(f"Unsupported media source: {type(source).__name__}")
+
+    def _write_all(self, tmp_path: str, digest, source: Any) -> int:
+        """copy a sync source to tmp_path while hashing it (worker thread)"""
+        size = 0
+        with open(tmp_path, "wb") as f:
+            for chunk in self._chunks(source):
+                size += self._write_chunk(f, digest, chunk)
+        return size
+
+    def _commit(self, tmp_path: str, key: str):
+        """move the hashed file into place, or keep the stored copy (worker thread)"""
+        path = self.path(key)
+        if os.path.exists(path):
+            # the same content again: refresh mtime so gc's grace period restarts
+            os.utime(path)
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def open(self, key: str) -> memoryview:
+        """
+        Read-only view of stored content, backed by a memory map of the
+        file (the mapping closes once the view is released or dropped)
+
+        Args:
+            key: Media key (or an absolute file path of legacy media)
+
+        Returns:
+            memoryview: Bytes of the file, paged in on access
+        """
+        path = key if os.path.isabs(key) else self.path(key)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")  # zero-length files cannot be mapped
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def remove(self, key: str) -> bool:
+        """Delete stored content; returns whether a file was removed"""
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def keys(self, older_than: float = 0.0) -> Iterator[str]:
+        """
+        Keys of stored files
+
+        Args:
+            older_than: Only files not written or re-put in this many seconds
+        """
+        cutoff = time.time() - older_than
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if _KEY.match(name) and os.path.getmtime(os.path.join(directory, name)) <= cutoff:
+                    yield name
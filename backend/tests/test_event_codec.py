@@ -0,0 +1,111 @@
+"""
+Tests for the event codecs and their use in persisted stores.
+"""
+import json
+from collections import OrderedDict, defaultdict
+from enum import Enum
+
+import aiosqlite
+import pytest
+
+from magi.events.codec import BinaryEventCodec, JsonEventCodec, decode_event, get_codec
+from magi.events.events import Event, EventLevel
+from magi.memory.raw_event_store import RawEventStore, decode_data_columns
+
+
+def make_event(**kwargs) -> Event:
+    defaults = dict(
+        type="UserMessage",
+        data={"message": "héllo", "n": [1, 2.5, None, True]},
+        source="chat",
+        level=EventLevel.WARNING,
+        metadata={"user_id": "u1"},
+    )
+    defaults.update(kwargs)
+    return Event(**defaults)
+
+
+@pytest.mark.parametrize("codec", [BinaryEventCodec(), JsonEventCodec()])
+def test_codec_round_trip(codec):
+    event = make_event()
+    decoded = decode_event(codec.encode(event))
+    assert decoded.to_dict() == event.to_dict()
+    assert decoded.level is EventLevel.WARNING
+
+
+def test_binary_codec_is_smaller_and_versioned():
+    event = make_event()
+    binary = BinaryEventCodec().encode(event)
+    assert binary[0] == 0x01
+    assert len(binary) < len(JsonEventCodec().encode(event))
+
+    with pytest.raises(ValueError):
+        BinaryEventCodec().decode(b"\x7f" + binary[1:])
+
+
+def test_binary_codec_encodes_mutations_after_decode():
+    codec = get_codec("binary")
+    payload = codec.encode(make_event(metadata={}))
+    decoded = codec.decode(payload)
+    assert decoded.metadata == {}
+
+    decoded.data["message"] = "changed"
+    decoded.metadata["seen"] = True
+    again = codec.decode(codec.encode(decoded))
+    assert again.data["message"] == "changed"
+    assert again.metadata == {"seen": True}
+
+
+def test_binary_codec_falls_back_to_json_body_for_non_builtin_types():
+    class Color(str, Enum):
+        RED = "red"
+
+    codec = get_codec("binary")
+    event = make_event(
+        data={"color": Color.RED, "ordered": OrderedDict(a=1), "groups": defaultdict(list, b=[2])},
+    )
+    payload = codec.encode(event)
+    assert payload[0] == 0x02
+    assert decode_event(payload).data == {"color": "red", "ordered": {"a": 1}, "groups": {"b": [2]}}
+
+    # plain builtin payloads keep the marshal body (and their tuples)
+    payload = codec.encode(make_event(data={"pair": (1, 2)}))
+    assert payload[0] == 0x01
+    assert decode_event(payload).data == {"pair": (1, 2)}
+
+
+def test_legacy_json_text_still_decodes():
+    event = make_event()
+    assert decode_event(json.dumps(event.to_dict())).to_dict() == event.to_dict()
+
+
+@pytest.mark.parametrize("codec", ["binary", "json"])
+async def test_raw_event_store_round_trip(tmp_path, codec):
+    store = RawEventStore(db_path=str(tmp_path / "events.db"), media_dir=str(tmp_path / "media"), codec=codec)
+    await store.init()
+    event = make_event()
+
+    event_id = await store.store(event)
+    loaded = await store.get_event(event_id)
+    assert loaded.to_dict() == event.to_dict()
+
+    async with aiosqlite.connect(str(tmp_path / "events.db")) as db:
+        cursor = await db.execute("SELECT data, metadata FROM event_store WHERE id = ?", (event_id,))
+        data, metadata = await cursor.fetchone()
+    assert decode_data_columns(data, metadata) == (event.data, event.metadata)
+
+
+async def test_raw_event_store_reads_legacy_json_rows(tmp_path):
+    store = RawEventStore(db_path=str(tmp_path / "events.db"), media_dir=str(tmp_path / "media"))
+    await store.init()
+    async with aiosqlite.connect(str(tmp_path / "events.db")) as db:
+        await db.execute(
+            "INSERT INTO event_store VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ("legacy", "UserMessage", json.dumps({"a": 1}), None, 1.0, "chat", 2, "c1", json.dumps({"m": 1}), 1.0),
+        )
+        await db.commit()
+
+    await store.store(make_event())
+    events = await store.get_events_by_type("UserMessage")
+    assert [e.data for e in events] == [make_event().data, {"a": 1}]
+    assert events[1].metadata == {"m": 1}
@@ -0,0 +1,182 @@
+"""
+Tests for the L2 event relation store and rule-based relation extraction.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from magi.events.events import BusinessEventTypes, Event, EventTypes
+from magi.memory import UnifiedMemoryStore
+from magi.memory.integration import MemoryIntegrationConfig, MemoryIntegrationModule
+from magi.memory.l2_event_relations import EventRelationStore
+
+
+def add(store: EventRelationStore, event_id: str, event_type: str = "UserMessage", **fields):
+    user_id = fields.pop("user_id", None)
+    data = {"user_id": user_id} if user_id else {}
+    store.add_event(event_id, {"id": event_id, "type": event_type, "data": data, **fields})
+
+
+def sources(store: EventRelationStore, event_id: str, relation_type: str) -> set:
+    return {
+        relation.source_event_id
+        for relation in store.get_relations(event_id, relation_type, direction="incoming")
+    }
+
+
+class TestIndexes:
+    def test_find_events_newest_first_and_intersected(self):
+        store = EventRelationStore()
+        add(store, "a", user_id="u1", correlation_id="c1")
+        add(store, "b", "AIResponse", user_id="u1", correlation_id="c1")
+        add(store, "c", user_id="u2", correlation_id="c1")
+        add(store, "d", user_id="u1")
+
+        assert store.find_events(user_id="u1") == ["d", "b", "a"]
+        assert store.find_events(user_id="u1", limit=2) == ["d", "b"]
+        assert store.find_events(correlation_id="c1", event_type="UserMessage") == ["c", "a"]
+        assert store.find_events(user_id="u1", correlation_id="c1", event_type="AIResponse") == ["b"]
+        assert store.find_events(user_id="nobody") == []
+        with pytest.raises(ValueError):
+            store.find_events()
+
+    def test_re_adding_an_event_moves_it_between_keys(self):
+        store = EventRelationStore()
+        add(store, "a", user_id="u1")
+        add(store, "a", user_id="u2")
+
+        assert store.find_events(user_id="u1") == []
+        assert store.find_events(user_id="u2") == ["a"]
+
+    def test_eviction_drops_index_entries_and_edges(self):
+        store = EventRelationStore()
+        add(store, "old", user_id="u1", correlation_id="c1")
+        add(store, "new", user_id="u1", correlation_id="c1")
+        store.add_relation("old", "new", "PRECEDE")
+        store.add_relation("new", "old", "RELATED")
+        store._events["old"]["timestamp"] = 0
+
+        store.clear_old_relations(older_than_days=1)
+
+        assert store.find_events(user_id="u1") == ["new"]
+        assert store.find_events(correlation_id="c1") == ["new"]
+        assert store.get_relations("new", direction="both") == []
+        assert "old" not in store._by_type.get("UserMessage", {})
+
+    def test_indexes_are_rebuilt_on_load(self, tmp_path):
+        path = str(tmp_path / "relations.pkl")
+        store = EventRelationStore(persist_path=path)
+        add(store, "a", user_id="u1", correlation_id="c1")
+        add(store, "b", user_id="u1")
+        store._save_to_disk()
+
+        loaded = EventRelationStore(persist_path=path)
+        assert loaded.find_events(user_id="u1") == ["b", "a"]
+        assert loaded.find_events(correlation_id="c1") == ["a"]
+
+    def test_save_if_due_is_throttled(self, tmp_path):
+        store = EventRelationStore(persist_path=str(tmp_path / "relations.pkl"), save_interval=3600)
+        assert not store.save_if_due()  # nothing changed yet
+
+        add(store, "a")
+        assert store.save_if_due()
+        add(store, "b")
+        assert not store.save_if_due()  # saved moments ago
+
+        store.save_interval = 0
+        assert store.save_if_due()
+        assert not store.save_if_due()
+
+
+class TestExtraction:
+    @pytest.fixture
+    def module(self):
+        store = EventRelationStore(user_window=3)
+        return MemoryIntegrationModule(SimpleNamespace(l2_relations=store), message_bus=None)
+
+    async def test_same_user_links_only_the_recent_window(self, module):
+        store = module.unified_memory.l2_relations
+        for seq in range(10):
+            await module._extract_l2_relations(
+                Event(type="UserMessage", data={"user_id": "u1", "seq": seq}), f"e{seq}"
+            )
+
+        assert sources(store, "e9", "SAME_user") == {"e6", "e7", "e8"}
+        assert sources(store, "e1", "SAME_user") == {"e0"}
+
+    async def test_correlated_events_are_linked(self, module):
+        store = module.unified_memory.l2_relations
+        await module._extract_l2_relations(
+            Event(type=EventTypes.PERCEPTION_RECEIVED, data={}, correlation_id="c1"), "received"
+        )
+        await module._extract_l2_relations(
+            Event(type="Other", data={}, correlation_id="c2"), "unrelated"
+        )
+        await module._extract_l2_relations(
+            Event(type=EventTypes.PERCEPTION_PROCESSED, data={}, correlation_id="c1"), "processed"
+        )
+
+        assert sources(store, "processed", "PRECEDE") == {"received"}
+        assert sources(store, "processed", "TRIGGER") == {"received"}
+
+    def test_batch_extraction_uses_the_user_index(self):
+        store = EventRelationStore(user_window=2)
+        events = [
+            {"id": f"m{seq}", "type": "UserMessage", "data": {"user_id": "u1"}} for seq in range(5)
+        ] + [
+            {"id": "other", "type": "UserMessage", "data": {"user_id": "u2"}},
+            {"id": "call", "type": "LLMCall", "data": {"user_id": "u1", "tools": ["search"]}},
+            {"id": "tool", "type": "ToolExecution", "data": {"user_id": "u1", "tool": "search"}},
+        ]
+
+        store.extract_relations_from_events(events)
+
+        assert sources(store, "m4", "SAME_context") == {"m2", "m3"}
+        assert sources(store, "call", "TRIGGER") == {"m3", "m4"}
+        assert sources(store, "tool", "TRIGGER") == {"call"}
+
+
+class TestHandleEvent:
+    @pytest.fixture
+    async def module(self, tmp_path):
+        (tmp_path / "memories").mkdir()
+        memory = UnifiedMemoryStore(
+            db_path=str(tmp_path / "events.db"),
+            persist_dir=str(tmp_path / "memories"),
+            enable_embeddings=False,
+            enable_summaries=False,
+            enable_capabilities=False,
+        )
+        memory.l2_relations.user_window = 2
+        config = MemoryIntegrationConfig(
+            enable_l3_embeddings=False, enable_l4_summaries=False, enable_l5_capabilities=False
+        )
+        yield MemoryIntegrationModule(memory, message_bus=None, config=config)
+        await memory.close()
+
+    async def test_bus_events_reach_l1_and_l2(self, module):
+        for seq in range(4):
+            await module._handle_event(Event(
+                type=EventTypes.USER_MESSAGE,
+                data={"user_id": "u1", "message": f"hello {seq}"},
+                source="chat",
+                correlation_id=f"turn-{seq}",
+            ))
+        await module._handle_event(Event(
+            type=EventTypes.PERCEPTION_RECEIVED, data={"user_id": "u2"}, correlation_id="turn-4",
+        ))
+
+        stats = module.get_statistics()
+        memory = module.unified_memory
+        await memory.l1_raw.flush()
+        assert stats["events_processed"] == 5
+        assert stats["events_failed"] == 0
+        assert stats["l1_stored"] == 4
+        assert stats["l1_filtered"] == 1
+        assert memory.l1_raw.count(BusinessEventTypes.USER_INPUT) == 4
+
+        store = memory.l2_relations
+        assert sources(store, "turn-3", "SAME_user") == {"turn-1", "turn-2"}
+        assert store.find_events(user_id="u1", event_type=EventTypes.USER_MESSAGE) == [
+            "turn-3", "turn-2", "turn-1", "turn-0"
+        ]
@@ -0,0 +1,73 @@
+"""
+Tests for the Event structure and time-ordered ids.
+"""
+import copy
+import pickle
+import time
+
+from magi.events.events import Event, EventLevel
+from magi.events.ids import event_id_timestamp, new_event_id
+
+
+def test_event_ids_are_time_ordered_and_unique():
+    ids = [new_event_id() for _ in range(5000)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(i) == 26 for i in ids)
+
+    earlier = new_event_id(1_000_000.0)
+    assert earlier < ids[0]
+    assert event_id_timestamp(earlier) == 1_000_000.0
+    assert abs(event_id_timestamp(ids[-1]) - time.time()) < 5
+
+
+def test_event_allocates_metadata_and_correlation_id_lazily():
+    event = Event(type="LoopPhaseStarted", data={"phase": "sense"}, timestamp=1234.5)
+    assert event._metadata is None and event._correlation_id is None
+    assert not event.has_metadata
+    assert not hasattr(event, "__dict__")
+
+    correlation_id = event.correlation_id
+    assert event.correlation_id == correlation_id
+    assert event_id_timestamp(correlation_id) == 1234.5
+
+    event.metadata["user_id"] = "u1"
+    assert event.has_metadata
+    assert event.to_dict()["metadata"] == {"user_id": "u1"}
+
+
+def test_event_dict_round_trip_is_compatible():
+    event = Event(
+        type="UserMessage",
+        data={"message": "hi"},
+        source="chat",
+        level=EventLevel.WARNING,
+        correlation_id="abc",
+        metadata={"k": "v"},
+    )
+    restored = Event.from_dict(event.to_dict())
+    assert restored == event
+    assert restored.level is EventLevel.WARNING
+    assert restored.to_dict() == {
+        "type": "UserMessage",
+        "data": {"message": "hi"},
+        "timestamp": event.timestamp,
+        "source": "chat",
+        "level": 2,
+        "correlation_id": "abc",
+        "metadata": {"k": "v"},
+    }
+    assert Event.from_dict({"type": "Ping", "data": None}).metadata == {}
+
+
+def test_copies_and_pickles_share_the_lazy_correlation_id():
+    event = Event(type="UserMessage", data={"text": "hi"}, metadata={"user_id": "u1"})
+    assert event._correlation_id is None
+
+    deep = copy.deepcopy(event)
+    assert deep == event
+    assert deep.data is not event.data
+    assert copy.copy(event).correlation_id == event.correlation_id
+    assert pickle.loads(pickle.dumps(event)) == event
+
+    assert copy.deepcopy(Event(type="Tick", data=None)).level is EventLevel.INFO
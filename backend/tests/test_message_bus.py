@@ -0,0 +1,565 @@
+"""
+Tests for the in-memory message bus backends and shared bus machinery.
+"""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from magi.events.coalesce import CoalescePolicy
+from magi.events.dispatch import DispatchTable
+from magi.events.enhanced_backend import EnhancedMemoryMessageBackend
+from magi.events.events import Event, EventLevel
+from magi.events.executors import HandlerExecutors
+from magi.events.fair_queue import FairEventQueue
+from magi.events.histogram import LatencyHistogram
+from magi.events.memory_backend import MemoryMessageBackend
+from magi.events.scheduler import TimerWheel
+from magi.events.topics import TopicTrie
+from magi.events.wakeup import WorkerWakeup
+
+
+def double_in_worker(event):
+    """Process-mode handler (module level so it pickles by reference)."""
+    return os.getpid(), event.data * 2
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.001)
+
+
+async def test_wakeup_notify_wakes_exactly_one_waiter():
+    wakeup = WorkerWakeup()
+    woken = []
+
+    async def waiter(i):
+        await wakeup.wait()
+        woken.append(i)
+
+    tasks = [asyncio.create_task(waiter(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    assert wakeup.idle_workers == 3
+
+    wakeup.notify()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert len(woken) == 1
+    assert wakeup.idle_workers == 2
+
+    wakeup.notify(2)
+    await asyncio.gather(*tasks)
+    assert sorted(woken) == [0, 1, 2]
+
+
+async def test_wakeup_keeps_token_when_no_worker_is_idle():
+    wakeup = WorkerWakeup()
+    wakeup.notify()
+    assert await wakeup.wait(timeout=0.01)
+    assert not await wakeup.wait(timeout=0.01)
+
+
+@pytest.mark.parametrize("backend_cls", [MemoryMessageBackend, EnhancedMemoryMessageBackend])
+async def test_idle_worker_is_woken_by_publish(backend_cls):
+    backend = backend_cls()
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(time.monotonic()))
+    await backend.start()
+    await asyncio.sleep(0.05)  # let every worker go idle
+
+    published_at = time.monotonic()
+    assert await backend.publish(Event(type="Ping", data=None))
+    await wait_until(lambda: received)
+    await backend.stop()
+
+    # well below the previous 100 ms polling interval
+    assert received[0] - published_at < 0.05
+
+
+def make_subscription(sub_id, handler, mode="broadcast", event_type="Ping", filter_func=None):
+    return {
+        "id": sub_id,
+        "event_type": event_type,
+        "handler": handler,
+        "mode": mode,
+        "filter_func": filter_func,
+    }
+
+
+async def test_dispatch_table_compiles_routes_on_subscribe_and_unsubscribe():
+    stats = {"processed_count": 0, "error_count": 0}
+    table = DispatchTable(stats)
+    calls = []
+
+    async def async_handler(event):
+        calls.append("async")
+
+    table.add(make_subscription("a", async_handler))
+    table.add(make_subscription("b", lambda event: calls.append("sync")))
+    table.add(make_subscription("c", lambda event: calls.append("competing"), mode="competing"))
+
+    route = table.route("Ping")
+    assert [s["id"] for s in route.broadcast] == ["a", "b"]
+    assert [s["id"] for s in route.competing] == ["c"]
+    assert [s["is_async"] for s in route.broadcast] == [True, False]
+
+    await table.dispatch(Event(type="Ping", data=None))
+    await table.join()
+    assert sorted(calls) == ["async", "competing", "sync"]
+    assert stats["processed_count"] == 3
+
+    assert table.remove("a")["id"] == "a"
+    assert [s["id"] for s in table.route("Ping").broadcast] == ["b"]
+    table.remove("b")
+    table.remove("c")
+    assert table.route("Ping") is None
+    assert table.event_types() == []
+    assert table.remove("c") is None
+    await table.close()
+
+
+async def test_dispatch_table_round_robin_and_error_isolation():
+    stats = {"processed_count": 0, "error_count": 0}
+    table = DispatchTable(stats)
+    received = []
+
+    def failing(event):
+        raise RuntimeError("boom")
+
+    table.add(make_subscription("bad", failing))
+    for name in ("r1", "r2"):
+        table.add(make_subscription(name, lambda event, name=name: received.append(name), mode="round_robin"))
+
+    for _ in range(4):
+        await table.dispatch(Event(type="Ping", data=None))
+    await table.join()
+    await table.close()
+
+    assert sorted(received) == ["r1", "r1", "r2", "r2"]
+    assert stats == {"processed_count": 4, "error_count": 4}
+    assert table.mode_counts["round_robin"] == 4
+
+
+async def test_slow_broadcast_subscriber_does_not_stall_others():
+    backend = MemoryMessageBackend(num_workers=1)
+    release = asyncio.Event()
+    fast = []
+
+    async def slow_handler(event):
+        await release.wait()
+
+    await backend.subscribe("Ping", slow_handler)
+    await backend.subscribe("Ping", lambda event: fast.append(event.data))
+    await backend.start()
+
+    for i in range(5):
+        await backend.publish(Event(type="Ping", data=i))
+    await wait_until(lambda: len(fast) == 5)
+
+    stats = (await backend.get_stats())["subscriptions"]
+    assert sorted(s["pending"] + s["in_flight"] for s in stats.values()) == [0, 5]
+
+    release.set()
+    await backend.stop()
+    stats = await backend.get_stats()
+    assert stats["processed_count"] == 10
+    assert all(s["handled"] == 5 for s in stats["subscriptions"].values())
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [("drop_newest", [0, 1, 2]), ("drop_oldest", [0, 3, 4])],
+)
+async def test_mailbox_overflow_policies(policy, expected):
+    backend = MemoryMessageBackend(num_workers=1)
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(event):
+        handled.append(event.data)
+        await release.wait()
+
+    sub_id = await backend.subscribe("Ping", handler, max_pending=2, overflow_policy=policy)
+    await backend.start()
+
+    await backend.publish(Event(type="Ping", data=0))
+    await wait_until(lambda: handled)  # 0 is in flight, the mailbox is empty
+    for i in range(1, 5):
+        await backend.publish(Event(type="Ping", data=i))
+    await wait_until(lambda: not backend._queue)
+
+    release.set()
+    await backend.stop()
+    assert handled == expected
+    stats = (await backend.get_stats())["subscriptions"][sub_id]
+    assert stats["dropped"] == 5 - len(expected)
+    assert stats["handler_max_ms"] > 0
+
+
+async def test_mailbox_concurrency_runs_handlers_in_parallel():
+    backend = MemoryMessageBackend(num_workers=1)
+    running = 0
+    peak = 0
+
+    async def handler(event):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await backend.subscribe("Ping", handler, concurrency=4)
+    await backend.start()
+    for i in range(8):
+        await backend.publish(Event(type="Ping", data=i))
+    await backend.stop()
+
+    assert peak == 4
+    assert (await backend.get_stats())["processed_count"] == 8
+
+
+def test_topic_trie_matches_prefix_hierarchical_and_catch_all_patterns():
+    trie = TopicTrie()
+    for pattern in ("Task*", "Loop.*", "*", "Agent.*.Failed", "Loop.Phase*"):
+        trie.add(pattern, pattern)
+
+    assert sorted(trie.match("TaskStarted")) == ["*", "Task*"]
+    assert sorted(trie.match("Loop.Started")) == ["*", "Loop.*"]
+    assert sorted(trie.match("Loop.PhaseStarted")) == ["*", "Loop.*", "Loop.Phase*"]
+    assert sorted(trie.match("Loop.Phase.Started")) == ["*", "Loop.*", "Loop.Phase*"]
+    assert sorted(trie.match("Agent.Tool.Failed")) == ["*", "Agent.*.Failed"]
+    assert trie.match("Agent.Tool.Failed.Again") == ["*"]
+    assert trie.match("LoopStarted") == ["*"]
+
+    assert trie.remove("Loop.*", "Loop.*")
+    assert not trie.remove("Loop.*", "Loop.*")
+    assert sorted(trie.match("Loop.Started")) == ["*"]
+    assert len(trie) == 4
+
+    with pytest.raises(ValueError):
+        trie.add("Ta*sk", "bad")
+
+
+async def test_dispatch_table_wildcard_routes_are_cached_and_invalidated():
+    table = DispatchTable({"processed_count": 0, "error_count": 0})
+    table.add(make_subscription("exact", lambda e: None, event_type="TaskStarted"))
+    table.add(make_subscription("tasks", lambda e: None, event_type="Task*"))
+
+    route = table.route("TaskStarted")
+    assert [s["id"] for s in route.broadcast] == ["exact", "tasks"]
+    assert table.route("TaskStarted") is route  # cached per concrete type
+    assert table.route("UserMessage") is None
+
+    table.add(make_subscription("all", lambda e: None, event_type="*", mode="competing"))
+    assert [s["id"] for s in table.route("UserMessage").competing] == ["all"]
+    assert [s["id"] for s in table.route("TaskStarted").broadcast] == ["exact", "tasks"]
+
+    table.remove("tasks")
+    assert [s["id"] for s in table.route("TaskStarted").broadcast] == ["exact"]
+    assert table.patterns() == ["*"]
+    assert table.event_types() == ["TaskStarted"]
+    await table.close()
+
+
+async def test_memory_backend_wildcard_subscription():
+    backend = MemoryMessageBackend()
+    received = []
+    await backend.subscribe("Task*", lambda event: received.append(event.type))
+    await backend.start()
+
+    for event_type in ("TaskCreated", "UserMessage", "TaskFailed"):
+        await backend.publish(Event(type=event_type, data=None))
+    await backend.stop()
+
+    assert sorted(received) == ["TaskCreated", "TaskFailed"]
+
+
+async def test_memory_publish_many_reports_drop_policy_per_event():
+    backend = MemoryMessageBackend(max_queue_size=2, drop_policy="reject")
+    results = await backend.publish_many([Event(type="Ping", data=i) for i in range(4)])
+    assert results == [True, True, False, False]
+
+    backend = MemoryMessageBackend(max_queue_size=2, drop_policy="lowest_priority")
+    results = await backend.publish_many([
+        Event(type="Ping", data=0, level=EventLevel.INFO),
+        Event(type="Ping", data=1, level=EventLevel.INFO),
+        Event(type="Ping", data=2, level=EventLevel.DEBUG),
+        Event(type="Ping", data=3, level=EventLevel.ERROR),
+    ])
+    assert results == [True, True, False, True]
+    assert sorted(event.data for *_, event in backend._queue) == [1, 3]
+    assert (await backend.get_stats())["dropped_count"] == 2
+
+
+@pytest.mark.parametrize("backend_cls", [MemoryMessageBackend, EnhancedMemoryMessageBackend])
+async def test_publish_many_delivers_batch_in_order(backend_cls):
+    backend = backend_cls(num_workers=1)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.start()
+
+    results = await backend.publish_many([Event(type="Ping", data=i) for i in range(5)])
+    await wait_until(lambda: len(received) == 5)
+    await backend.stop()
+
+    assert results == [True] * 5
+    assert received == [0, 1, 2, 3, 4]
+    assert backend._stats["published_count"] == 5
+
+
+async def test_timer_wheel_cascades_and_cancels():
+    released = []
+
+    async def on_due(items):
+        released.extend(items)
+
+    # tiny wheel so the timers below land in level 1, level 2 and overflow
+    wheel = TimerWheel(on_due, tick=0.005, wheel_size=4, levels=2)
+    now = time.time()
+    for delay in (0.3, 0.01, 0.12, 0.05):
+        wheel.add(delay, now + delay)
+    cancelled = wheel.add("cancelled", now + 0.02)
+    assert wheel.cancel(cancelled)
+    assert not wheel.cancel(cancelled)
+
+    await wheel.start()
+    await wait_until(lambda: len(released) == 4)
+    await wheel.stop()
+
+    assert released == [0.01, 0.05, 0.12, 0.3]
+    assert len(wheel) == 0
+
+
+async def test_timer_wheel_recurring_timer_does_not_drift():
+    fired = []
+
+    async def on_due(items):
+        fired.extend(items)
+
+    wheel = TimerWheel(on_due, tick=0.005)
+    start = time.time()
+    timer_id = wheel.add_recurring(time.time, 0.02, start_at=start)
+    await wheel.start()
+    await wait_until(lambda: len(fired) >= 5)
+    wheel.cancel(timer_id)
+    await wheel.stop()
+
+    # fixed-rate: the fifth occurrence is due 80 ms after the first
+    assert fired[4] - start >= 0.08
+    assert fired[4] - start < 0.08 + 0.05
+
+
+@pytest.mark.parametrize("backend_cls", [MemoryMessageBackend, EnhancedMemoryMessageBackend])
+async def test_delayed_publish_is_held_until_due(backend_cls):
+    backend = backend_cls()
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append((event.data, time.time())))
+    await backend.start()
+
+    deliver_at = time.time() + 0.1
+    assert await backend.publish(Event(type="Ping", data="later"), deliver_at=deliver_at)
+    assert await backend.publish(Event(type="Ping", data="now"))
+    await wait_until(lambda: len(received) == 2)
+    await backend.stop()
+
+    assert [data for data, _ in received] == ["now", "later"]
+    assert received[1][1] >= deliver_at
+
+
+async def test_recurring_schedule_publishes_fresh_events():
+    backend = MemoryMessageBackend()
+    received = []
+    await backend.subscribe("Tick", lambda event: received.append(event))
+    await backend.start()
+
+    schedule_id = await backend.schedule(Event(type="Tick", data={"n": 1}), interval=0.02)
+    await wait_until(lambda: len(received) >= 3)
+    assert await backend.cancel_schedule(schedule_id)
+    assert (await backend.get_stats())["scheduled_count"] == 0
+    await backend.stop()
+
+    assert all(event.data == {"n": 1} for event in received)
+    assert len({event.correlation_id for event in received}) == len(received)
+
+
+def test_fair_queue_interleaves_types_and_ages_priorities():
+    queue = FairEventQueue(aging_interval=0.05)
+    for i in range(20):
+        queue.push(Event(type="LoopPhaseCompleted", data=i, level=EventLevel.WARNING))
+    queue.push(Event(type="UserMessage", data="hi", level=EventLevel.INFO))
+
+    # the sparse type is served right away, not after the whole flood
+    order = [queue.pop().type for _ in range(3)]
+    assert "UserMessage" in order
+    assert len(queue) == 18
+
+    # within one type, an INFO event that waited overtakes fresh WARNING events
+    queue = FairEventQueue(aging_interval=0.05)
+    queue.push(Event(type="Sensor", data="old", level=EventLevel.INFO))
+    time.sleep(0.06)
+    queue.push(Event(type="Sensor", data="new", level=EventLevel.WARNING))
+    assert queue.pop().data == "old"
+    assert queue.get_stats()["Sensor"]["max_wait_ms"] >= 60
+
+
+@pytest.mark.parametrize("backend_cls", [MemoryMessageBackend, EnhancedMemoryMessageBackend])
+async def test_fair_scheduling_sheds_the_most_backlogged_type(backend_cls):
+    backend = backend_cls(max_queue_size=10, scheduling="fair")
+    for i in range(10):
+        assert await backend.publish(Event(type="Flood", data=i, level=EventLevel.WARNING))
+
+    # the flooding type is refused, another type evicts one of its events
+    assert not await backend.publish(Event(type="Flood", data=10, level=EventLevel.WARNING))
+    assert await backend.publish(Event(type="UserMessage", data="hi"))
+
+    received = []
+    await backend.subscribe("Flood", lambda event: received.append(event.type))
+    await backend.subscribe("UserMessage", lambda event: received.append(event.type))
+    await backend.start()
+    await wait_until(lambda: len(received) == 10)
+    stats = backend.get_stats()
+    if asyncio.iscoroutine(stats):
+        stats = await stats
+    await backend.stop()
+
+    assert received.count("UserMessage") == 1
+    wait = stats["queue_wait"] if "queue_wait" in stats else stats["queue_stats"]["types"]
+    assert wait["Flood"]["dequeued"] == 9 and wait["Flood"]["dropped"] == 2
+
+
+async def test_coalescing_policies_report_what_they_fold():
+    backend = MemoryMessageBackend()
+    latest, totals, sampled = [], [], []
+    await backend.subscribe("LoopPhaseCompleted", latest.append, coalesce=CoalescePolicy.latest(0.05))
+    await backend.subscribe("LoopPhaseCompleted", lambda e: totals.append(e.data), coalesce=CoalescePolicy.aggregate(0.05, sum))
+    await backend.subscribe("LoopPhaseCompleted", sampled.append, coalesce=CoalescePolicy.sample(4))
+    await backend.start()
+
+    await backend.publish_many([Event(type="LoopPhaseCompleted", data=i) for i in range(10)])
+    await wait_until(lambda: latest and totals)
+    stats = (await backend.get_stats())["subscriptions"]
+    await backend.stop()
+
+    assert [e.data for e in latest] == [9]
+    assert latest[0].metadata["coalesced"]["count"] == 10
+    assert totals == [45]
+    assert [e.data for e in sampled] == [3, 7]
+    assert all(e.metadata["coalesced"]["count"] == 4 for e in sampled)
+    assert sorted(s["coalesced"] for s in stats.values()) == [8, 9, 9]
+
+
+async def test_coalesced_events_complete_once_the_window_was_handled():
+    table = DispatchTable({"processed_count": 0, "error_count": 0})
+    handled, completed = [], []
+    table.add({
+        "id": "s1", "event_type": "Sensor", "handler": handled.append, "mode": "broadcast",
+        "filter_func": None, "coalesce": CoalescePolicy.latest(0.05),
+    })
+
+    for i in range(3):
+        await table.dispatch(Event(type="Sensor", data=i), on_complete=lambda i=i: completed.append(i))
+    assert completed == [] and handled == []
+
+    await table.join()
+    await table.close()
+    # flushed on join: the held events complete (ack) together after the handler ran
+    assert [e.data for e in handled] == [2]
+    assert sorted(completed) == [0, 1, 2]
+
+
+def test_latency_histogram_percentiles_are_within_bucket_error():
+    histogram = LatencyHistogram()
+    for micros in range(1, 10001):
+        histogram.record(micros / 1e6)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 10000
+    for q, expected_ms in ((0.50, 5.0), (0.95, 9.5), (0.99, 9.9)):
+        assert abs(histogram.percentile(q) - expected_ms) / expected_ms < 0.07
+    assert snapshot["max_ms"] == 10.0
+    assert LatencyHistogram().snapshot()["p99_ms"] == 0.0
+
+
+@pytest.mark.parametrize("backend_cls", [MemoryMessageBackend, EnhancedMemoryMessageBackend])
+async def test_stats_report_queue_wait_and_handler_percentiles(backend_cls):
+    backend = backend_cls()
+
+    async def slow(event):
+        await asyncio.sleep(0.01)
+
+    subscription_id = await backend.subscribe("Ping", slow)
+    await backend.start()
+    await backend.publish_many([Event(type="Ping", data=i) for i in range(5)])
+    await wait_until(lambda: backend._stats["processed_count"] == 5)
+    stats = backend.get_stats()
+    if asyncio.iscoroutine(stats):
+        stats = await stats
+    await backend.stop()
+
+    ping = stats["latency"]["Ping"]
+    assert ping["queue_wait"]["count"] == 5
+    assert ping["handler"]["count"] == 5 and ping["handler"]["p50_ms"] >= 9
+    subscription = stats["subscriptions"][subscription_id]
+    # the mailbox runs one handler at a time: the last event waited for four
+    assert subscription["queue_wait"]["max_ms"] >= 35
+    assert subscription["handler"]["p99_ms"] >= 9
+
+
+async def test_thread_and_process_handlers_return_results_off_the_loop():
+    executors = HandlerExecutors(thread_workers=2, process_workers=2, max_queued=4)
+    backend = MemoryMessageBackend()
+    backend._dispatch._executors = executors
+    thread_results, process_results = [], []
+
+    def in_thread(event):
+        return threading.get_ident()
+
+    async def collect(event, result):
+        process_results.append(result)
+
+    await backend.subscribe(
+        "Work", in_thread, execution="thread",
+        on_result=lambda event, result: thread_results.append(result),
+    )
+    process_id = await backend.subscribe(
+        "Work", double_in_worker, execution="process", on_result=collect, concurrency=4,
+    )
+    await backend.start()
+    try:
+        await backend.publish_many([Event(type="Work", data=i) for i in range(8)])
+        await wait_until(lambda: len(process_results) == 8 and len(thread_results) == 8, timeout=60)
+        stats = await backend.get_stats()
+    finally:
+        await backend.stop()
+        executors.shutdown()
+
+    assert threading.get_ident() not in thread_results
+    assert os.getpid() not in {pid for pid, _ in process_results}
+    assert sorted(doubled for _, doubled in process_results) == [i * 2 for i in range(8)]
+    assert stats["subscriptions"][process_id]["execution"] == "process"
+    execution = stats["execution"]
+    assert execution["subscriptions"] == {"inline": 0, "thread": 1, "process": 1}
+    assert execution["pools"]["process"]["completed"] == 8
+    assert execution["pools"]["process"]["in_flight"] == 0
+    assert "p99_ms" in execution["loop_lag"]
+
+
+async def test_execution_mode_is_validated_on_subscribe():
+    backend = MemoryMessageBackend()
+
+    async def async_handler(event):
+        pass
+
+    with pytest.raises(ValueError):
+        await backend.subscribe("Work", async_handler, execution="process")
+    with pytest.raises(ValueError):
+        await backend.subscribe("Work", lambda event: None, execution="process")
+    with pytest.raises(ValueError):
+        await backend.subscribe("Work", double_in_worker, execution="elsewhere")
+    assert len(backend._dispatch) == 0
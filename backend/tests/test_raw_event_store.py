@@ -0,0 +1,390 @@
+"""
+Tests for the L1 raw event store.
+"""
+import os
+import time
+
+import aiosqlite
+import pytest
+
+from magi.events.events import Event, EventLevel
+from magi.memory.event_segments import EventSegment, write_segment
+from magi.memory.raw_event_store import RawEventStore, decode_cursor, encode_cursor
+
+
+def make_event(seq: int = 0, event_type: str = "UserMessage") -> Event:
+    return Event(
+        type=event_type,
+        data={"seq": seq},
+        timestamp=1000.0 + seq,
+        source="chat",
+        level=EventLevel.INFO,
+    )
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = RawEventStore(
+        db_path=str(tmp_path / "events.db"),
+        media_dir=str(tmp_path / "media"),
+        write_batch_size=8,
+        write_max_delay=10.0,  # only full batches, reads and close() flush
+    )
+    await store.init()
+    yield store
+    await store.close()
+
+
+async def count_rows(db_path: str) -> int:
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM event_store")
+        return (await cursor.fetchone())[0]
+
+
+async def test_store_batches_writes_on_a_wal_connection(store):
+    async with aiosqlite.connect(store.db_path) as db:
+        cursor = await db.execute("PRAGMA journal_mode")
+        assert (await cursor.fetchone())[0] == "wal"
+
+    for seq in range(20):
+        await store.store(make_event(seq))
+    stats = store.get_stats()
+    assert stats["stored_count"] == 20
+    assert stats["pending"] >= 4  # the partial batch waits for the next flush
+
+    await store.flush()
+    stats = store.get_stats()
+    assert stats["pending"] == 0
+    assert stats["written_count"] == 20
+    assert stats["write_batches"] < 20
+    assert await count_rows(store.db_path) == 20
+
+
+async def test_reads_see_buffered_events(store):
+    event_id = await store.store(make_event(1))
+    await store.store(make_event(2, "TaskCompleted"))
+
+    assert (await store.get_event(event_id)).data == {"seq": 1}
+    assert [e.data for e in await store.get_events_by_type("TaskCompleted")] == [{"seq": 2}]
+    assert len(await store.get_events_by_time_range(1000.0, 1010.0)) == 2
+
+
+async def test_close_flushes_the_buffer(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    store = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"), write_max_delay=10.0)
+    await store.init()
+    for seq in range(5):
+        await store.store(make_event(seq))
+    assert await count_rows(db_path) == 0
+
+    await store.close()
+    assert await count_rows(db_path) == 5
+
+    # stores after close reopen the connection
+    await store.store(make_event(5))
+    assert len(await store.get_events_by_type("UserMessage", limit=10)) == 6
+    await store.close()
+
+
+async def test_max_pending_applies_backpressure(tmp_path):
+    store = RawEventStore(
+        db_path=str(tmp_path / "events.db"),
+        media_dir=str(tmp_path / "media"),
+        write_batch_size=4,
+        write_max_delay=10.0,
+        max_pending=4,
+    )
+    for seq in range(10):
+        await store.store(make_event(seq))
+        assert store.get_stats()["pending"] < 4
+    await store.close()
+    assert await count_rows(str(tmp_path / "events.db")) == 10
+
+
+async def test_keyset_pages_forward_and_back(store):
+    for seq in range(10):
+        await store.store(make_event(seq))
+    # a timestamp tie: the id orders it
+    await store.store(make_event(9, "TaskCompleted"))
+
+    seen = []
+    page = await store.page(limit=4)
+    assert page["prev_cursor"] is None
+    pages = [page]
+    while page["next_cursor"]:
+        page = await store.page(limit=4, before=page["next_cursor"])
+        pages.append(page)
+    for page in pages:
+        seen.extend(event.timestamp for _, event in page["events"])
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == 11 and [len(p["events"]) for p in pages] == [4, 4, 3]
+
+    # back from the last page to the first
+    newer = await store.page(limit=4, after=pages[-1]["prev_cursor"])
+    assert [i for i, _ in newer["events"]] == [i for i, _ in pages[1]["events"]]
+    newest = await store.page(limit=4, after=newer["prev_cursor"])
+    assert [i for i, _ in newest["events"]] == [i for i, _ in pages[0]["events"]]
+    assert newest["prev_cursor"] is None
+
+    typed = await store.page(event_type="TaskCompleted")
+    assert [event.type for _, event in typed["events"]] == ["TaskCompleted"]
+
+
+async def test_browsing_queries_use_the_composite_indexes(store):
+    before = encode_cursor(1005.0, "x")
+    async with aiosqlite.connect(store.db_path) as db:
+        for sql, params, index in [
+            ("SELECT * FROM event_store WHERE type = ? AND (timestamp, id) < (?, ?) "
+             "ORDER BY timestamp DESC, id DESC LIMIT 5", ("UserMessage", *decode_cursor(before)),
+             "idx_event_store_type_time"),
+            ("SELECT * FROM event_store ORDER BY timestamp DESC, id DESC LIMIT 5", (),
+             "idx_event_store_time"),
+        ]:
+            cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(row[3] for row in await cursor.fetchall())
+            assert index in plan and "TEMP B-TREE" not in plan
+
+
+async def test_counts_are_incremental_and_persisted(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    store = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"))
+    await store.init()
+    for seq in range(3):
+        await store.store(make_event(seq))
+    await store.store(make_event(3, "TaskCompleted"))
+    assert store.count() == 0  # counts follow commits
+    await store.flush()
+    assert store.count() == 4
+    assert store.type_counts() == {"UserMessage": 3, "TaskCompleted": 1}
+    await store.close()
+
+    reopened = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"))
+    await reopened.init()
+    assert reopened.count("UserMessage") == 3 and reopened.count("Missing") == 0
+    await reopened.close()
+
+    # a store from before the counts table is counted once on upgrade
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("DROP TABLE event_store_counts")
+        await db.commit()
+    upgraded = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"))
+    await upgraded.init()
+    assert upgraded.count() == 4
+    await upgraded.close()
+
+
+async def test_malformed_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        await store.page(before=encode_cursor(1.0, "a"), after=encode_cursor(2.0, "b"))
+
+
+def days_ago(days: float, seq: int = 0) -> Event:
+    return Event(
+        type="TaskCompleted" if seq % 3 == 0 else "UserMessage",
+        data={"seq": seq},
+        timestamp=(time.time() // 86400 - days) * 86400 + 43200 + seq,  # noon UTC
+        source="chat",
+    )
+
+
+async def test_old_days_are_sealed_and_read_with_hot_rows(tmp_path):
+    store = RawEventStore(
+        db_path=str(tmp_path / "events.db"), media_dir=str(tmp_path / "media"), hot_days=7,
+    )
+    ids = {}
+    for days in (30, 20, 10, 1):
+        for seq in range(5):
+            ids[(days, seq)] = await store.store(days_ago(days, seq))
+
+    assert await store.seal() == 15
+    stats = store.get_stats()
+    assert stats["segments"] == 3 and stats["cold_count"] == 15 and stats["total"] == 20
+    assert await count_rows(store.db_path) == 5
+    for segment in os.listdir(store.segment_dir):
+        assert os.stat(os.path.join(store.segment_dir, segment)).st_mode & 0o222 == 0
+
+    # one newest-first sequence across the hot table and the segments, both ways
+    pages = [await store.page(limit=6)]
+    while pages[-1]["next_cursor"]:
+        pages.append(await store.page(limit=6, before=pages[-1]["next_cursor"]))
+    seen = [event.timestamp for page in pages for _, event in page["events"]]
+    assert len(seen) == 20 and seen == sorted(seen, reverse=True)
+    back = await store.page(limit=6, after=pages[-1]["prev_cursor"])
+    assert [i for i, _ in back["events"]] == [i for i, _ in pages[-2]["events"]]
+
+    typed = await store.get_events_by_type("TaskCompleted", limit=100)
+    assert len(typed) == 8
+    today = time.time() // 86400 * 86400
+    window = await store.get_events_by_time_range(today - 21 * 86400, today - 15 * 86400)
+    assert sorted(e.data["seq"] for e in window) == list(range(5))
+
+    cold = await store.get_event(ids[(30, 2)])
+    assert cold.data == {"seq": 2}
+    await store.close()
+
+
+async def test_late_events_are_merged_into_the_sealed_day(tmp_path):
+    store = RawEventStore(
+        db_path=str(tmp_path / "events.db"), media_dir=str(tmp_path / "media"), hot_days=7,
+    )
+    for seq in range(3):
+        await store.store(days_ago(30, seq))
+    await store.seal()
+    first = os.listdir(store.segment_dir)
+
+    late_id = await store.store(days_ago(30, 10))
+    assert (await store.get_event(late_id)).data == {"seq": 10}  # still hot
+    assert await store.seal() == 1
+    second = os.listdir(store.segment_dir)
+    assert len(second) == 1 and second != first
+    assert store.get_stats()["cold_count"] == 4
+    await store.close()
+
+    reopened = RawEventStore(db_path=str(tmp_path / "events.db"), media_dir=str(tmp_path / "media"))
+    assert [e.data["seq"] for e in await reopened.get_events_by_type("UserMessage")] == [10, 2, 1]
+    assert (await reopened.get_event(late_id)).data == {"seq": 10}
+    await reopened.close()
+
+
+def test_segment_blocks_are_pruned(tmp_path):
+    rows = [
+        (f"id{seq:04d}", "A" if seq < 50 else "B", b"data", None, float(seq), "s", 1, None, None, 0.0)
+        for seq in range(100)
+    ]
+    path = str(tmp_path / "day.seg")
+    index = write_segment(path, rows, block_rows=10)
+    assert index["count"] == 100 and index["types"] == {"A": 50, "B": 50}
+
+    segment = EventSegment(path)
+    read = []
+    segment.read_block = lambda number, read_block=segment.read_block: read.append(number) or read_block(number)
+    assert [row[0] for row in segment.rows(event_type="B", end_time=55.0)] == [f"id{s:04d}" for s in range(50, 56)]
+    assert read == [5]
+    read.clear()
+    newest = list(segment.rows(descending=True, before=(25.0, "id0025")))
+    assert newest[0][0] == "id0024" and len(newest) == 25
+    assert read == [2, 1, 0]
+
+
+def text_event(text: str, event_type: str = "UserMessage", correlation_id: str = None, **data) -> Event:
+    return Event(type=event_type, data={"text": text, **data}, source="chat", correlation_id=correlation_id)
+
+
+async def test_keyword_search_ranks_with_bm25(store):
+    await store.store(text_event("deploy the release to staging", correlation_id="c1"))
+    await store.store(text_event("release notes: release candidate, release date", correlation_id="c2"))
+    await store.store(text_event("nothing relevant here", correlation_id="c3"))
+    await store.store(text_event("release finished", "TaskCompleted", correlation_id="c4", attempts=2))
+
+    results = await store.keyword_search("release")
+    assert [r["event_id"] for r in results][0] == "c2"
+    assert {r["event_id"] for r in results} == {"c1", "c2", "c4"}
+    assert all(0 < r["similarity"] < 1 for r in results)
+    assert results[0]["metadata"]["event_type"] == "UserMessage"
+
+    # every term must match; numbers are indexed as key:value
+    assert [r["event_id"] for r in await store.keyword_search("release staging")] == ["c1"]
+    assert [r["event_id"] for r in await store.keyword_search("attempts:2")] == ["c4"]
+    assert [r["event_id"] for r in await store.keyword_search("release", event_type="TaskCompleted")] == ["c4"]
+    # FTS5 syntax is taken literally
+    assert await store.keyword_search('NOT "release* OR') == []
+    assert await store.keyword_search("  ") == []
+
+
+async def test_keyword_search_matches_cjk_substrings(store):
+    await store.store(text_event("我们明天去北京开会", correlation_id="zh"))
+    await store.store(text_event("会议纪要已经发送", correlation_id="other"))
+
+    assert [r["event_id"] for r in await store.keyword_search("北京")] == ["zh"]
+    assert [r["event_id"] for r in await store.keyword_search("开会 明天")] == ["zh"]
+    assert await store.keyword_search("北会") == []
+
+
+async def test_keyword_index_covers_sealed_and_existing_events(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    store = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"), hot_days=7)
+    old = days_ago(30, 1)
+    old.data["text"] = "archived invoice"
+    await store.store(old)
+    await store.store(text_event("fresh invoice"))
+    await store.seal()
+    assert len(await store.keyword_search("invoice")) == 2
+    await store.close()
+
+    # a store from before the index is indexed once on upgrade
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("DROP TABLE event_fts")
+        await db.execute("DROP TABLE event_fts_docs")
+        await db.commit()
+    upgraded = RawEventStore(db_path=db_path, media_dir=str(tmp_path / "media"))
+    assert {r["text"] for r in await upgraded.keyword_search("invoice")} == {
+        "UserMessage seq:1 archived invoice", "UserMessage fresh invoice",
+    }
+    await upgraded.store(text_event("another invoice"))
+    assert len(await upgraded.keyword_search("invoice")) == 3
+    await upgraded.close()
+
+
+class Media:
+    def __init__(self, data, extension="png"):
+        self.data = data
+        self.extension = extension
+
+
+async def media_refs(db_path: str) -> dict:
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT key, refs FROM media_blobs")
+        return dict(await cursor.fetchall())
+
+
+def media_files(root) -> list:
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+
+async def test_media_is_stored_once_per_content(store, tmp_path):
+    payload = os.urandom(3 * 1024 * 1024 + 5)
+    first = await store.store(make_event(1), media=Media(payload))
+    source = tmp_path / "upload.png"
+    source.write_bytes(payload)
+    second = await store.store(make_event(2), media=Media(str(source)))
+
+    async def chunks():
+        for start in range(0, len(payload), 100000):
+            yield payload[start:start + 100000]
+
+    third = await store.store(make_event(3), media=Media(chunks()))
+    other = await store.store(make_event(4), media=Media(b"other", extension="wav"))
+    await store.flush()
+
+    assert len(media_files(store.media_dir)) == 2
+    refs = await media_refs(store.db_path)
+    assert sorted(refs.values()) == [1, 3]
+
+    view = await store.get_media(third)
+    assert isinstance(view, memoryview) and view.readonly
+    assert view.nbytes == len(payload) and view[:64] == payload[:64] and view.tobytes() == payload
+    view.release()
+    assert (await store.get_media(other)).tobytes() == b"other"
+    assert await store.get_media(first) is not None and await store.get_media(second) is not None
+    assert await store.get_media(await store.store(make_event(5))) is None
+
+
+async def test_unreferenced_media_is_collected(store):
+    kept = await store.store(make_event(1), media=Media(b"kept"))
+    dropped = await store.store(make_event(2), media=Media(b"dropped"))
+    await store.flush()
+    dropped_key = next(
+        key for key in await media_refs(store.db_path) if store._media.open(key).tobytes() == b"dropped"
+    )
+    # a file left behind without an event row
+    orphan_key, _ = await store._media.put(b"orphan", "bin")
+
+    assert await store.release_media(dropped_key) == 0
+    assert await store.collect_media_garbage() == 0  # within the grace period
+    assert await store.collect_media_garbage(grace_period=0) == 2
+    assert await store.get_media(dropped) is None
+    assert (await store.get_media(kept)).tobytes() == b"kept"
+    assert orphan_key not in media_files(store.media_dir)
+    assert list((await media_refs(store.db_path)).values()) == [1]
@@ -0,0 +1,205 @@
+"""
+Tests for the Redis Streams message bus backend.
+
+Runs against an in-process fakeredis server; set MAGI_TEST_REDIS_URL to run
+against a real redis-server instead.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from magi.events.events import Event, EventLevel
+from magi.events.redis_backend import RedisMessageBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def redis_client():
+    url = os.getenv("MAGI_TEST_REDIS_URL")
+    if url:
+        import redis.asyncio as aioredis
+        client = aioredis.from_url(url)
+    else:
+        client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+    yield client
+    await client.flushdb()
+    await client.aclose()
+
+
+def make_backend(client, name: str, **kwargs) -> RedisMessageBackend:
+    return RedisMessageBackend(
+        client=client,
+        consumer_name=name,
+        stream_prefix="test:events:",
+        block_ms=50,
+        **kwargs,
+    )
+
+
+async def test_publish_delivers_to_local_subscribers(redis_client):
+    backend = make_backend(redis_client, "c1")
+    broadcast_a, broadcast_b = [], []
+    await backend.subscribe("Ping", lambda event: broadcast_a.append(event.data))
+    await backend.subscribe("Ping", lambda event: broadcast_b.append(event.data))
+    await backend.start()
+
+    assert await backend.publish(Event(type="Ping", data={"n": 1}))
+    await wait_until(lambda: broadcast_a and broadcast_b)
+    await backend.stop()
+
+    assert broadcast_a == broadcast_b == [{"n": 1}]
+
+
+async def test_consumer_group_splits_events_between_processes(redis_client):
+    first, second = make_backend(redis_client, "c1"), make_backend(redis_client, "c2")
+    received = {"c1": [], "c2": []}
+    await first.subscribe("Job", lambda event: received["c1"].append(event.data), propagation_mode="competing")
+    await second.subscribe("Job", lambda event: received["c2"].append(event.data), propagation_mode="competing")
+    await first.start()
+    await second.start()
+
+    for i in range(40):
+        await first.publish(Event(type="Job", data=i))
+    await wait_until(lambda: len(received["c1"]) + len(received["c2"]) == 40)
+    await first.stop()
+    await second.stop()
+
+    # every event is handled exactly once across the group
+    assert sorted(received["c1"] + received["c2"]) == list(range(40))
+    stats = await first.get_stats()
+    assert stats["acked_count"] == len(received["c1"])
+
+
+async def test_pending_entries_of_dead_consumer_are_reclaimed(redis_client):
+    stream = "test:events:Job"
+    await redis_client.xgroup_create(stream, "magi", id="0", mkstream=True)
+
+    # a consumer reads an entry and dies without acking it
+    publisher = make_backend(redis_client, "publisher")
+    await publisher.publish(Event(type="Job", data="orphan", level=EventLevel.INFO))
+    await redis_client.xreadgroup("magi", "dead", {stream: ">"}, count=10)
+
+    backend = make_backend(redis_client, "c1", claim_idle_ms=200, ack_interval=0.01)
+    received = []
+    await backend.subscribe("Job", lambda event: received.append(event.data), propagation_mode="competing")
+    await backend.start()
+    await wait_until(lambda: received)
+    await wait_until(lambda: backend._stats["acked_count"] == 1)
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    assert received == ["orphan"]
+    assert stats["reclaimed_count"] == 1
+    assert (await redis_client.xpending(stream, "magi"))["pending"] == 0
+
+
+async def test_wildcard_subscription_reads_matching_streams(redis_client):
+    publisher = make_backend(redis_client, "pub")
+    for event_type in ("Loop.Started", "Loop.Phase.Completed", "UserMessage"):
+        await publisher.publish(Event(type=event_type, data=None))
+
+    backend = make_backend(redis_client, "c1", pattern_scan_interval=0.05)
+    received = []
+    await backend.subscribe("Loop.*", lambda event: received.append(event.type), propagation_mode="competing")
+    await backend.start()
+
+    await wait_until(lambda: len(received) == 2)
+    await publisher.publish(Event(type="Loop.Paused", data=None))
+    await wait_until(lambda: len(received) == 3)
+    await backend.stop()
+
+    assert sorted(received) == ["Loop.Paused", "Loop.Phase.Completed", "Loop.Started"]
+
+
+async def test_publish_many_pipelines_xadds(redis_client):
+    backend = make_backend(redis_client, "c1")
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.subscribe("Pong", lambda event: received.append(event.data))
+    await backend.start()
+
+    results = await backend.publish_many([
+        Event(type="Ping", data=1),
+        Event(type="Pong", data=2),
+        Event(type="Ping", data=3),
+    ])
+    await wait_until(lambda: len(received) == 3)
+    await backend.stop()
+
+    assert results == [True, True, True]
+    assert sorted(received) == [1, 2, 3]
+
+
+async def test_own_entries_queued_in_slow_mailboxes_are_not_redelivered(redis_client):
+    backend = make_backend(redis_client, "c1", claim_idle_ms=200, ack_interval=0.01)
+    fast = []
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.1)
+
+    await backend.subscribe("Job", slow_handler)
+    await backend.subscribe("Job", lambda event: fast.append(event.data))
+    await backend.start()
+
+    await backend.publish_many([Event(type="Job", data=i) for i in range(10)])
+    await wait_until(lambda: backend._stats["acked_count"] == 10)
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    assert sorted(fast) == list(range(10))
+    assert stats["reclaimed_count"] == 0
+
+
+async def test_broadcast_subscribers_of_every_process_receive_every_event(redis_client):
+    first, second = make_backend(redis_client, "c1"), make_backend(redis_client, "c2")
+    workers = make_backend(redis_client, "w1")
+    received = {"c1": [], "c2": [], "w1": []}
+    await first.subscribe("Job", lambda event: received["c1"].append(event.data))
+    await second.subscribe("*", lambda event: received["c2"].append(event.data))
+    await workers.subscribe("Job", lambda event: received["w1"].append(event.data), propagation_mode="competing")
+    for backend in (first, second, workers):
+        await backend.start()
+    # the monitor creates its broadcast group when its first scan finds the stream
+    await wait_until(lambda: ("test:events:Job", second.broadcast_group) in second._groups_created)
+
+    await workers.publish_many([Event(type="Job", data=i) for i in range(20)])
+    await wait_until(lambda: all(len(values) == 20 for values in received.values()))
+    for backend in (first, second, workers):
+        await backend.stop()
+
+    # the broadcast monitors do not take entries away from the competing worker
+    assert received["c1"] == received["c2"] == sorted(received["w1"]) == list(range(20))
+
+
+async def test_trimmer_keeps_pending_entries_and_counts_overflow(redis_client):
+    stream = "test:events:Job"
+    backend = make_backend(redis_client, "c1", max_queue_size=5, trim_interval=0.05)
+    await backend.start()
+    # a consumer of the shared group holds the first entry without acking it
+    await backend.publish(Event(type="Job", data=0))
+    await redis_client.xgroup_create(stream, "magi", id="0")
+    await redis_client.xreadgroup("magi", "slow", {stream: ">"}, count=1)
+    await backend.publish_many([Event(type="Job", data=i) for i in range(1, 4)])
+
+    await asyncio.sleep(0.2)
+    # under the limit: the pending entry and everything after it are kept
+    assert await redis_client.xlen(stream) == 4
+    assert backend._stats["dropped_count"] == 0
+
+    await backend.publish_many([Event(type="Job", data=i) for i in range(4, 10)])
+    await wait_until(lambda: backend._stats["dropped_count"] == 5)
+    await backend.stop()
+
+    assert await redis_client.xlen(stream) == 5
@@ -0,0 +1,85 @@
+"""
+Tests for the shared-memory ring buffer message bus backend.
+"""
+import asyncio
+import multiprocessing
+import uuid
+
+import pytest
+
+from magi.events.events import Event
+from magi.events.shm_backend import SharedMemoryMessageBackend
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+def publish_from_other_process(name: str, count: int):
+    """Producer process: attach to the ring and publish count events."""
+    async def produce():
+        backend = SharedMemoryMessageBackend(name=name, slot_count=64, slot_size=512)
+        await backend.publish_many([Event(type="Ping", data=i, source="producer") for i in range(count)])
+        backend._detach()
+
+    asyncio.run(produce())
+
+
+@pytest.fixture
+def ring_name():
+    name = f"magi_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    SharedMemoryMessageBackend(name=name).unlink()
+
+
+async def test_events_published_by_another_process_reach_local_subscribers(ring_name):
+    backend = SharedMemoryMessageBackend(name=ring_name, slot_count=64, slot_size=512)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append((event.source, event.data)))
+    await backend.start()
+    await backend.publish(Event(type="Ping", data="local", source="self"))
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=publish_from_other_process, args=(ring_name, 20),
+    )
+    process.start()
+    await asyncio.get_running_loop().run_in_executor(None, process.join, 30)
+    await wait_until(lambda: len(received) == 21)
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    assert process.exitcode == 0
+    assert received == [("self", "local")] + [("producer", i) for i in range(20)]
+    assert stats["published_count"] == 1
+    assert stats["read_count"] == 21 and stats["write_seq"] == 21
+    assert stats["latency"]["Ping"]["queue_wait"]["count"] == 21
+
+
+async def test_lapped_reader_skips_to_oldest_and_counts_overruns(ring_name):
+    writer = SharedMemoryMessageBackend(name=ring_name, slot_count=8, slot_size=256)
+    reader = SharedMemoryMessageBackend(name=ring_name, slot_count=8, slot_size=256)
+    reader._attach()
+
+    await writer.publish_many([Event(type="Ping", data=i) for i in range(20)])
+    entries = reader._read()
+
+    assert [event.data for event, _ in entries] == list(range(12, 20))
+    assert reader._stats["overrun_count"] == 12
+    writer._detach()
+    reader._detach()
+
+
+async def test_oversized_events_and_layout_mismatch_are_refused(ring_name):
+    backend = SharedMemoryMessageBackend(name=ring_name, slot_count=8, slot_size=128)
+    results = await backend.publish_many([Event(type="Ping", data="x" * 500), Event(type="Ping", data=1)])
+    assert results == [False, True]
+    assert backend._stats["dropped_count"] == 1
+
+    with pytest.raises(ValueError):
+        SharedMemoryMessageBackend(name=ring_name, slot_count=16, slot_size=128)._attach()
+    backend._detach()
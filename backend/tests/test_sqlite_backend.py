@@ -0,0 +1,464 @@
+"""
+Tests for the SQLite message bus backend.
+"""
+import asyncio
+import json
+import time
+
+import aiosqlite
+import pytest
+
+from magi.events.events import Event, EventLevel
+from magi.events.replay import main as replay_main
+from magi.events.sqlite_backend import SQLiteMessageBackend
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "message_queue.db")
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_publish_delivers_to_subscriber(db_path, persistent):
+    backend = SQLiteMessageBackend(db_path=db_path, persistent_connection=persistent)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.start()
+
+    assert await backend.publish(Event(type="Ping", data={"n": 1}))
+    await wait_until(lambda: received)
+    await backend.stop()
+
+    assert received == [{"n": 1}]
+
+
+async def test_group_commit_coalesces_concurrent_publishes(db_path):
+    backend = SQLiteMessageBackend(
+        db_path=db_path,
+        num_workers=0,
+        persistent_connection=True,
+        publish_batch_size=16,
+        publish_max_delay=0.05,
+    )
+    await backend.start()
+
+    results = await asyncio.gather(
+        *(backend.publish(Event(type="Ping", data=i)) for i in range(32))
+    )
+    stats = await backend.get_stats()
+    await backend._close_connection()
+
+    assert all(results)
+    assert stats["published_count"] == 32
+    assert stats["publish_batches"] == 2
+    assert stats["queue_size"] == 32
+
+
+async def test_group_commit_drops_oldest_when_full(db_path):
+    backend = SQLiteMessageBackend(
+        db_path=db_path,
+        max_queue_size=4,
+        num_workers=0,
+        persistent_connection=True,
+    )
+    await backend.start()
+
+    for i in range(6):
+        await backend.publish(Event(type="Ping", data=i, level=EventLevel.INFO))
+
+    stats = await backend.get_stats()
+    claimed = await backend._claim_events()
+    await backend._close_connection()
+
+    assert stats["queue_size"] == 4
+    assert stats["dropped_count"] == 2
+    assert claimed[0][1].data == 2
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_full_queue_of_leased_rows_rejects_new_events(db_path, persistent):
+    backend = SQLiteMessageBackend(
+        db_path=db_path, max_queue_size=3, num_workers=0, persistent_connection=persistent,
+        stop_timeout=0.1,
+    )
+    await backend.start()
+    await backend.publish_many([Event(type="Ping", data=i) for i in range(3)])
+    await backend._claim_events()  # all three leased: nothing can be dropped
+
+    assert not await backend.publish(Event(type="Ping", data=3))
+    assert await backend.publish_many([Event(type="Ping", data=i) for i in (4, 5)]) == [False, False]
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    assert stats["queue_size"] == 3
+    assert stats["dropped_count"] == 3
+    assert stats["published_count"] == 3
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_overflow_drops_unclaimed_rows_before_rejecting(db_path, persistent):
+    backend = SQLiteMessageBackend(
+        db_path=db_path, max_queue_size=3, num_workers=0, persistent_connection=persistent,
+        stop_timeout=0.1,
+    )
+    await backend.start()
+    await backend.publish_many([Event(type="Ping", data=i) for i in (0, 1)])
+    await backend._claim_events()  # rows 0 and 1 leased
+    await backend.publish(Event(type="Ping", data=2))
+
+    # the one unclaimed row (2) makes room for 3, event 4 does not fit
+    assert await backend.publish_many([Event(type="Ping", data=i) for i in (3, 4)]) == [True, False]
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM message_queue")
+        (rows,) = await cursor.fetchone()
+    assert rows == 3
+    assert stats["queue_size"] == 3
+    assert stats["dropped_count"] == 2
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_publish_many_writes_one_transaction(db_path, persistent):
+    backend = SQLiteMessageBackend(
+        db_path=db_path, max_queue_size=4, num_workers=0, persistent_connection=persistent
+    )
+    await backend.start()
+
+    await backend.publish(Event(type="Ping", data="old"))
+    results = await backend.publish_many([Event(type="Ping", data=i) for i in range(5)])
+    stats = await backend.get_stats()
+    claimed = await backend._claim_events()
+    await backend._ack_events([row_id for row_id, _ in claimed])
+    await backend.stop()
+
+    # the batch alone overflows the queue: its first event and the older row are dropped
+    assert results == [False, True, True, True, True]
+    assert stats["dropped_count"] == 2
+    assert stats["queue_size"] == 4
+    assert [event.data for _, event in claimed] == [1, 2, 3, 4]
+    if persistent:
+        assert stats["publish_batches"] == 2
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_same_process_publish_wakes_worker_without_polling(db_path, persistent):
+    backend = SQLiteMessageBackend(
+        db_path=db_path, persistent_connection=persistent, poll_interval=30.0
+    )
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.start()
+    await asyncio.sleep(0.05)  # let every worker go idle
+
+    await backend.publish(Event(type="Ping", data=1))
+    await wait_until(lambda: received, timeout=2.0)
+    await backend.stop()
+
+    assert received == [1]
+
+
+async def test_claim_leases_batch_in_priority_order(db_path):
+    backend = SQLiteMessageBackend(db_path=db_path, num_workers=0, claim_batch_size=3)
+    await backend.start()
+
+    await backend.publish(Event(type="Ping", data="info", level=EventLevel.INFO))
+    await backend.publish(Event(type="Ping", data="error", level=EventLevel.ERROR))
+    await backend.publish(Event(type="Ping", data="debug", level=EventLevel.DEBUG))
+    await backend.publish(Event(type="Ping", data="later", level=EventLevel.DEBUG))
+
+    first = await backend._claim_events()
+    second = await backend._claim_events()
+
+    assert [event.data for _, event in first] == ["error", "info", "debug"]
+    assert [event.data for _, event in second] == ["later"]
+    # everything is leased, nothing left to claim
+    assert await backend._claim_events() == []
+
+
+async def test_unacked_events_are_redelivered_after_lease_expiry(db_path):
+    backend = SQLiteMessageBackend(db_path=db_path, num_workers=0, visibility_timeout=0.05)
+    await backend.start()
+    await backend.publish(Event(type="Ping", data=1))
+
+    first = await backend._claim_events()
+    assert await backend._claim_events() == []
+    backend._leased.clear()  # as if the claiming process had died: nobody renews the lease
+
+    await asyncio.sleep(0.1)
+    redelivered = await backend._claim_events()
+    assert [event.data for _, event in redelivered] == [1]
+
+    await backend._ack_events([row_id for row_id, _ in redelivered])
+    stats = await backend.get_stats()
+
+    assert first[0][0] == redelivered[0][0]
+    assert stats["redelivered_count"] == 1
+    assert stats["acked_count"] == 1
+    assert stats["queue_size"] == 0
+
+
+async def test_events_are_acked_after_handling(db_path):
+    backend = SQLiteMessageBackend(db_path=db_path, persistent_connection=True)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.start()
+
+    for i in range(20):
+        await backend.publish(Event(type="Ping", data=i))
+    await wait_until(lambda: len(received) == 20)
+    await backend.stop()
+
+    stats = await backend.get_stats()
+    assert sorted(received) == list(range(20))
+    assert stats["acked_count"] == 20
+    assert stats["queue_size"] == 0
+
+
+@pytest.mark.parametrize("mode", ["archive", "delete"])
+async def test_compaction_removes_only_processed_rows(db_path, mode):
+    backend = SQLiteMessageBackend(
+        db_path=db_path,
+        num_workers=0,
+        compaction_interval=0,
+        compaction_chunk_size=3,
+        compaction_mode=mode,
+    )
+    await backend.start()
+
+    for i in range(10):
+        await backend.publish(Event(type="Ping", data=i))
+    backend.claim_batch_size = 7
+    claimed = await backend._claim_events()
+    await backend._ack_events([row_id for row_id, _ in claimed])
+
+    compacted = await backend.compact()
+    stats = await backend.get_stats()
+    remaining = await backend._claim_events()
+
+    assert compacted == 7
+    assert stats["compacted_rows"] == 7
+    assert stats["table_rows"] == 3
+    assert stats["archive_rows"] == (7 if mode == "archive" else 0)
+    assert stats["last_compaction"]["rows"] == 7
+    assert stats["last_compaction"]["claim_latency_after_ms"] >= 0
+    assert sorted(event.data for _, event in remaining) == [7, 8, 9]
+
+
+async def test_json_rows_from_older_versions_are_still_delivered(db_path):
+    import json
+
+    backend = SQLiteMessageBackend(db_path=db_path, num_workers=0)
+    await backend.start()
+    legacy = Event(type="Ping", data={"legacy": True})
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            SQLiteMessageBackend._INSERT_SQL,
+            ("Ping", json.dumps(legacy.to_dict()), 1, "old", legacy.correlation_id,
+             json.dumps({}), legacy.timestamp, None),
+        )
+        await db.commit()
+    await backend.publish(Event(type="Ping", data={"legacy": False}))
+
+    claimed = await backend._claim_events()
+    await backend._ack_events([row_id for row_id, _ in claimed])
+    await backend.stop()
+    assert sorted(event.data["legacy"] for _, event in claimed) == [False, True]
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_scheduled_rows_survive_restart_and_wait_until_due(db_path, persistent):
+    backend = SQLiteMessageBackend(db_path=db_path, persistent_connection=persistent, poll_interval=30)
+    await backend.start()
+    deliver_at = time.time() + 0.3
+    assert await backend.publish(Event(type="Ping", data="later"), deliver_at=deliver_at)
+    await backend.stop()
+
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT deliver_at FROM message_queue WHERE processed = false")
+        assert await cursor.fetchall() == [(deliver_at,)]
+
+    # a fresh instance arms its timer from the persisted row, no polling needed
+    backend = SQLiteMessageBackend(db_path=db_path, persistent_connection=persistent, poll_interval=30)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(time.time()))
+    await backend.start()
+    assert (await backend.get_stats())["scheduled_count"] == 1
+
+    await wait_until(lambda: received)
+    await backend.stop()
+
+    assert received[0] >= deliver_at
+    assert received[0] - deliver_at < 0.2
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+async def test_unencodable_event_fails_only_its_own_publish(db_path, persistent):
+    backend = SQLiteMessageBackend(db_path=db_path, persistent_connection=persistent)
+    received = []
+    await backend.subscribe("Ping", lambda event: received.append(event.data))
+    await backend.start()
+
+    assert not await asyncio.wait_for(backend.publish(Event(type="Ping", data=object())), 5)
+    assert await asyncio.wait_for(backend.publish(Event(type="Ping", data=1)), 5)
+    assert await backend.publish_many([
+        Event(type="Ping", data=object()), Event(type="Ping", data=2),
+    ]) == [False, True]
+    await wait_until(lambda: len(received) == 2)
+    await backend.stop()
+
+    assert sorted(received) == [1, 2]
+
+
+async def test_existing_database_is_not_vacuumed_on_start(db_path):
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("CREATE TABLE event_store (id TEXT PRIMARY KEY)")
+        await db.commit()
+
+    backend = SQLiteMessageBackend(db_path=db_path, num_workers=0, compaction_interval=0)
+    await backend.start()
+    stats = await backend.get_stats()
+    assert stats["incremental_vacuum"] is False
+    assert stats["db_file_bytes"] > 0
+
+    await backend.enable_incremental_vacuum()
+    await backend.stop()
+
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("PRAGMA auto_vacuum")
+        assert (await cursor.fetchone())[0] == 2
+
+
+async def test_leases_of_events_queued_in_slow_mailboxes_are_renewed(db_path):
+    backend = SQLiteMessageBackend(db_path=db_path, visibility_timeout=0.5)
+    fast = []
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.1)
+
+    await backend.subscribe("Ping", slow_handler)
+    await backend.subscribe("Ping", lambda event: fast.append(event.data))
+    await backend.start()
+
+    await backend.publish_many([Event(type="Ping", data=i) for i in range(20)])
+    await wait_until(lambda: backend._stats["acked_count"] == 20)
+    stats = await backend.get_stats()
+    await backend.stop()
+
+    assert sorted(fast) == list(range(20))
+    assert stats["redelivered_count"] == 0
+    assert stats["lease_renewals"] > 0
+
+
+async def test_events_whose_handler_is_cancelled_on_stop_stay_unprocessed(db_path):
+    backend = SQLiteMessageBackend(db_path=db_path, stop_timeout=0.2)
+    started = asyncio.Event()
+
+    async def stuck_handler(event):
+        started.set()
+        await asyncio.sleep(60)
+
+    await backend.subscribe("Ping", stuck_handler)
+    await backend.start()
+    await backend.publish(Event(type="Ping", data=1))
+    await asyncio.wait_for(started.wait(), 5)
+    await backend.stop()  # times out on the handler and cancels it
+
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT processed FROM message_queue")
+        rows = await cursor.fetchall()
+    assert [bool(processed) for processed, in rows] == [False]
+    assert backend._stats["acked_count"] == 0
+
+
+async def write_history(db_path, events, compact_first: int = 0):
+    """Publish, claim and ack events; archive the first compact_first of them."""
+    backend = SQLiteMessageBackend(
+        db_path=db_path, num_workers=0, compaction_interval=0, compaction_chunk_size=compact_first or 1,
+    )
+    await backend.start()
+    await backend.publish_many(events)
+    if compact_first:
+        backend.claim_batch_size = compact_first
+        claimed = await backend._claim_events()
+        await backend._ack_events([row_id for row_id, _ in claimed])
+        await backend._compact_chunk()
+    backend.claim_batch_size = len(events)
+    claimed = await backend._claim_events()
+    await backend._ack_events([row_id for row_id, _ in claimed])
+    await backend.stop()
+
+
+async def test_history_pages_through_queue_and_archive_in_publish_order(db_path):
+    base = 1_700_000_000.0
+    events = [
+        Event(type="Task.Done" if i % 3 else "Ping", data=i, timestamp=base + i // 2)
+        for i in range(20)
+    ]
+    await write_history(db_path, events, compact_first=8)
+    # unprocessed rows are not history
+    pending = SQLiteMessageBackend(db_path=db_path, num_workers=0)
+    await pending.publish(Event(type="Ping", data="pending", timestamp=base + 5))
+
+    backend = SQLiteMessageBackend(db_path=db_path)
+    every = [(cursor, event.data) async for cursor, event in backend.history(batch_size=3)]
+    assert sorted(data for _, data in every) == list(range(20))
+    assert [cursor for cursor, _ in every] == sorted(cursor for cursor, _ in every)
+
+    pings = [event.data async for _, event in backend.history(event_types=["Ping"], batch_size=2)]
+    assert pings == [i for i in range(20) if i % 3 == 0]
+    window = [event.data async for _, event in backend.history(
+        since=base + 2, until=base + 4, event_types=["Task.*"],
+    )]
+    assert window == [i for i in range(4, 8) if i % 3]
+
+    resumed = [event.data async for _, event in backend.history(after=every[9][0], batch_size=4)]
+    assert resumed == [data for _, data in every[10:]]
+
+
+async def test_replay_redispatches_to_one_subscriber_paced(db_path):
+    base = time.time() - 60
+    await write_history(db_path, [
+        Event(type="Ping", data=i, timestamp=base + i * 0.1) for i in range(5)
+    ])
+
+    backend = SQLiteMessageBackend(db_path=db_path)
+    target, other = [], []
+    subscription_id = await backend.subscribe("Ping", lambda event: target.append(event.data))
+    await backend.subscribe("Ping", lambda event: other.append(event.data))
+
+    result = await backend.replay(subscription_id)
+    assert target == list(range(5)) and other == []
+    assert result["replayed"] == 5
+
+    paced = []
+    result = await backend.replay(paced.append, after=result["cursor"])
+    assert result["replayed"] == 0
+
+    started = time.monotonic()
+    result = await backend.replay(lambda event: paced.append(event.data), speed=2.0)
+    assert paced == list(range(5))
+    # 0.4s of original spacing at double speed
+    assert time.monotonic() - started >= 0.19
+    assert (await backend.get_stats())["replayed_count"] == 10
+
+
+def test_replay_cli_prints_events_and_resume_cursor(db_path, capsys):
+    asyncio.run(write_history(db_path, [Event(type="Ping", data=i) for i in range(3)]))
+
+    assert replay_main(["--db", db_path, "--type", "Ping"]) == 0
+    captured = capsys.readouterr()
+    assert [json.loads(line)["data"] for line in captured.out.splitlines()] == [0, 1, 2]
+    cursor = captured.err.strip().split("cursor: ")[1]
+
+    assert replay_main(["--db", db_path, "--after", cursor]) == 0
+    assert capsys.readouterr().out == ""